@@ -0,0 +1,101 @@
+"""
+Microbenchmark: full-document BeautifulSoup parsing vs. targeted extraction.
+
+    python benchmarks/bench_extract.py [--repeat 20]
+
+Reports mean parse time and peak traced memory per page for each page shape.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from ipo_ai.scraper.extract import find_next_data, find_first_table, find_embedded_records
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _filler(kb):
+    # Navigation/markup noise similar in size to a real Chittorgarh page
+    block = '<div class="nav"><a href="/x">Link</a><span>text</span></div>\n'
+    return block * (kb * 1024 // len(block))
+
+def make_next_data_page(rows=300, filler_kb=100):
+    items = [{"company_name": f"Company {i} Ltd", "issue_price_rs": 100 + i,
+              "total_issue_amount_rs_cr": 55.5, "listing_date": "Jan 05, 2024"} for i in range(rows)]
+    blob = json.dumps({"props": {"pageProps": {"resultData": {"reportData": items}}}})
+    return f'<html><head></head><body>{_filler(filler_kb)}<script id="__NEXT_DATA__" type="application/json">{blob}</script></body></html>'
+
+def make_table_page(rows=300, filler_kb=100):
+    head = '<tr><th>Company</th><th>Price</th><th>Issue Size</th><th>Status</th></tr>'
+    body = ''.join(f'<tr><td>Company {i} Ltd</td><td>90-95</td><td>1,200 Cr</td><td>Listed</td></tr>' for i in range(rows))
+    return f'<html><body>{_filler(filler_kb)}<table>{head}{body}</table>{_filler(20)}</body></html>'
+
+# Baselines: what ipo_scraper / historical_runner did before
+def old_next_data(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    tag = soup.find('script', id='__NEXT_DATA__')
+    return json.loads(tag.string) if tag else None
+
+def old_table(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table')
+    return table.find_all('tr') if table else None
+
+def old_embedded(html):
+    import re
+    soup = BeautifulSoup(html, 'html.parser')
+    records = []
+    for s in soup.find_all('script'):
+        content = s.string or ""
+        for mo in re.finditer(r'\{[^{}]*company_name[^{}]*\}', content):
+            try:
+                records.append(json.loads(mo.group(0).replace('\\"', '"')))
+            except ValueError:
+                continue
+        if records:
+            break
+    return records
+
+def new_table(html):
+    table = find_first_table(html)
+    return table.find_all('tr') if table else None
+
+def measure(fn, html, repeat):
+    fn(html)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("__NEXT_DATA__", make_next_data_page(), old_next_data, find_next_data),
+        ("first <table>", make_table_page(), old_table, new_table),
+    ]
+    debug_page = os.path.join(ROOT, "debug_page.html")
+    if os.path.exists(debug_page):
+        with open(debug_page, encoding="utf-8") as f:
+            cases.append(("inline scripts (debug_page.html)", f.read(), old_embedded, find_embedded_records))
+
+    print(f"{'page':<34}{'size KB':>9}{'old ms':>10}{'new ms':>10}{'speedup':>9}{'old peak KB':>13}{'new peak KB':>13}")
+    for label, html, old_fn, new_fn in cases:
+        old_ms, old_peak = measure(old_fn, html, args.repeat)
+        new_ms, new_peak = measure(new_fn, html, args.repeat)
+        print(f"{label:<34}{len(html) / 1024:>9.0f}{old_ms:>10.2f}{new_ms:>10.2f}{old_ms / new_ms:>8.1f}x{old_peak:>13.0f}{new_peak:>13.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark per-worker memory and cold-load time of a model bundle, pickled vs packed.
+
+    python benchmarks/bench_model_memory.py [--rows 20000] [--workers 4]
+
+Trains a bundle on synthetic IPOs into a throwaway registry, then starts N
+processes (as uvicorn workers would be) that each load it and score a batch:
+  pickle  - joblib.load of the sklearn forests (every worker has a private copy)
+  packed  - registry.load_bundle: PackedForest arrays memory-mapped read-only
+Reports load time, first-predict time and, per worker, the growth in RSS, USS
+(private) and PSS (shared pages split between the processes mapping them).
+Needs psutil; PSS/USS are only available on Linux.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+import warnings
+
+# Spawned workers re-import this module; they must land in the parent's directory
+BENCH_DIR = os.environ.setdefault("IPO_BENCH_DIR", tempfile.mkdtemp(prefix="ipo_bench_"))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(BENCH_DIR)  # models/ is relative to the working directory
+
+import numpy as np
+import psutil
+
+def memory_mb():
+    info = psutil.Process().memory_full_info()
+    return {key: getattr(info, key, 0) / 2**20 for key in ("rss", "uss", "pss")}
+
+def worker(mode, version, barrier, results):
+    try:
+        results.put(measure(mode, version, barrier))
+    except Exception as e:
+        barrier.abort()
+        results.put({"error": f"{type(e).__name__}: {e}"})
+
+def measure(mode, version, barrier):
+    import joblib
+    from ipo_ai.training import registry
+    from ipo_ai.training.predict import predict_matrix
+
+    warnings.simplefilter("ignore")
+    rng = np.random.default_rng(os.getpid())
+    X = rng.random((500, 6)) * 100
+    before = memory_mb()
+    start = time.perf_counter()
+    if mode == "pickle":
+        path = os.path.join(registry.REGISTRY_DIR, version)
+        components = {name: joblib.load(os.path.join(path, f"{name}.pkl"))
+                      for name in registry.load_manifest(version)["artifacts"]}
+    else:
+        components = registry.load_bundle(version)
+    load_s = time.perf_counter() - start
+    start = time.perf_counter()
+    predict_matrix(components, X)
+    predict_s = time.perf_counter() - start
+    # Measure while every worker still has the bundle mapped, so shared pages are split
+    barrier.wait()
+    after = memory_mb()
+    barrier.wait()
+    return {"load_s": load_s, "predict_s": predict_s, **{key: after[key] - before[key] for key in after}}
+
+def run_mode(ctx, mode, version, workers):
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, version, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get(timeout=600) for _ in procs]
+    for p in procs:
+        p.join()
+    errors = [r["error"] for r in rows if "error" in r]
+    if errors:
+        raise RuntimeError(f"{mode} workers failed: {errors[0]}")
+    return rows
+
+def train(rows):
+    from ipo_ai.training.registry import publish
+    from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import LabelEncoder
+
+    rng = random.Random(3)
+    X = np.array([[rng.uniform(-10, 80), rng.uniform(0, 100), rng.uniform(0, 300),
+                   rng.uniform(0, 200), rng.uniform(20, 5000), rng.uniform(10, 1500)] for _ in range(rows)])
+    y_gain = X[:, 0] * 0.6 + np.array([rng.gauss(0, 8) for _ in range(rows)])
+    encoder = LabelEncoder().fit(["HNI", "QIB", "Retail"])
+    y_cat = encoder.transform([rng.choice(["Retail", "HNI", "QIB"]) for _ in range(rows)])
+    imputer = SimpleImputer(strategy="mean").fit(X)
+    artifacts = {
+        "gain_model": RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1).fit(X, y_gain),
+        "gain_imputer": imputer,
+        "category_model": RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1).fit(X, y_cat),
+        "category_imputer": imputer,
+        "encoder": encoder,
+    }
+    for name in ("gain_model", "category_model"):
+        artifacts[name].set_params(n_jobs=None)
+    return publish(artifacts, {"features": [], "metrics": {"rows": rows}})
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    version = train(args.rows)
+    bundle_dir = os.path.join(BENCH_DIR, "models", "registry", version)
+    size_mb = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(bundle_dir) for f in files) / 2**20
+    print(f"bundle {version}: {size_mb:.0f} MB on disk (pickles + packed arrays), {args.workers} workers")
+
+    ctx = mp.get_context("spawn")
+    print(f"{'mode':<8}{'load s':>8}{'predict ms':>12}{'RSS MB/wkr':>12}{'USS MB/wkr':>12}{'PSS MB/wkr':>12}{'PSS total':>11}")
+    for mode in ("pickle", "packed"):
+        rows = run_mode(ctx, mode, version, args.workers)
+        mean = {key: sum(r[key] for r in rows) / len(rows) for key in rows[0]}
+        print(f"{mode:<8}{mean['load_s']:>8.2f}{mean['predict_s'] * 1000:>12.1f}{mean['rss']:>12.1f}"
+              f"{mean['uss']:>12.1f}{mean['pss']:>12.1f}{mean['pss'] * len(rows):>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark table ingestion: per-cell cleaning loops vs. utils.normalize.
+
+    python benchmarks/bench_normalize.py [--rows 10000] [--repeat 3]
+
+Builds a Chittorgarh-style table (₹ prices and bands, Cr sizes, GMP, gain %,
+subscription multiples, listing dates) and reports the best-of-N time per row for
+  clean only   - per-cell ''.join(...) loops vs. table_frame() + clean_column() per column
+  parse+clean  - old table fallback (BeautifulSoup rows + loops) vs. parsers.table_records()
+and checks that both produce the same records on the formats the old loops handled.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = tempfile.mkdtemp(prefix="ipo_bench_")
+os.environ["IPO_DATABASE_URL"] = f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from ipo_ai.scraper.extract import find_first_table, read_table
+from ipo_ai.scraper.parsers import table_records, NUMERIC_COLUMNS
+from ipo_ai.utils.normalize import clean_column, table_frame, to_number
+
+HEADERS = ["Company", "Listing Gain %", "Listing Date", "Issue Price (Rs)", "Issue Size (Rs Cr)", "GMP",
+           "Retail (x)", "HNI (x)", "QIB (x)", "Best Category", "Status"]
+
+def make_table(rows):
+    rng = random.Random(5)
+    body = []
+    for i in range(rows):
+        low = rng.randint(10, 1500)
+        cells = [
+            f"Company {i} Ltd", f"{rng.uniform(-20, 90):.2f}%", f"{datetime(2024, 1 + i % 12, 1 + i % 28):%b %d, %Y}",
+            f"{low}-{low + 5}", f"{rng.uniform(20, 5000):,.2f}", f"{rng.randint(-10, 80)}",
+            f"{rng.uniform(0, 100):.2f}", f"{rng.uniform(0, 300):.2f}",
+            f"{rng.uniform(0, 200):.2f}", rng.choice(["Retail", "HNI", "QIB"]), "Listed",
+        ]
+        body.append("<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
+    head = "<tr>" + "".join(f"<th>{h}</th>" for h in HEADERS) + "</tr>"
+    return f"<html><body><div>intro</div><table>{head}{''.join(body)}</table></body></html>"
+
+# Issue sizes in every unit the sites print, in crore
+AMOUNT_CASES = {"1,200.50 Cr": 1200.5, "₹50 Lakh": 0.5, "50 Lakhs": 0.5, "10 lac": 0.1, "10 lacs": 0.1,
+                "10 Lacs.": 0.1, "75L": 0.75, "12 Crore": 12.0, "--": 0.0}
+
+# Baseline: the per-cell cleaning the table fallback, historical_runner and db/sync used
+def old_clean(txt, signed=False):
+    cln = ''.join(c for c in txt if c.isdigit() or c == '.' or (signed and c == '-'))
+    return float(cln) if cln and cln != '-' else 0.0
+
+OLD_KINDS = {'price': False, 'size': False, 'gmp': True, 'gain': True, 'retail': False, 'hni': False, 'qib': False}
+H_MAP = {'name': 0, 'gain': 1, 'listing_date': 2, 'price': 3, 'size': 4, 'gmp': 5,
+         'retail': 6, 'hni': 7, 'qib': 8, 'category': 9, 'status': 10}
+
+def old_clean_all(rows):
+    out = []
+    for cells in rows:
+        record = {}
+        for key, signed in OLD_KINDS.items():
+            txt = cells[H_MAP[key]]
+            if key == 'price':
+                txt = txt.split('-')[-1]
+            record[key] = old_clean(txt.replace('%', ''), signed)
+        out.append(record)
+    return out
+
+def new_clean_all(rows):
+    frame = table_frame(HEADERS, rows)
+    return {key: clean_column(frame[H_MAP[key]], kind) for key, (_, kind) in NUMERIC_COLUMNS.items()}
+
+def old_parse(html):
+    table = find_first_table(html)
+    out = []
+    for row in table.find_all('tr')[1:]:
+        cols = row.find_all('td')
+        record = {"ipo_name": cols[0].text.strip().split('\n')[0]}
+        for key, signed in OLD_KINDS.items():
+            txt = cols[H_MAP[key]].text.strip()
+            if key == 'price':
+                txt = txt.split('-')[-1]
+            record[key] = old_clean(txt.replace('%', ''), signed)
+        try:
+            record["listing_date"] = datetime.strptime(cols[H_MAP['listing_date']].text.strip(), '%b %d, %Y')
+        except ValueError:
+            record["listing_date"] = None
+        out.append(record)
+    return out
+
+def best(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    column = clean_column(pd.Series(list(AMOUNT_CASES)), "amount")
+    for (text, expected), cell in zip(AMOUNT_CASES.items(), column):
+        assert abs(to_number(text, "amount") - expected) < 1e-9 and abs(cell - expected) < 1e-9, f"{text!r} misread"
+
+    html = make_table(args.rows)
+    _, rows = read_table(html)
+
+    old_s, old_values = best(lambda: old_clean_all(rows), args.repeat)
+    new_s, new_values = best(lambda: new_clean_all(rows), args.repeat)
+    for key, (field, _) in NUMERIC_COLUMNS.items():
+        old_col = [r[key] for r in old_values]
+        assert all(abs(a - b) < 1e-9 for a, b in zip(old_col, new_values[key])), f"{field} differs"
+
+    old_parse_s, old_records = best(lambda: old_parse(html), args.repeat)
+    new_parse_s, new_records = best(lambda: table_records("Bench", read_table(html)), args.repeat)
+    assert len(old_records) == len(new_records) == args.rows
+    for old, new in zip(old_records, new_records):
+        assert old["ipo_name"] == new["ipo_name"] and old["listing_date"] == new["listing_date"]
+        assert abs(old["gain"] - new["listing_gain"]) < 1e-9 and abs(old["size"] - new["issue_size"]) < 1e-9
+
+    print(f"{args.rows} rows, {len(html) / 1024:.0f} KB table, best of {args.repeat}")
+    print(f"{'stage':<13}{'old us/row':>12}{'new us/row':>12}{'speedup':>9}")
+    for label, old, new in (("clean only", old_s, new_s), ("parse+clean", old_parse_s, new_parse_s)):
+        print(f"{label:<13}{old / args.rows * 1e6:>12.1f}{new / args.rows * 1e6:>12.1f}{old / new:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+End-to-end scrape_ipos benchmark against a local stand-in site, no network needed.
+
+    python benchmarks/bench_scraper.py [--sources 60] [--rows 40] [--page-kb 150]
+        [--latency-ms 80] [--jitter-ms 40] [--error-rate 0.02] [--change 0.3]
+        [--cycles 3] [--parse-workers N] [--no-archive] [--pages DIR]
+        [--json result.json] [--compare previous.json]
+
+A threaded HTTP server on 127.0.0.1 serves one page per source: the .html files in
+--pages (recorded pages, e.g. saved with `python -m ipo_ai.scraper.archive show`),
+or generated Chittorgarh-style pages (__NEXT_DATA__ and plain-table layouts
+alternating) padded to --page-kb. Every response waits latency +/- jitter, fails
+with HTTP 500 at --error-rate and honours ETag / If-None-Match. Before each cycle
+after the first, --change of the sources publish new numbers.
+
+Per cycle it reports pages/sec, parse ms/page, upsert rows/sec (over the writer
+stage's busy time) and peak RSS of the scraper plus its parser processes. --json
+writes everything, with the git commit, so runs can be compared with --compare.
+The first cycle includes starting the parser processes.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Spawned parser processes re-import this script; they reuse the parent's directory
+BENCH_DIR = os.environ.setdefault("IPO_BENCH_DIR", tempfile.mkdtemp(prefix="ipo_bench_"))
+os.environ["IPO_DATABASE_URL"] = f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+try:
+    import psutil
+except ImportError:  # falls back to the scraper process's own peak (no parser processes)
+    psutil = None
+
+import yaml
+from ipo_ai.scraper import ipo_scraper
+from ipo_ai.scraper.pipeline import default_parse_workers
+
+HEADERS = ["Company", "Listing Gain %", "Listing Date", "Issue Price (Rs)", "Issue Size (Rs Cr)", "GMP",
+           "Retail (x)", "HNI (x)", "QIB (x)", "Best Category", "Status"]
+
+def make_page(source, version, rows, page_kb):
+    """A generated list page; `version` moves GMP and subscription numbers."""
+    rng = random.Random(source)
+    items = []
+    for i in range(rows):
+        price = rng.randint(50, 1500)
+        items.append({
+            "company_name": f"Bench Source {source} Company {i} Ltd",
+            "issue_price_rs": price, "total_issue_amount_rs_cr": round(rng.uniform(20, 5000), 2),
+            "gmp": rng.randint(-10, 80) + version, "listing_date": f"Jan {1 + i % 28:02d}, 2024",
+            "listing_gain": round(rng.uniform(-20, 90), 2), "retail_subscription": round(rng.uniform(0, 100) + version, 2),
+            "hni_subscription": round(rng.uniform(0, 300), 2), "qib_subscription": round(rng.uniform(0, 200), 2),
+            "best_category": rng.choice(["Retail", "HNI", "QIB"]), "status": "Listed",
+        })
+    if source % 2 == 0:
+        data = {"props": {"pageProps": {"resultData": {"reportData": items}}}}
+        body = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script>'
+    else:
+        cells = ("company_name", "listing_gain", "listing_date", "issue_price_rs", "total_issue_amount_rs_cr", "gmp",
+                 "retail_subscription", "hni_subscription", "qib_subscription", "best_category", "status")
+        head = "".join(f"<th>{h}</th>" for h in HEADERS)
+        trs = "".join("<tr>" + "".join(f"<td>{item[c]}</td>" for c in cells) + "</tr>" for item in items)
+        body = f"<table><tr>{head}</tr>{trs}</table>"
+    page = f"<html><head><title>IPO list {source}</title></head><body><div id='nav'>menu</div>{body}"
+    # Navigation, ads and inline scripts make up most of a real list page
+    filler = "<div class='ad'><script>window.ads=window.ads||[];ads.push({slot:1})</script><p>" + "x" * 180 + "</p></div>"
+    page += filler * max(0, (page_kb * 1024 - len(page)) // len(filler))
+    return page + "</body></html>"
+
+class StandInSite:
+    """Serves /page/<n> for every source with configurable latency, jitter and errors."""
+
+    def __init__(self, sources, rows, page_kb, latency_ms, jitter_ms, error_rate, recorded=None):
+        self.sources = sources
+        self.rows = rows
+        self.page_kb = page_kb
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.recorded = recorded or []
+        self.versions = [0] * sources
+        self.counts = {"200": 0, "304": 0, "500": 0}
+        self._pages = {}
+        self._rng = random.Random(11)
+        self._lock = threading.Lock()
+
+    def page(self, source):
+        version = self.versions[source]
+        key = (source, version)
+        with self._lock:
+            cached = self._pages.get(key)
+        if cached is None:
+            if self.recorded:
+                html = self.recorded[source % len(self.recorded)]
+                html += f"<!-- version {version} -->" if version else ""
+            else:
+                html = make_page(source, version, self.rows, self.page_kb)
+            body = html.encode("utf-8")
+            cached = (body, f'"{hashlib.md5(body).hexdigest()}"')
+            with self._lock:
+                self._pages = {k: v for k, v in self._pages.items() if k[0] != source}
+                self._pages[key] = cached
+        return cached
+
+    def change(self, fraction):
+        for source in self._rng.sample(range(self.sources), int(self.sources * fraction)):
+            self.versions[source] += 1
+
+    def _delay_and_fail(self):
+        with self._lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            fail = self._rng.random() < self.error_rate
+        time.sleep(delay)
+        return fail
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real sites
+
+            def do_GET(self):
+                try:
+                    source = int(self.path.rstrip("/").rsplit("/", 1)[-1])
+                    body, etag = site.page(source)
+                except (ValueError, IndexError):
+                    self.send_error(404)
+                    return
+                if site._delay_and_fail():
+                    status, body = 500, b"error"
+                elif self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                else:
+                    status = 200
+                with site._lock:
+                    site.counts[str(status)] += 1
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                if status != 500:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+class PeakRSS:
+    """Samples RSS of this process and its children (the parser pool) every 20 ms."""
+
+    def __init__(self):
+        self.process = psutil.Process() if psutil is not None else None
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        if self.process is None:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        total = 0
+        for proc in [self.process] + self.process.children(recursive=True):
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def _run(self):
+        while not self._stop.wait(0.02):
+            self.peak = max(self.peak, self._sample())
+
+    def reset(self):
+        self.peak = self._sample()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def bench_config(args, parse_workers):
+    config = ipo_scraper.load_config()
+    config["scraper"].update(parse_workers=parse_workers, max_workers=args.fetch_workers,
+                             max_per_host=args.fetch_workers)
+    config["page_archive"] = dict(config.get("page_archive", {}), enabled=not args.no_archive,
+                                  dir=os.path.join(BENCH_DIR, "page_archive"))
+    path = os.path.join(BENCH_DIR, "config.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+    return path
+
+def run_cycle(number, urls, site, rss):
+    rss.reset()
+    served = dict(site.counts)
+    start = time.perf_counter()
+    summary = ipo_scraper.scrape_ipos(urls=urls, js_categories=set())
+    elapsed = time.perf_counter() - start
+    fetch, parse, write = (summary["stages"][name] for name in ("fetch", "parse", "write"))
+    return {
+        "cycle": number,
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_s": round(fetch["items"] / elapsed, 2),
+        "parse_ms_per_page": round(parse["busy_s"] / parse["items"] * 1000, 2) if parse["items"] else None,
+        "upsert_rows_per_s": round(write["rows"] / write["busy_s"], 1) if write["rows"] and write["busy_s"] else None,
+        "peak_rss_mb": round(rss.peak / 2 ** 20, 1),
+        "rows_written": write["rows"],
+        "added": summary["added"], "updated": summary["updated"],
+        "unchanged_pages": summary["unchanged_pages"], "failed_pages": len(summary["failed"]),
+        "served": {status: site.counts[status] - served[status] for status in site.counts},
+        "stages": summary["stages"],
+    }
+
+METRICS = (("pages_per_s", "pages/s", True), ("parse_ms_per_page", "parse ms", False),
+           ("upsert_rows_per_s", "rows/s", True), ("peak_rss_mb", "RSS MB", False))
+
+def print_cycles(cycles):
+    print(f"{'cycle':>5}{'time s':>9}{'pages/s':>9}{'parse ms':>10}{'rows':>7}{'rows/s':>10}"
+          f"{'RSS MB':>8}{'200':>6}{'304':>6}{'500':>6}")
+    for c in cycles:
+        print(f"{c['cycle']:>5}{c['elapsed_s']:>9.2f}{c['pages_per_s']:>9.1f}"
+              f"{c['parse_ms_per_page'] if c['parse_ms_per_page'] is not None else '-':>10}{c['rows_written']:>7}"
+              f"{c['upsert_rows_per_s'] if c['upsert_rows_per_s'] is not None else '-':>10}{c['peak_rss_mb']:>8.1f}"
+              f"{c['served']['200']:>6}{c['served']['304']:>6}{c['served']['500']:>6}")
+
+def print_comparison(previous, result):
+    print(f"\nvs {previous.get('commit') or 'previous run'}:")
+    if previous.get("params") != result["params"]:
+        print("  (warning: parameters differ)")
+    for old, new in zip(previous["cycles"], result["cycles"]):
+        parts = []
+        for key, label, higher_is_better in METRICS:
+            if old.get(key) and new.get(key):
+                change = (new[key] - old[key]) / old[key] * 100
+                better = change >= 0 if higher_is_better else change <= 0
+                parts.append(f"{label} {change:+.1f}%{'' if better or abs(change) < 5 else ' !'}")
+        print(f"  cycle {new['cycle']}: " + ", ".join(parts))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sources", type=int, default=60)
+    parser.add_argument("--rows", type=int, default=40, help="IPO rows per generated page")
+    parser.add_argument("--page-kb", type=int, default=150, help="generated page size")
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--change", type=float, default=0.3, help="share of sources that change between cycles")
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--parse-workers", type=int, default=None, help="default: one per spare core")
+    parser.add_argument("--no-archive", action="store_true", help="don't write the raw page archive")
+    parser.add_argument("--pages", help="directory of recorded .html pages to serve instead of generated ones")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)  # expected 500s are counted in the table instead
+    # Paths are resolved before moving into the scratch directory
+    args.json, args.compare, args.pages = (os.path.abspath(p) if p else p for p in (args.json, args.compare, args.pages))
+
+    recorded = []
+    if args.pages:
+        for path in sorted(glob.glob(os.path.join(args.pages, "*.html"))):
+            with open(path, encoding="utf-8") as f:
+                recorded.append(f.read())
+        if not recorded:
+            parser.error(f"no .html files in {args.pages}")
+    parse_workers = default_parse_workers() if args.parse_workers is None else args.parse_workers
+
+    os.chdir(BENCH_DIR)
+    ipo_scraper.CONFIG_PATH = bench_config(args, parse_workers)
+    ipo_scraper.TEXT_EXPORT_PATH = os.path.join(BENCH_DIR, "ipo_data.txt")
+    site = StandInSite(args.sources, args.rows, args.page_kb, args.latency_ms, args.jitter_ms,
+                       args.error_rate, recorded)
+    base = site.start()
+    urls = {f"Bench {i}": f"{base}/page/{i}" for i in range(args.sources)}
+
+    rss = PeakRSS().start()
+    cycles = []
+    for number in range(1, args.cycles + 1):
+        if number > 1:
+            site.change(args.change)
+        cycles.append(run_cycle(number, urls, site, rss))
+    rss.stop()
+
+    params = {key: value for key, value in vars(args).items() if key not in ("json", "compare")}
+    params["parse_workers"] = parse_workers
+    result = {"commit": git_commit(), "python": sys.version.split()[0], "cpus": os.cpu_count(),
+              "params": params, "cycles": cycles}
+    page_kb = f"recorded pages from {args.pages}" if recorded else f"{args.page_kb} KB pages, {args.rows} rows each"
+    print(f"{args.sources} sources, {page_kb}, latency {args.latency_ms:.0f}+/-{args.jitter_ms:.0f} ms, "
+          f"{args.error_rate:.0%} errors, {parse_workers} parser processes")
+    print_cycles(cycles)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(json.load(f), result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
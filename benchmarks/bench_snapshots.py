@@ -0,0 +1,99 @@
+"""
+Benchmark the ipo_snapshot history table.
+
+    python benchmarks/bench_snapshots.py [--ipos 5000] [--snapshots-per-ipo 2000]
+
+Bulk-loads a synthetic history (defaults to 10M rows), then reports on-disk
+bytes per row, latency of per-IPO range queries, and the extra cost that
+snapshot appends add to a save_to_db cycle.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = tempfile.mkdtemp(prefix="ipo_bench_")
+DB_PATH = os.path.join(BENCH_DIR, "bench.db")
+os.environ["IPO_DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from ipo_ai.db.database import SessionLocal, engine
+from ipo_ai.db.snapshots import snapshot_history
+from ipo_ai.scraper.ipo_scraper import save_to_db
+
+def load_history(ipos, per_ipo, start_ts):
+    """Raw executemany load; this is setup, not what we measure."""
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        for ipo_id in range(1, ipos + 1):
+            gmp = random.randint(0, 20000)
+            rows = []
+            for j in range(per_ipo):
+                gmp += random.randint(-200, 200)
+                rows.append((ipo_id, start_ts + j * 60, gmp, j * 7, j * 11, j * 13, 1))
+            cur.executemany("INSERT INTO ipo_snapshot VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        raw.commit()
+    finally:
+        raw.close()
+
+def make_rows(n, gmp_shift=0.0):
+    return [{
+        "ipo_name": f"Bench Company {i} Ltd", "issue_size": 100.0, "price_high": 95.0,
+        "gmp": float(i % 50) + (gmp_shift if i % 10 == 0 else 0.0), "listing_gain": 0.0,
+        "retail_sub": 1.5, "hni_sub": 2.5, "qib_sub": 3.5, "best_category": "Retail",
+        "listing_date": None, "status": "open", "scraped_at": datetime.utcnow(),
+    } for i in range(n)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ipos", type=int, default=5000)
+    parser.add_argument("--snapshots-per-ipo", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    logging.getLogger("scraper").setLevel(logging.WARNING)
+
+    total = args.ipos * args.snapshots_per_ipo
+    start_ts = int(time.time()) - args.snapshots_per_ipo * 60
+    t0 = time.perf_counter()
+    load_history(args.ipos, args.snapshots_per_ipo, start_ts)
+    load_s = time.perf_counter() - t0
+    with engine.connect() as conn:
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    size = os.path.getsize(DB_PATH)
+    print(f"Loaded {total:,} snapshots in {load_s:.1f}s; {size / total:.1f} bytes/row on disk")
+
+    db = SessionLocal()
+    window = 24 * 60  # one day of minute-level snapshots
+    latencies = []
+    for _ in range(args.queries):
+        ipo_id = random.randint(1, args.ipos)
+        since = start_ts + random.randint(0, max(0, args.snapshots_per_ipo - window)) * 60
+        t0 = time.perf_counter()
+        rows = snapshot_history(db, ipo_id, since, since + window * 60)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+    print(f"1-day range query ({len(rows)} rows): p50 {latencies[len(latencies) // 2]:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms")
+    plan = db.execute(text("EXPLAIN QUERY PLAN SELECT * FROM ipo_snapshot WHERE ipo_id = 1 AND ts BETWEEN 0 AND 1")).fetchall()
+    print(f"Query plan: {plan[0][-1]}")
+    db.close()
+
+    # Ingest overhead: a 500-row page where 10% of rows moved
+    page = 500
+    save_to_db(make_rows(page))
+    t0 = time.perf_counter()
+    save_to_db(make_rows(page))
+    unchanged_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    save_to_db(make_rows(page, gmp_shift=1.0))
+    changed_ms = (time.perf_counter() - t0) * 1000
+    print(f"save_to_db {page}-row page: unchanged {unchanged_ms:.1f} ms, 10% changed (+{page // 10} snapshots) {changed_ms:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark training inside the API process against the out-of-process training job.
+
+    python benchmarks/bench_training.py [--rows 20000] [--idle-seconds 5]
+
+Uses a throwaway SQLite file and models directory. Reports the training wall-clock
+and the latency (p50 / p99) of /api/predict requests served while training runs:
+  idle        - no training
+  in-process  - preprocess_and_train(n_jobs=1) on a thread of the API process (old setup)
+  subprocess  - training.job in a worker process with n_jobs=-1 (current setup)
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta
+
+BENCH_DIR = tempfile.mkdtemp(prefix="ipo_bench_")
+os.environ["IPO_DATABASE_URL"] = f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(BENCH_DIR)  # models/ is relative to the working directory
+
+from fastapi.testclient import TestClient
+from ipo_ai.db.migrations import init_db
+from ipo_ai.scraper.ipo_scraper import save_to_db
+from ipo_ai.training.auto_train import preprocess_and_train
+from ipo_ai.training.job import run_training_job
+from ipo_ai.training.serving import load_components
+from ipo_ai.api.main import app
+
+def make_rows(n):
+    rng = random.Random(7)
+    base = datetime(2015, 1, 1)
+    rows = []
+    for i in range(n):
+        gmp = rng.uniform(-10, 80)
+        rows.append({
+            "ipo_name": f"Bench Company {i} Ltd",
+            "issue_size": rng.uniform(20, 5000), "price_high": rng.uniform(10, 1500), "gmp": gmp,
+            "listing_gain": gmp * 0.6 + rng.gauss(0, 8),
+            "retail_sub": rng.uniform(0, 100), "hni_sub": rng.uniform(0, 300), "qib_sub": rng.uniform(0, 200),
+            "best_category": rng.choice(["Retail", "HNI", "QIB"]),
+            "listing_date": base + timedelta(days=i % 3650), "status": "listed", "scraped_at": datetime.utcnow(),
+        })
+    return rows
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+def measure(client, names, until):
+    """Send requests back to back until until() is true; return latencies in ms."""
+    latencies = []
+    while not until():
+        name = random.choice(names)
+        start = time.perf_counter()
+        client.get("/api/predict", params={"name": name})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def run_scenario(client, names, train):
+    done = threading.Event()
+    elapsed = {}
+
+    def target():
+        start = time.perf_counter()
+        train()
+        elapsed["train"] = time.perf_counter() - start
+        done.set()
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    latencies = measure(client, names, done.is_set)
+    thread.join()
+    return elapsed["train"], latencies
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--idle-seconds", type=float, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    warnings.simplefilter("ignore")
+
+    init_db()
+    save_to_db(make_rows(args.rows))
+    preprocess_and_train()  # a first bundle so /api/predict has something to serve
+    load_components()
+    client = TestClient(app)
+    names = [f"Bench Company {i} Ltd" for i in range(0, args.rows, max(1, args.rows // 200))]
+
+    idle_end = time.perf_counter() + args.idle_seconds
+    results = [("idle", None, measure(client, names, lambda: time.perf_counter() > idle_end))]
+    results.append(("in-process n_jobs=1", *run_scenario(client, names, lambda: preprocess_and_train(n_jobs=1))))
+    results.append(("subprocess n_jobs=-1", *run_scenario(client, names, lambda: run_training_job(n_jobs=-1))))
+
+    print(f"{args.rows} rows, {os.cpu_count()} CPUs")
+    print(f"{'scenario':<22}{'train s':>9}{'requests':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for label, train_s, latencies in results:
+        train_col = f"{train_s:.1f}" if train_s is not None else "-"
+        print(f"{label:<22}{train_col:>9}{len(latencies):>10}"
+              f"{percentile(latencies, 0.5):>9.1f}{percentile(latencies, 0.99):>9.1f}")
+
+if __name__ == "__main__":
+    main()
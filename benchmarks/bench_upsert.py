@@ -0,0 +1,97 @@
+"""
+Benchmark save_to_db (bulk upsert) against the previous per-row ORM loop.
+
+    python benchmarks/bench_upsert.py [--rows 10000]
+
+Runs against a throwaway SQLite file and reports rows/sec for an initial
+insert, an unchanged re-scrape, and a re-scrape where 10% of rows changed.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = tempfile.mkdtemp(prefix="ipo_bench_")
+os.environ["IPO_DATABASE_URL"] = f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete
+from ipo_ai.db.database import SessionLocal
+from ipo_ai.db.models import IPOMaster
+from ipo_ai.scraper.ipo_scraper import save_to_db, MONITORED_FIELDS
+
+def make_rows(n, changed_every=0):
+    rows = []
+    for i in range(n):
+        gmp = float(i % 50)
+        if changed_every and i % changed_every == 0:
+            gmp += 1.0
+        rows.append({
+            "ipo_name": f"Bench Company {i} Ltd",
+            "issue_size": 100.0 + i, "price_high": 95.0, "gmp": gmp, "listing_gain": 0.0,
+            "retail_sub": 1.5, "hni_sub": 2.5, "qib_sub": 3.5, "best_category": "Retail",
+            "listing_date": datetime(2024, 1, 1), "status": "listed", "scraped_at": datetime.utcnow(),
+        })
+    return rows
+
+def legacy_save_to_db(data):
+    """The pre-bulk implementation: one SELECT per row and ORM attribute compares."""
+    db = SessionLocal()
+    new_count = update_count = 0
+    try:
+        for item in data:
+            existing = db.query(IPOMaster).filter(IPOMaster.ipo_name == item['ipo_name']).first()
+            if existing:
+                changed = False
+                for field in MONITORED_FIELDS:
+                    if getattr(existing, field) != item.get(field):
+                        setattr(existing, field, item.get(field))
+                        changed = True
+                if changed:
+                    existing.scraped_at = datetime.utcnow()
+                    update_count += 1
+            else:
+                db.add(IPOMaster(**item))
+                new_count += 1
+        db.commit()
+    finally:
+        db.close()
+    return new_count, update_count
+
+def reset():
+    db = SessionLocal()
+    db.execute(delete(IPOMaster))
+    db.commit()
+    db.close()
+
+def timed(fn, rows):
+    start = time.perf_counter()
+    result = fn(rows)
+    elapsed = time.perf_counter() - start
+    return len(rows) / elapsed, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+    logging.getLogger("scraper").setLevel(logging.WARNING)
+
+    fresh = make_rows(args.rows)
+    changed = make_rows(args.rows, changed_every=10)
+    print(f"{'scenario':<26}{'legacy rows/s':>15}{'bulk rows/s':>15}{'speedup':>9}")
+    results = {}
+    for label, fn in (("legacy", legacy_save_to_db), ("bulk", save_to_db)):
+        reset()
+        results[(label, "insert")] = timed(fn, fresh)
+        results[(label, "unchanged")] = timed(fn, fresh)
+        results[(label, "10% changed")] = timed(fn, changed)
+    for scenario in ("insert", "unchanged", "10% changed"):
+        legacy, _ = results[("legacy", scenario)]
+        bulk, counts = results[("bulk", scenario)]
+        print(f"{scenario + ' ' + str(counts):<26}{legacy:>15,.0f}{bulk:>15,.0f}{bulk / legacy:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
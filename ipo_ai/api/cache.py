@@ -0,0 +1,122 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # stdlib json is slower but produces the same document
+    orjson = None
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def dumps(obj):
+    """Serialize to compact JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+class PreparedJSON:
+    """
+    A response body serialized once when it is cached, with a strong ETag over the
+    data version and the bytes. Every later request either gets these bytes as-is
+    or, if its If-None-Match already carries the tag, an empty 304.
+    """
+    __slots__ = ("body", "etag", "headers")
+
+    def __init__(self, payload, version, headers=None):
+        self.body = dumps(payload)
+        self.headers = headers or {}
+        digest = hashlib.blake2b(self.body, digest_size=8).hexdigest()
+        self.etag = f'"v{version}-{digest}"'
+
+    def matches(self, if_none_match):
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses weak comparison, so a W/ prefix added by a proxy still matches
+        tags = (tag.strip() for tag in if_none_match.split(","))
+        return self.etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+    def response(self, request):
+        headers = dict(self.headers, ETag=self.etag)
+        headers["Cache-Control"] = "no-cache"  # clients may store it but must revalidate
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+class ResponseCache:
+    """
+    LRU cache of computed responses keyed by (endpoint, query params) and tagged
+    with the data version they were built from. A different version or an entry
+    older than ttl seconds is a miss. Concurrent misses on the same key are
+    coalesced: one caller recomputes, the rest wait for its result (single-flight).
+    """
+
+    def __init__(self, maxsize=256, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (version, created, value)
+        self._inflight = {}            # (key, version) -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_compute(self, key, version, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            flight_key = (key, version)
+            future = self._inflight.get(flight_key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = self._inflight[flight_key] = Future()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(flight_key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(flight_key, None)
+            self._entries[key] = (version, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
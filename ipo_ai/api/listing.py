@@ -0,0 +1,149 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+from ..db.models import IPOMaster, IPOPrediction
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+# Sortable columns. Each has its own index on ipo_master; SQLite secondary indexes
+# carry the rowid (= id), so (column, id) keyset scans walk the index directly.
+SORT_COLUMNS = {
+    "id": IPOMaster.id,
+    "scraped_at": IPOMaster.scraped_at,
+    "listing_date": IPOMaster.listing_date,
+    "gmp": IPOMaster.gmp,
+    "issue_size": IPOMaster.issue_size,
+    "ipo_name": IPOMaster.ipo_name,
+}
+
+def _gmp_or_zero(value):
+    return value if value is not None else 0
+
+def _blank_to_none(value):
+    return value if value else None
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+# Response field -> (column, output transform) for /api/ipos and /ipos
+API_FIELDS = {
+    "ipo_name": (IPOMaster.ipo_name, None),
+    "status": (IPOMaster.status, None),
+    "gmp": (IPOMaster.gmp, _gmp_or_zero),
+    "price_high": (IPOMaster.price_high, None),
+    "issue_size": (IPOMaster.issue_size, None),
+    "retail_subscription": (IPOMaster.retail_sub, None),
+    "hni_subscription": (IPOMaster.hni_sub, None),
+    "qib_subscription": (IPOMaster.qib_sub, None),
+    "listing_gain": (IPOMaster.listing_gain, None),
+    "best_category": (IPOMaster.best_category, _blank_to_none),
+    # Stored by training.scoring after each scrape / retrain
+    "predicted_listing_gain": (IPOPrediction.predicted_gain, None),
+    "predicted_category": (IPOPrediction.predicted_category, None),
+}
+
+EXPORT_FIELDS = {
+    "id": (IPOMaster.id, None),
+    "name": (IPOMaster.ipo_name, None),
+    "status": (IPOMaster.status, None),
+    "issue_size": (IPOMaster.issue_size, None),
+    "price_high": (IPOMaster.price_high, None),
+    "gmp": (IPOMaster.gmp, None),
+    "listing_gain": (IPOMaster.listing_gain, None),
+    "retail_sub": (IPOMaster.retail_sub, None),
+    "hni_sub": (IPOMaster.hni_sub, None),
+    "qib_sub": (IPOMaster.qib_sub, None),
+    "listing_date": (IPOMaster.listing_date, _isoformat),
+    "best_category": (IPOMaster.best_category, None),
+}
+
+def parse_fields(fields, available):
+    """Comma-separated field list -> ordered names, all of them when fields is empty."""
+    if not fields:
+        return list(available)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}; choose from {list(available)}")
+    return names
+
+def parse_sort(sort):
+    """'-gmp' -> (gmp column, descending)."""
+    descending = sort.startswith("-")
+    key = sort.lstrip("-+")
+    if key not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by {key!r}; choose from {list(SORT_COLUMNS)}")
+    return key, descending
+
+def encode_cursor(value, row_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor, sort_key):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        if value is not None and SORT_COLUMNS[sort_key].type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _after(column, descending, value, row_id):
+    """
+    Rows strictly after (value, row_id) in (column, id) order. SQLite sorts NULLs
+    first ascending and last descending, so the NULL block is handled explicitly.
+    """
+    if descending:
+        if value is None:
+            return and_(column.is_(None), IPOMaster.id < row_id)
+        return or_(column < value, and_(column == value, IPOMaster.id < row_id), column.is_(None))
+    if value is None:
+        return or_(and_(column.is_(None), IPOMaster.id > row_id), column.isnot(None))
+    return or_(column > value, and_(column == value, IPOMaster.id > row_id))
+
+def fetch_page(db, available, fields, sort, cursor=None, limit=DEFAULT_LIMIT, filters=()):
+    """
+    One keyset page of IPOs: only the requested columns are selected, ordered by
+    (sort column, id). Returns (rows as dicts, cursor for the next page or None).
+    limit=None returns every remaining row and no cursor.
+    """
+    names = parse_fields(fields, available)
+    sort_key, descending = parse_sort(sort)
+    column = SORT_COLUMNS[sort_key]
+    if limit is not None:
+        limit = max(1, min(limit, MAX_LIMIT))
+
+    columns = [available[n][0] for n in names]
+    query = db.query(*columns, column.label("_sort"), IPOMaster.id.label("_id")).select_from(IPOMaster)
+    if any(c.class_ is IPOPrediction for c in columns):
+        query = query.outerjoin(IPOPrediction, IPOPrediction.ipo_id == IPOMaster.id)
+    for condition in filters:
+        query = query.filter(condition)
+    if cursor:
+        query = query.filter(_after(column, descending, *decode_cursor(cursor, sort_key)))
+    if descending:
+        query = query.order_by(column.desc(), IPOMaster.id.desc())
+    else:
+        query = query.order_by(column.asc(), IPOMaster.id.asc())
+    rows = query.limit(limit + 1).all() if limit is not None else query.all()
+
+    transforms = [available[n][1] for n in names]
+    items = []
+    for row in rows[:limit]:
+        item = {}
+        for name, transform, value in zip(names, transforms, row):
+            item[name] = transform(value) if transform else value
+        items.append(item)
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last._sort, last._id)
+    return items, next_cursor
@@ -1,43 +1,40 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from apscheduler.schedulers.background import BackgroundScheduler
 import os
-import glob
-import joblib
+import json
+import asyncio
 import pandas as pd
 import numpy as np
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import datetime
 
 from ..db.database import get_db, Base, engine
-from ..db.models import IPOMaster
+from ..db.migrations import init_db
+from ..db.models import IPOMaster, IPOPrediction
+from ..db.snapshots import snapshot_history
+from ..db.events import change_bus, data_version
+from .cache import ResponseCache, PreparedJSON
+from .listing import API_FIELDS, EXPORT_FIELDS, DEFAULT_LIMIT, fetch_page
 from ..db.sync import sync_all_sources
 from ..scraper.ipo_scraper import scrape_ipos
-from ..training.auto_train import preprocess_and_train
+from ..scraper.background_worker import get_scheduler_stats
+from ..training.auto_train import FEATURE_COLS
+from ..training.predict import feature_matrix, predict_matrix
+from ..training.serving import get_components, start_watcher
+from ..training.scoring import retrain_and_rescore, start_retrain_trigger
 from ..utils.logger import setup_logger
 
 logger = setup_logger("api")
 
-MODELS_DIR = "models"
-
-# Helper to find latest model
-def load_latest_model(prefix):
-    files = glob.glob(f"{MODELS_DIR}/{prefix}_*.pkl")
-    if not files:
-        return None
-    latest_file = max(files, key=os.path.getctime)
-    logger.info(f"Loading model: {latest_file}")
-    return joblib.load(latest_file)
-
-def load_static_model(filename):
-    path = f"{MODELS_DIR}/{filename}"
-    if os.path.exists(path):
-        return joblib.load(path)
-    return None
-
-ml_components = {}
+# Listing/stats responses, valid until the next save_to_db commit bumps data_version
+response_cache = ResponseCache(maxsize=256, ttl=60)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -45,23 +42,20 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up API...")
     
     # Initialize DB tables and Sync Data
-    Base.metadata.create_all(bind=engine)
+    init_db()
     sync_all_sources()
     
     # Scheduler (only for training, scraping is now continuous via background worker)
     scheduler = BackgroundScheduler()
-    scheduler.add_job(preprocess_and_train, 'interval', hours=24)
+    scheduler.add_job(retrain_and_rescore, 'interval', hours=24)
     scheduler.start()
     logger.info("Scheduler started (training only - scraping is continuous).")
 
-    # Load initial models (if any)
-    try:
-        ml_components['gain_model'] = load_latest_model("ipo_gain")
-        ml_components['category_model'] = load_latest_model("ipo_category")
-        ml_components['imputer'] = load_static_model("imputer.pkl")
-        ml_components['encoder'] = load_static_model("category_encoder.pkl")
-    except Exception as e:
-        logger.error(f"Error loading models on startup: {e}")
+    # Load models (if any) off the request path; new versions are hot-swapped as they
+    # are published, and each swap re-scores stale IPOs in the loader thread
+    start_watcher()
+    # Retrain ahead of schedule once enough IPOs have gained listing gains / categories
+    start_retrain_trigger()
 
     yield
     
@@ -80,82 +74,113 @@ if not os.path.exists(static_dir):
     os.makedirs(static_dir)
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
+def cached_json(request, key, build):
+    """
+    Serve a cached, pre-serialized body for key, or a 304 if the client's ETag is current.
+    build() returns (payload, extra response headers or None).
+    """
+    version = data_version.value
+
+    def prepare():
+        payload, headers = build()
+        return PreparedJSON(payload, version, headers)
+
+    prepared = response_cache.get_or_compute(key, version, prepare)
+    return prepared.response(request)
+
 @app.get("/api/ipos")
-def get_ipos(status: Optional[str] = None, name: Optional[str] = None, db: Session = Depends(get_db)):
-    """Fetch IPO records from the database, optionally filtered by status or name, sorted by date."""
-    query = db.query(IPOMaster)
+def get_ipos(request: Request, status: Optional[str] = None, name: Optional[str] = None,
+             fields: Optional[str] = None, sort: str = "-scraped_at", cursor: Optional[str] = None,
+             limit: Optional[int] = None, db: Session = Depends(get_db)):
+    """
+    Fetch IPO records from the database, optionally filtered by status or name, newest first.
+    Without limit= or cursor= every matching row is returned, as the dashboard expects.
+    Otherwise pages are keyset-based (limit defaults to listing.DEFAULT_LIMIT): pass
+    the X-Next-Cursor response header back as cursor=.
+    fields= selects a subset of columns, sort= any of listing.SORT_COLUMNS (prefix - for descending).
+    """
+    key = ("ipos", status, name, fields, sort, cursor, limit)
+    return cached_json(request, key, lambda: _build_ipo_list(db, status, name, fields, sort, cursor, limit))
 
-    # Filter by status if provided
+def _build_ipo_list(db, status, name, fields, sort, cursor, limit):
+    filters = []
     if status:
-        query = query.filter(IPOMaster.status == status)
-
-    # Filter by name if provided (case-insensitive partial match)
+        filters.append(IPOMaster.status == status)
+    # Case-insensitive partial match
     if name:
-        query = query.filter(IPOMaster.ipo_name.ilike(f"%{name}%"))
-
-    ipos = query.order_by(IPOMaster.scraped_at.desc()).all()
-
-    # Return IPO details with only allowed fields
-    result = []
-    for ipo in ipos:
-        result.append({
-            "ipo_name": ipo.ipo_name,
-            "status": ipo.status,
-            "gmp": ipo.gmp if ipo.gmp is not None else 0,
-            "price_high": ipo.price_high if ipo.price_high is not None else None,
-            "issue_size": ipo.issue_size if ipo.issue_size is not None else None,
-            "retail_subscription": ipo.retail_sub if ipo.retail_sub is not None else None,
-            "hni_subscription": ipo.hni_sub if ipo.hni_sub is not None else None,
-            "qib_subscription": ipo.qib_sub if ipo.qib_sub is not None else None,
-            "listing_gain": ipo.listing_gain if ipo.listing_gain is not None else None,
-            "best_category": ipo.best_category if ipo.best_category else None
-        })
-
-    return result
+        filters.append(IPOMaster.ipo_name.ilike(f"%{name}%"))
+
+    if limit is None and cursor is not None:
+        limit = DEFAULT_LIMIT
+    items, next_cursor = fetch_page(db, API_FIELDS, fields, sort, cursor, limit, filters)
+    # The dashboard expects a bare list, so the cursor travels in a header
+    return items, ({"X-Next-Cursor": next_cursor} if next_cursor else None)
 
 @app.get("/api/stats")
-def get_stats(db: Session = Depends(get_db)):
+def get_stats(request: Request, db: Session = Depends(get_db)):
     """Get quick stats about the database."""
-    total = db.query(IPOMaster).count()
-    upcoming = db.query(IPOMaster).filter(IPOMaster.status == "upcoming").count()
-    open_ipos = db.query(IPOMaster).filter(IPOMaster.status == "open").count()
-    listed = db.query(IPOMaster).filter(IPOMaster.status == "listed").count()
+    return cached_json(request, ("stats",), lambda: (_build_stats(db), None))
+
+def _build_stats(db):
+    # One GROUP BY instead of four counts plus a latest-row lookup
+    counts = dict(db.query(IPOMaster.status, func.count(IPOMaster.id)).group_by(IPOMaster.status).all())
+    total = sum(counts.values())
     return {
         "total_ipos": total,
-        "upcoming": upcoming,
-        "open": open_ipos,
-        "listed": listed,
-        "last_sync": db.query(IPOMaster).order_by(IPOMaster.scraped_at.desc()).first().scraped_at if total > 0 else None
+        "upcoming": counts.get("upcoming", 0),
+        "open": counts.get("open", 0),
+        "listed": counts.get("listed", 0),
+        "last_sync": db.query(func.max(IPOMaster.scraped_at)).scalar() if total > 0 else None
     }
 
+@app.get("/api/cache")
+def get_cache_stats():
+    """Response cache hit/miss counters and the current data version."""
+    return dict(response_cache.stats(), data_version=data_version.value)
+
+@app.get("/api/scraper/schedule")
+def get_scraper_schedule():
+    """Queue depth and next-due time per source from the running background scraper."""
+    stats = get_scheduler_stats()
+    if stats is None:
+        raise HTTPException(status_code=503, detail="Background scraper is not running in this process.")
+    return stats
+
+@app.get("/api/events")
+async def stream_events(request: Request, kinds: Optional[str] = None):
+    """Server-sent events push channel for IPO changes (kinds=insert,update,status to filter)."""
+    wanted = set(kinds.split(",")) if kinds else None
+    subscription = change_bus.subscribe("sse", maxsize=500)
+
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                event = await asyncio.to_thread(subscription.get, 15)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                if wanted and event.kind not in wanted:
+                    continue
+                yield f"event: {event.kind}\ndata: {json.dumps(event.to_dict(), default=str)}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/")
 def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.get("/ipos")
-def get_all_ipos(db: Session = Depends(get_db)):
-    # Fetch all IPOs from DB
-    ipos = db.query(IPOMaster).all()
-
-    # Convert to list of dicts
-    ipo_list = []
-    for ipo in ipos:
-        ipo_list.append({
-            "id": ipo.id,
-            "name": ipo.ipo_name,
-            "status": ipo.status,
-            "issue_size": ipo.issue_size,
-            "price_high": ipo.price_high,
-            "gmp": ipo.gmp,
-            "listing_gain": ipo.listing_gain,
-            "retail_sub": ipo.retail_sub,
-            "hni_sub": ipo.hni_sub,
-            "qib_sub": ipo.qib_sub,
-            "listing_date": ipo.listing_date.isoformat() if ipo.listing_date else None,
-            "best_category": ipo.best_category
-        })
-
-    return {"ipos": ipo_list}
+def get_all_ipos(request: Request, fields: Optional[str] = None, sort: str = "id", cursor: Optional[str] = None,
+                 limit: int = DEFAULT_LIMIT, db: Session = Depends(get_db)):
+    key = ("all_ipos", fields, sort, cursor, limit)
+    return cached_json(request, key, lambda: _build_all_ipos(db, fields, sort, cursor, limit))
+
+def _build_all_ipos(db, fields, sort, cursor, limit):
+    ipo_list, next_cursor = fetch_page(db, EXPORT_FIELDS, fields, sort, cursor, limit)
+    return {"ipos": ipo_list, "next_cursor": next_cursor}, None
 
 @app.get("/ipo")
 def get_ipo_info(name: str, db: Session = Depends(get_db)):
@@ -178,3 +203,96 @@ def get_ipo_info(name: str, db: Session = Depends(get_db)):
         "listing_gain": ipo_record.listing_gain if ipo_record.listing_gain is not None else "N/A",
         "best_category": ipo_record.best_category or "N/A"
     }
+
+class BatchPredictRequest(BaseModel):
+    names: Optional[List[str]] = None    # exact IPO names from the database
+    status: Optional[List[str]] = None   # every IPO with one of these statuses, e.g. ["open", "upcoming"]
+    rows: Optional[List[dict]] = None    # raw feature rows keyed by FEATURE_COLS
+
+def _require_models():
+    """The bundle to use for the whole request, or 503 before any model has loaded."""
+    components = get_components()
+    if components.get('gain_model') is None and components.get('category_model') is None:
+        raise HTTPException(status_code=503, detail="No trained models loaded yet.")
+    return components
+
+def _feature_query(db):
+    # Stored prediction columns come along so fresh rows need no inference at all
+    return (
+        db.query(IPOMaster.ipo_name, IPOMaster.status, IPOMaster.fingerprint,
+                 IPOPrediction.model_version, IPOPrediction.source_fingerprint,
+                 IPOPrediction.predicted_gain, IPOPrediction.predicted_category,
+                 IPOPrediction.category_probabilities,
+                 *[getattr(IPOMaster, col) for col in FEATURE_COLS])
+        .outerjoin(IPOPrediction, IPOPrediction.ipo_id == IPOMaster.id)
+    )
+
+def _score_records(components, records):
+    """Use stored predictions where current; score the rest with one model call."""
+    version = components.get('version')
+    results = [None] * len(records)
+    stale = []
+    for i, r in enumerate(records):
+        if r.model_version is not None and r.model_version == version and r.source_fingerprint == r.fingerprint:
+            results[i] = {
+                "predicted_listing_gain": r.predicted_gain,
+                "predicted_category": r.predicted_category,
+                "category_probabilities": json.loads(r.category_probabilities) if r.category_probabilities else None,
+            }
+        else:
+            stale.append(i)
+    if stale:
+        X = feature_matrix(records[i][-len(FEATURE_COLS):] for i in stale)
+        for i, prediction in zip(stale, predict_matrix(components, X)):
+            results[i] = prediction
+    return [
+        {"ipo_name": r.ipo_name, "status": r.status, "features": dict(zip(FEATURE_COLS, r[-len(FEATURE_COLS):])),
+         "model_version": version, **p}
+        for r, p in zip(records, results)
+    ]
+
+@app.get("/api/predict")
+def predict_ipo(name: str, db: Session = Depends(get_db)):
+    """Predicted listing gain and best-category probabilities for one IPO."""
+    components = _require_models()
+    record = _feature_query(db).filter(IPOMaster.ipo_name.ilike(f"%{name}%")).first()
+    if not record:
+        raise HTTPException(status_code=404, detail="IPO not found in database. Please wait for the scraper to pick it up.")
+    return _score_records(components, [record])[0]
+
+@app.post("/api/predict/batch")
+def predict_batch(body: BatchPredictRequest, db: Session = Depends(get_db)):
+    """Score many IPOs (by name or status) or raw feature rows as a single matrix."""
+    components = _require_models()
+    if not (body.names or body.status or body.rows):
+        raise HTTPException(status_code=400, detail="Provide names, status or rows.")
+
+    results = []
+    if body.names or body.status:
+        query = _feature_query(db)
+        if body.names:
+            query = query.filter(IPOMaster.ipo_name.in_(body.names))
+        if body.status:
+            query = query.filter(IPOMaster.status.in_(body.status))
+        results.extend(_score_records(components, query.all()))
+    if body.rows:
+        try:
+            X = feature_matrix(body.rows)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Feature rows must be numeric: {e}")
+        for row, prediction in zip(body.rows, predict_matrix(components, X)):
+            results.append({"features": {col: row.get(col) for col in FEATURE_COLS}, **prediction})
+    return {"count": len(results), "predictions": results}
+
+@app.get("/ipo/history")
+def get_ipo_history(name: str, since: Optional[datetime] = None, until: Optional[datetime] = None, db: Session = Depends(get_db)):
+    """GMP / subscription / status trajectory of one IPO, from the append-only snapshot table."""
+    ipo_record = db.query(IPOMaster.id, IPOMaster.ipo_name).filter(IPOMaster.ipo_name.ilike(f"%{name}%")).first()
+
+    if not ipo_record:
+        raise HTTPException(status_code=404, detail="IPO not found in database. Please wait for the scraper to pick it up.")
+
+    return {
+        "ipo_name": ipo_record.ipo_name,
+        "history": snapshot_history(db, ipo_record.id, since, until)
+    }
@@ -1,2 +1,5 @@
 from .database import engine, SessionLocal, get_db, Base
-from .models import IPOMaster
+from .models import IPOMaster, FetchCache, CrawlState, IPOSnapshot, IPOPrediction
+from .migrations import init_db
+from .writer import db_writer
+from .events import change_bus, data_version
@@ -1,13 +1,33 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-# Use SQLite for local development
-DATABASE_URL = "sqlite:///./ipo_database.db"
+# Use SQLite for local development (IPO_DATABASE_URL overrides, e.g. for benchmarks)
+DATABASE_URL = os.environ.get("IPO_DATABASE_URL", "sqlite:///./ipo_database.db")
+
+# Production profile for SQLite: WAL lets API readers run while the scraper writes,
+# and busy_timeout turns brief lock contention into a wait instead of an error.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",      # durable at checkpoints, safe with WAL
+    "busy_timeout": 10000,        # ms
+    "cache_size": -65536,         # negative = KiB, i.e. 64 MB page cache per connection
+    "mmap_size": 268435456,       # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+}
 
 engine = create_engine(
     DATABASE_URL, connect_args={"check_same_thread": False}
 )
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
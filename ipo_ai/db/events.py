@@ -0,0 +1,152 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger("change_events")
+
+class ChangeEvent:
+    """
+    One change published by save_to_db after commit.
+    kind is "insert", "update" (field-update) or "status" (status transition);
+    changes maps field -> (old, new), with old None for inserts.
+    """
+    __slots__ = ("kind", "ipo_id", "ipo_name", "changes", "ts")
+
+    def __init__(self, kind, ipo_id, ipo_name, changes, ts=None):
+        self.kind = kind
+        self.ipo_id = ipo_id
+        self.ipo_name = ipo_name
+        self.changes = changes
+        self.ts = ts or time.time()
+
+    def to_dict(self):
+        def plain(value):
+            return value.isoformat() if isinstance(value, datetime) else value
+        return {
+            "kind": self.kind,
+            "ipo_id": self.ipo_id,
+            "ipo_name": self.ipo_name,
+            "changes": {f: {"old": plain(old), "new": plain(new)} for f, (old, new) in self.changes.items()},
+            "ts": self.ts,
+        }
+
+    def __repr__(self):
+        return f"<ChangeEvent {self.kind} {self.ipo_name}>"
+
+class Subscription:
+    def __init__(self, bus, name, maxsize):
+        self.bus = bus
+        self.name = name
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def _offer(self, event):
+        # A slow subscriber loses its oldest events rather than stalling the writer
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next event, or None if nothing arrived within timeout."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self, max_items=1000):
+        events = []
+        while len(events) < max_items:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+class ChangeBus:
+    """Bounded in-process fan-out of ChangeEvents to any number of subscribers."""
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, name, maxsize=1000):
+        sub = Subscription(self, name, maxsize)
+        with self._lock:
+            self._subscribers = self._subscribers + [sub]
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not sub]
+
+    def publish(self, events):
+        if not events:
+            return
+        subscribers = self._subscribers
+        for event in events:
+            for sub in subscribers:
+                sub._offer(event)
+        self.published += len(events)
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "subscribers": {s.name: {"pending": s._queue.qsize(), "dropped": s.dropped} for s in self._subscribers},
+        }
+
+change_bus = ChangeBus()
+
+class DataVersion:
+    """
+    Monotonic counter bumped after every save_to_db commit that changed rows.
+    Readers use it to key caches and ETags. It is per-process: main.py runs the
+    scraper and the API together, and other writers are covered by cache TTLs.
+    """
+
+    def __init__(self):
+        self._value = 1
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return self._value
+
+    def bump(self):
+        with self._lock:
+            self._value += 1
+            return self._value
+
+data_version = DataVersion()
+
+def start_log_sink(path="change_events.jsonl"):
+    """Subscriber that appends every change event as one JSON line (structured audit trail)."""
+    sub = change_bus.subscribe("log_sink", maxsize=10000)
+
+    def run():
+        with open(path, "a", encoding="utf-8") as f:
+            while True:
+                event = sub.get()
+                batch = [event] + sub.drain()
+                for e in batch:
+                    f.write(json.dumps(e.to_dict(), default=str) + "\n")
+                f.flush()
+
+    thread = threading.Thread(target=run, name="change-log-sink", daemon=True)
+    thread.start()
+    logger.info(f"Change event log sink writing to {path}")
+    return sub
@@ -0,0 +1,57 @@
+from sqlalchemy import inspect, text
+from .database import engine, Base
+from . import models  # noqa: F401  (registers every table on Base.metadata)
+import logging
+
+logger = logging.getLogger("db_migrations")
+
+def _add_missing_columns(conn):
+    """create_all() never alters existing tables, so add new nullable columns by hand."""
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {col['name'] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            col_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+            logger.info(f"Added column {table.name}.{column.name}")
+
+def _ensure_unique_ipo_name(conn):
+    indexes = {ix['name']: ix for ix in inspect(conn).get_indexes('ipo_master')}
+    if 'ux_ipo_master_ipo_name' in indexes:
+        return
+    duplicates = conn.execute(text(
+        "SELECT ipo_name, COUNT(*) FROM ipo_master GROUP BY ipo_name HAVING COUNT(*) > 1 LIMIT 5"
+    )).fetchall()
+    if duplicates:
+        logger.warning(f"ipo_master has duplicate names {[d[0] for d in duplicates]}; "
+                       "unique index not created (run recreate_db.py or dedupe manually).")
+        return
+    conn.execute(text("CREATE UNIQUE INDEX ux_ipo_master_ipo_name ON ipo_master (ipo_name)"))
+    if 'ix_ipo_master_ipo_name' in indexes:
+        conn.execute(text("DROP INDEX ix_ipo_master_ipo_name"))
+    logger.info("Created unique index on ipo_master.ipo_name")
+
+def _add_missing_indexes(conn):
+    """Same for indexes declared in __table_args__ after the table was first created."""
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing or index.unique:
+                continue  # unique indexes need a duplicate check first, see below
+            index.create(bind=conn)
+            logger.info(f"Created index {index.name}")
+
+def init_db():
+    """Create missing tables, then bring older database files up to the current schema."""
+    with engine.begin() as conn:
+        Base.metadata.create_all(bind=conn)
+        _add_missing_columns(conn)
+        _add_missing_indexes(conn)
+        _ensure_unique_ipo_name(conn)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, SmallInteger, String, Text, Float, DateTime, Enum, Boolean, Index
 from datetime import datetime
 from .database import Base
 import enum
@@ -10,9 +10,19 @@ class IPOStatus(enum.Enum):
 
 class IPOMaster(Base):
     __tablename__ = "ipo_master"
+    __table_args__ = (
+        Index("ux_ipo_master_ipo_name", "ipo_name", unique=True),
+        # Keyset pagination / sort= on the list endpoints. Secondary indexes carry
+        # the rowid (id), so each one already orders by (column, id).
+        Index("ix_ipo_master_scraped_at", "scraped_at"),
+        Index("ix_ipo_master_status_scraped_at", "status", "scraped_at"),
+        Index("ix_ipo_master_listing_date", "listing_date"),
+        Index("ix_ipo_master_gmp", "gmp"),
+        Index("ix_ipo_master_issue_size", "issue_size"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    ipo_name = Column(String, index=True)
+    ipo_name = Column(String)
     gmp = Column(Float, nullable=True)
     retail_sub = Column(Float, nullable=True)
     hni_sub = Column(Float, nullable=True)
@@ -24,6 +34,100 @@ class IPOMaster(Base):
     best_category = Column(String, nullable=True) # Retail, HNI, QIB
     status = Column(String, default="upcoming") # stored as string for simplicity
     scraped_at = Column(DateTime, default=datetime.utcnow)
+    fingerprint = Column(String, nullable=True) # hash of the monitored fields, see save_to_db
 
     def __repr__(self):
         return f"<IPO {self.ipo_name} (Status: {self.status})>"
+
+class FetchCache(Base):
+    """Per-URL validators and content hashes used to skip unchanged pages."""
+    __tablename__ = "fetch_cache"
+
+    url = Column(String, primary_key=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    body_hash = Column(String, nullable=True)     # hash of the raw HTML
+    payload_hash = Column(String, nullable=True)  # hash of the extracted rows
+    row_count = Column(Integer, default=0)
+    checked_at = Column(DateTime, default=datetime.utcnow)
+    parsed_at = Column(DateTime, nullable=True)
+    changed_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<FetchCache {self.url} ({self.row_count} rows)>"
+
+class CrawlState(Base):
+    """Checkpoint for closed historical-year pages that normal cycles no longer fetch."""
+    __tablename__ = "crawl_state"
+
+    url = Column(String, primary_key=True)
+    category = Column(String)
+    year = Column(Integer, index=True, nullable=True)
+    frozen = Column(Boolean, default=False, index=True)
+    row_count = Column(Integer, default=0)
+    payload_hash = Column(String, nullable=True)
+    frozen_at = Column(DateTime, nullable=True)
+    verified_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<CrawlState {self.category} (frozen: {self.frozen})>"
+
+class IPOSnapshot(Base):
+    """
+    Append-only GMP / subscription / status history, one row per observed change.
+    Kept compact: the clustered (ipo_id, ts) primary key is the only index
+    (WITHOUT ROWID), ts is epoch seconds, values are integers in hundredths and
+    status is a small code, so most rows are a few varint bytes per column.
+    """
+    __tablename__ = "ipo_snapshot"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    ipo_id = Column(Integer, primary_key=True)
+    ts = Column(Integer, primary_key=True)
+    gmp_c = Column(Integer, nullable=True)
+    retail_sub_c = Column(Integer, nullable=True)
+    hni_sub_c = Column(Integer, nullable=True)
+    qib_sub_c = Column(Integer, nullable=True)
+    status_code = Column(SmallInteger, nullable=True)
+
+    def __repr__(self):
+        return f"<IPOSnapshot {self.ipo_id} @ {self.ts}>"
+
+class IPOPrediction(Base):
+    """
+    Latest model output per IPO, so reads are column lookups instead of inference.
+    source_fingerprint is IPOMaster.fingerprint at scoring time: a row is re-scored
+    when that changes or when a different model_version is being served.
+    """
+    __tablename__ = "ipo_prediction"
+
+    ipo_id = Column(Integer, primary_key=True)
+    predicted_gain = Column(Float, nullable=True)
+    predicted_category = Column(String, nullable=True)
+    category_probabilities = Column(Text, nullable=True)  # JSON {label: probability}
+    model_version = Column(String, nullable=True)
+    source_fingerprint = Column(String, nullable=True)
+    scored_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<IPOPrediction {self.ipo_id} ({self.model_version})>"
+
+class ArchivedPage(Base):
+    """
+    One row per fetched page. The HTML itself is a compressed blob in the page
+    archive, addressed by content_hash, so identical fetches share one file.
+    """
+    __tablename__ = "page_archive"
+    __table_args__ = (
+        Index("ix_page_archive_fetched_at", "fetched_at"),
+        Index("ix_page_archive_url_fetched_at", "url", "fetched_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    url = Column(String)
+    category = Column(String)
+    content_hash = Column(String)  # sha1 of the HTML, same as FetchCache.body_hash
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ArchivedPage {self.category} @ {self.fetched_at}>"
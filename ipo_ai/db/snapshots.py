@@ -0,0 +1,64 @@
+import time
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .models import IPOSnapshot
+
+# Fields tracked over time; everything else on IPOMaster is effectively static
+SNAPSHOT_FIELDS = ['gmp', 'retail_sub', 'hni_sub', 'qib_sub', 'status']
+
+STATUS_CODES = {"upcoming": 0, "open": 1, "listed": 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+def _to_centi(value):
+    return int(round(value * 100)) if value is not None else None
+
+def _from_centi(value):
+    return value / 100.0 if value is not None else None
+
+def snapshot_row(ipo_id, values, ts=None):
+    """Compact snapshot row for one IPO from a scraped/stored dict of values."""
+    return {
+        "ipo_id": ipo_id,
+        "ts": int(ts if ts is not None else time.time()),
+        "gmp_c": _to_centi(values.get('gmp')),
+        "retail_sub_c": _to_centi(values.get('retail_sub')),
+        "hni_sub_c": _to_centi(values.get('hni_sub')),
+        "qib_sub_c": _to_centi(values.get('qib_sub')),
+        "status_code": STATUS_CODES.get(values.get('status')),
+    }
+
+def append_snapshots(db, rows):
+    """Append rows in one executemany; a second change within the same second replaces the first."""
+    if not rows:
+        return 0
+    stmt = sqlite_insert(IPOSnapshot)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IPOSnapshot.ipo_id, IPOSnapshot.ts],
+        set_={col: stmt.excluded[col] for col in ('gmp_c', 'retail_sub_c', 'hni_sub_c', 'qib_sub_c', 'status_code')},
+    )
+    db.execute(stmt, rows)
+    return len(rows)
+
+def snapshot_history(db, ipo_id, since=None, until=None):
+    """Range scan over the clustered (ipo_id, ts) key; since/until are datetimes or epoch seconds."""
+    # Plain column rows rather than ORM objects: histories can be thousands of rows long
+    query = select(IPOSnapshot.ts, IPOSnapshot.gmp_c, IPOSnapshot.retail_sub_c, IPOSnapshot.hni_sub_c,
+                   IPOSnapshot.qib_sub_c, IPOSnapshot.status_code).where(IPOSnapshot.ipo_id == ipo_id)
+    if since is not None:
+        query = query.where(IPOSnapshot.ts >= _epoch(since))
+    if until is not None:
+        query = query.where(IPOSnapshot.ts <= _epoch(until))
+    return [{
+        "ts": datetime.utcfromtimestamp(ts).isoformat(),
+        "gmp": _from_centi(gmp_c),
+        "retail_sub": _from_centi(retail_c),
+        "hni_sub": _from_centi(hni_c),
+        "qib_sub": _from_centi(qib_c),
+        "status": STATUS_NAMES.get(status_code),
+    } for ts, gmp_c, retail_c, hni_c, qib_c, status_code in db.execute(query.order_by(IPOSnapshot.ts))]
+
+def _epoch(value):
+    if isinstance(value, datetime):
+        return int((value - datetime(1970, 1, 1)).total_seconds())
+    return int(value)
@@ -4,6 +4,8 @@ import logging
 from datetime import datetime
 from .database import SessionLocal, engine, Base
 from .models import IPOMaster
+from .migrations import init_db
+from ..utils.normalize import to_number
 
 logger = logging.getLogger("db_sync")
 
@@ -12,7 +14,7 @@ def sync_all_sources():
     logger.info("Starting database synchronization...")
     
     # Ensure tables exist
-    Base.metadata.create_all(bind=engine)
+    init_db()
     
     db = SessionLocal()
     try:
@@ -55,20 +57,9 @@ def sync_json_file(db, file_path):
             existing = db.query(IPOMaster).filter(IPOMaster.ipo_name == name).first()
             
             # Prepare fields
-            issue_size = 0.0
-            size_str = str(item.get('issue_size', '0'))
-            clean_size = ''.join(c for c in size_str if c.isdigit() or c == '.')
-            if clean_size: issue_size = float(clean_size)
-                
-            price = 0.0
-            price_str = str(item.get('issue_price', item.get('price_high', '0')))
-            clean_price = ''.join(c for c in price_str if c.isdigit() or c == '.')
-            if clean_price: price = float(clean_price)
-                
-            gain = 0.0
-            gain_str = str(item.get('listing_gain', '0'))
-            clean_gain = ''.join(c for c in gain_str if c.isdigit() or c == '.' or c == '-')
-            if clean_gain: gain = float(clean_gain)
+            issue_size = to_number(item.get('issue_size'), 'amount')
+            price = to_number(item.get('issue_price', item.get('price_high')), 'price')
+            gain = to_number(item.get('listing_gain'), 'percent')
 
             # Heuristic for best_category
             best_cat = item.get('best_category')
@@ -0,0 +1,65 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger("db_writer")
+
+class DBWriter:
+    """
+    Serializes every scraper write through one thread, so SQLite only ever sees a
+    single writer. Readers (API requests) never queue behind write transactions,
+    and writers never race each other into "database is locked".
+    """
+
+    def __init__(self, max_pending=1000):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            future, fn, args, kwargs = self._queue.get()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue a write job; blocks when max_pending jobs are already waiting (backpressure)."""
+        future = Future()
+        if threading.current_thread() is self._thread:
+            # Nested write from inside a job: run inline instead of deadlocking on ourselves
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+        self._ensure_started()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """Run a write job on the writer thread and wait for its result."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        self._queue.join()
+
+db_writer = DBWriter()
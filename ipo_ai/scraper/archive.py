@@ -0,0 +1,282 @@
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from ..db.database import SessionLocal
+from ..db.models import ArchivedPage
+from ..db.writer import db_writer
+from ..utils.logger import setup_logger
+from . import fetch_cache
+
+logger = setup_logger("archive")
+
+# Every fetched page is kept as page_archive/objects/<h[:2]>/<h>.html.zst (or .gz
+# without the zstandard package), where h is the sha1 of its HTML - the fetch
+# cache's body_hash. A page that comes back identical is only a new page_archive
+# row pointing at the blob that is already there.
+ARCHIVE_DIR = "page_archive"
+CODECS = {"zstd": ".html.zst", "gzip": ".html.gz"}
+LEVELS = {"zstd": 9, "gzip": 6}
+
+class PageArchive:
+    """Content-addressed, compressed store of raw pages. Picklable, so parser processes can write to it."""
+
+    def __init__(self, root=ARCHIVE_DIR, codec="auto", level=None):
+        if codec == "auto":
+            codec = "zstd" if zstandard is not None else "gzip"
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec!r}, expected one of {list(CODECS)} or 'auto'")
+        if codec == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, archiving with gzip")
+            codec = "gzip"
+        self.root = root
+        self.codec = codec
+        self.level = level or LEVELS[codec]
+
+    @classmethod
+    def from_config(cls, config):
+        """The archive configured under page_archive:, or None when it is disabled."""
+        cfg = config.get('page_archive', {})
+        if not cfg.get('enabled', True):
+            return None
+        return cls(cfg.get('dir', ARCHIVE_DIR), cfg.get('codec', 'auto'), cfg.get('level'))
+
+    def _blob(self, content_hash, codec):
+        return os.path.join(self.root, "objects", content_hash[:2], content_hash + CODECS[codec])
+
+    def path(self, content_hash):
+        """Path of the stored blob (whichever codec wrote it), or None."""
+        for codec in (self.codec,) + tuple(c for c in CODECS if c != self.codec):
+            path = self._blob(content_hash, codec)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def exists(self, content_hash):
+        return content_hash is not None and self.path(content_hash) is not None
+
+    def store(self, html, content_hash=None):
+        """Write the page unless an identical one is stored already; returns its content hash."""
+        content_hash = content_hash or fetch_cache.body_hash(html)
+        if self.exists(content_hash):
+            return content_hash
+        raw = html.encode('utf-8', 'replace')
+        if self.codec == "zstd":
+            data = zstandard.ZstdCompressor(level=self.level).compress(raw)
+        else:
+            data = gzip.compress(raw, compresslevel=self.level, mtime=0)
+        path = self._blob(content_hash, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write aside and rename, so concurrent writers of the same page never leave a torn blob
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return content_hash
+
+    def load(self, content_hash):
+        path = self.path(content_hash)
+        if path is None:
+            raise FileNotFoundError(f"No archived page {content_hash}")
+        with open(path, "rb") as f:
+            data = f.read()
+        if path.endswith(CODECS["zstd"]):
+            if zstandard is None:
+                raise RuntimeError(f"{path} is zstd-compressed; install zstandard to read it")
+            data = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            data = gzip.decompress(data)
+        return data.decode('utf-8')
+
+    def __repr__(self):
+        return f"<PageArchive {self.root} ({self.codec})>"
+
+def record(url, category, content_hash, fetched_at=None):
+    """Add the page_archive row for one fetch (queued on the writer thread)."""
+    return db_writer.submit(_record, url, category, content_hash, fetched_at or datetime.utcnow())
+
+def _record(url, category, content_hash, fetched_at):
+    db = SessionLocal()
+    try:
+        db.add(ArchivedPage(url=url, category=category, content_hash=content_hash, fetched_at=fetched_at))
+        db.commit()
+    finally:
+        db.close()
+
+def archived_fetches(since=None, until=None, category=None):
+    """page_archive rows in [since, until] (UTC), oldest first."""
+    db = SessionLocal()
+    try:
+        query = db.query(ArchivedPage)
+        if since is not None:
+            query = query.filter(ArchivedPage.fetched_at >= since)
+        if until is not None:
+            query = query.filter(ArchivedPage.fetched_at <= until)
+        if category is not None:
+            query = query.filter(ArchivedPage.category == category)
+        entries = query.order_by(ArchivedPage.fetched_at, ArchivedPage.id).all()
+        db.expunge_all()
+        return entries
+    finally:
+        db.close()
+
+def _fetched_after(until, category=None):
+    db = SessionLocal()
+    try:
+        query = db.query(ArchivedPage.id).filter(ArchivedPage.fetched_at > until)
+        if category is not None:
+            query = query.filter(ArchivedPage.category == category)
+        return query.first() is not None
+    finally:
+        db.close()
+
+def parse_archived(job):
+    """Re-parse one archived page (runs in a parser process): (rows, payload hash)."""
+    from .ipo_scraper import parse_page
+
+    archive, category, content_hash, parser = job
+    rows = parse_page(category, archive.load(content_hash), parser)
+    return rows, fetch_cache.payload_hash(rows)
+
+def reparse(since=None, until=None, category=None, workers=None, dry_run=False, archive=None, chunk=64):
+    """
+    Run today's parsers over archived pages fetched in [since, until] and upsert the
+    rows, without touching the network. Only the latest archived version of each URL
+    is replayed: older versions would re-apply stale values and append them to the
+    snapshot history as new changes. Pages are upserted oldest first, so an IPO listed
+    on several sources ends with its most recently fetched values. Parsing is spread
+    over a process pool.
+    """
+    from .ipo_scraper import load_config, parser_for, save_to_db
+    from .pipeline import parse_pool
+
+    start = time.perf_counter()
+    config = load_config()
+    archive = archive or PageArchive.from_config(config) or PageArchive()
+    entries = archived_fetches(since, until, category)
+    latest = {}
+    for entry in entries:
+        latest.pop(entry.url, None)
+        latest[entry.url] = entry
+    pages = [e for e in latest.values() if archive.exists(e.content_hash)]
+    missing = len(latest) - len(pages)
+    if missing:
+        logger.warning(f"{missing} archived pages have no blob under {archive.root} and are skipped")
+    if until is not None and entries and _fetched_after(until, category):
+        logger.warning(f"Pages fetched after {until} are not replayed: IPOs they cover keep the values "
+                       f"of their last page before then")
+    summary = {"fetches": len(entries), "pages": len(pages), "missing": missing,
+               "rows": 0, "added": 0, "updated": 0, "empty": [], "dry_run": dry_run}
+    if not pages:
+        logger.info("No archived pages to re-parse.")
+        return summary
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pages)))
+    logger.info(f"Re-parsing the latest of {len(entries)} archived fetches for {len(pages)} pages on {workers} workers"
+                f"{' (dry run)' if dry_run else ''}...")
+    parsed = {}
+    for i in range(0, len(pages), chunk):
+        batch = pages[i:i + chunk]
+        jobs = [(archive, e.category, e.content_hash, parser_for(e.category, config)) for e in batch]
+        # Bounded chunks keep at most `chunk` pages of rows in memory
+        results = parse_pool(workers).map(parse_archived, jobs) if workers > 1 else map(parse_archived, jobs)
+        rows = []
+        for entry, (page_rows, payload) in zip(batch, results):
+            parsed[entry.url] = (entry.content_hash, len(page_rows), payload)
+            if not page_rows:
+                summary["empty"].append(entry.category)
+            rows.extend(page_rows)
+        summary["rows"] += len(rows)
+        if rows and not dry_run:
+            added, updated = save_to_db(rows, raise_errors=True)
+            summary["added"] += added
+            summary["updated"] += updated
+
+    if not dry_run:
+        # Sources whose live page is the one just re-parsed get the new payload in the
+        # fetch cache, so zero-row reports and change detection see the fixed parser
+        cache = fetch_cache.load_entries(parsed)
+        for url, (content_hash, row_count, payload) in parsed.items():
+            entry = cache.get(url)
+            if entry is not None and entry.body_hash == content_hash:
+                fetch_cache.record(url, payload=payload, row_count=row_count, parsed=True)
+        db_writer.flush()
+    summary["elapsed_s"] = round(time.perf_counter() - start, 2)
+    logger.info(f"Re-parse complete in {summary['elapsed_s']:.2f}s: {summary['rows']} rows, "
+                f"added {summary['added']}, updated {summary['updated']}, zero-row pages {len(summary['empty'])}")
+    return summary
+
+def stats(archive):
+    db = SessionLocal()
+    try:
+        fetches = db.query(ArchivedPage).count()
+        first = db.query(ArchivedPage.fetched_at).order_by(ArchivedPage.fetched_at).first()
+        last = db.query(ArchivedPage.fetched_at).order_by(ArchivedPage.fetched_at.desc()).first()
+    finally:
+        db.close()
+    blobs = stored = 0
+    for folder, _, files in os.walk(os.path.join(archive.root, "objects")):
+        for name in files:
+            if not name.endswith(".tmp"):
+                blobs += 1
+                stored += os.path.getsize(os.path.join(folder, name))
+    return {"fetches": fetches, "blobs": blobs, "stored_mb": round(stored / 1e6, 2),
+            "first": first[0] if first else None, "last": last[0] if last else None}
+
+def _timestamp(value):
+    return datetime.fromisoformat(value)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Raw page archive: re-parse stored pages, inspect the store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmd = sub.add_parser("reparse", help="re-run the current parsers over archived pages (no network)")
+    cmd.add_argument("--since", type=_timestamp, help="UTC, e.g. 2024-06-01 or 2024-06-01T09:15")
+    cmd.add_argument("--until", type=_timestamp, help="UTC, inclusive")
+    cmd.add_argument("--category", help="one source, e.g. 'IPO Watch'")
+    cmd.add_argument("--workers", type=int, default=None, help="parser processes (default: all cores)")
+    cmd.add_argument("--dry-run", action="store_true", help="parse and count rows, write nothing")
+    sub.add_parser("stats", help="fetches, distinct pages and size on disk")
+    cmd = sub.add_parser("show", help="print the latest archived HTML of a URL, or a page by content hash")
+    cmd.add_argument("target")
+    args = parser.parse_args(argv)
+
+    from .ipo_scraper import load_config
+    archive = PageArchive.from_config(load_config()) or PageArchive()
+    if args.command == "reparse":
+        summary = reparse(args.since, args.until, args.category, args.workers, args.dry_run, archive)
+        print(f"{summary['pages']} pages from {summary['fetches']} fetches: {summary['rows']} rows, "
+              f"added {summary['added']}, updated {summary['updated']}"
+              f"{' (dry run, nothing written)' if args.dry_run else ''}")
+        for name in sorted(set(summary["empty"])):
+            print(f"  zero rows: {name}")
+        return 0 if summary["pages"] else 1
+    if args.command == "stats":
+        for key, value in stats(archive).items():
+            print(f"{key:<10} {value}")
+        return 0
+    content_hash = args.target
+    if "://" in args.target:
+        db = SessionLocal()
+        try:
+            entry = (db.query(ArchivedPage).filter(ArchivedPage.url == args.target)
+                     .order_by(ArchivedPage.fetched_at.desc()).first())
+        finally:
+            db.close()
+        if entry is None:
+            print(f"Nothing archived for {args.target}", file=sys.stderr)
+            return 1
+        content_hash = entry.content_hash
+    sys.stdout.write(archive.load(content_hash))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
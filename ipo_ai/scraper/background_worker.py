@@ -2,52 +2,110 @@ import time
 import logging
 import sys
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ipo_ai.scraper.ipo_scraper import scrape_ipos
+from ipo_ai.scraper.ipo_scraper import scrape_ipos, load_config
+from ipo_ai.scraper.driver_pool import DriverPool
+from ipo_ai.scraper.scheduler import SourceScheduler
+from ipo_ai.training.scoring import rescore
+from ipo_ai.training.serving import get_components, load_components
 from ipo_ai.utils.logger import setup_logger
 
 logger = setup_logger("background_worker")
 
-def run_background_scraper():
+# Set while the worker runs so the API can report queue depth and next-due times
+scheduler = None
+
+def get_scheduler_stats():
+    if scheduler is None:
+        return None
+    return scheduler.stats()
+
+def run_background_scraper(max_idle_sleep=30):
     """
-    Runs the scraper with 10 minutes scraping followed by 5 minutes break.
+    Runs the scraper on a per-source schedule: each source is polled at its own
+    interval (open IPOs every minute in market hours, closed years daily, ...)
+    and backed off while it keeps coming back unchanged. The source list is
+    rebuilt on every pass, so year rollovers and unfrozen pages are picked up.
     """
+    global scheduler
     logger.info("Starting Automated IPO Background Scraper Worker")
-    logger.info("Mode: 10 MIN SCRAPING + 5 MIN BREAK")
+
+    config = load_config()
+    scheduler = SourceScheduler.from_config(config)
+    logger.info(f"Mode: ADAPTIVE SCHEDULE over {len(scheduler.sources)} sources")
 
     cycle_count = 0
 
+    # Standalone runs have no API lifespan to load the models used by post-scrape scoring
+    if not get_components():
+        try:
+            load_components()
+        except Exception as e:
+            logger.error(f"Could not load models for scoring: {e}")
+
+    # One warm driver pool for the whole worker, instead of a fresh Chrome per cycle
+    driver_pool = DriverPool.from_config(config)
+    logger.info(f"Driver pool ready (size={driver_pool.size}, recycle after {driver_pool.max_pages} pages / {driver_pool.max_memory_mb} MB)")
+
     while True:
         try:
-            # Scraping phase: 10 minutes
-            scraping_end = datetime.utcnow() + timedelta(minutes=10)
-            logger.info(f"Starting scraping phase until {scraping_end.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+            scheduler.refresh(load_config())
+            due = scheduler.pop_due()
+            if not due:
+                wait = scheduler.seconds_until_next()
+                time.sleep(min(wait if wait is not None else max_idle_sleep, max_idle_sleep))
+                continue
 
-            while datetime.utcnow() < scraping_end:
-                cycle_count += 1
-                cycle_start = datetime.utcnow()
-                logger.info(f"--- SCRAPE CYCLE #{cycle_count} START at {cycle_start.strftime('%Y-%m-%d %H:%M:%S UTC')} ---")
+            cycle_count += 1
+            cycle_start = datetime.utcnow()
+            logger.info(f"--- SCRAPE CYCLE #{cycle_count} START at {cycle_start.strftime('%Y-%m-%d %H:%M:%S UTC')} ({len(due)} due) ---")
 
-                # Run the scraper
-                scrape_ipos()
+            try:
+                # Run the scraper on just the sources that are due
+                summary = scrape_ipos(
+                    urls={s.category: s.url for s in due},
+                    js_categories={s.category for s in due if s.needs_js},
+                    driver_pool=driver_pool,
+                )
+            except Exception:
+                for source in due:
+                    scheduler.record(source, changed=False, failed=True)
+                raise
 
-                elapsed = (datetime.utcnow() - cycle_start).total_seconds()
-                logger.info(f"Scraping cycle #{cycle_count} completed in {elapsed:.2f} seconds.")
+            changed = set(summary["changed"])
+            failed = set(summary["failed"])
+            # Frozen pages leave the schedule (every category sharing that URL)
+            frozen_urls = {s.url for s in due if s.category in summary["frozen"]}
+            for source in list(scheduler.sources.values()):
+                if source.url in frozen_urls:
+                    scheduler.remove(source)
+            for source in due:
+                if source.url not in frozen_urls:
+                    scheduler.record(source, changed=source.category in changed,
+                                     failed=source.category in failed)
 
-                # Brief pause between cycles
-                time.sleep(1)
+            # Re-score only the IPOs this cycle changed (no-op until a model is loaded)
+            if summary["added"] or summary["updated"]:
+                try:
+                    rescore()
+                except Exception as e:
+                    logger.error(f"Post-scrape scoring failed: {e}")
 
-            # Break phase: 5 minutes
-            break_end = datetime.utcnow() + timedelta(minutes=5)
-            logger.info(f"Starting break phase until {break_end.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-            time.sleep(300)  # 5 minutes
+            elapsed = (datetime.utcnow() - cycle_start).total_seconds()
+            stats = scheduler.stats()
+            next_up = stats["next_due"][0] if stats["next_due"] else None
+            next_desc = f"{next_up['category']} in {next_up['due_in_s']}s" if next_up else "n/a"
+            logger.info(f"Scraping cycle #{cycle_count} completed in {elapsed:.2f} seconds. "
+                        f"Changed: {len(changed)}/{len(due)}, queue depth: {stats['queue_depth']}, "
+                        f"next: {next_desc}. Driver pool: {driver_pool.stats()}")
 
         except KeyboardInterrupt:
             logger.info("Worker stopped by user.")
+            driver_pool.close()
             break
         except Exception as e:
             logger.error(f"Error in background worker loop: {e}")
@@ -0,0 +1,172 @@
+import argparse
+import re
+import sys
+from datetime import datetime, timedelta
+
+from ..db.database import SessionLocal
+from ..db.migrations import init_db
+from ..db.models import CrawlState
+from ..db.writer import db_writer
+from ..utils.logger import setup_logger
+from . import fetch_cache
+
+logger = setup_logger("crawl_state")
+
+_YEAR_SUFFIX = re.compile(r'(\d{4})$')
+
+def category_year(category):
+    """Year of a per-year listing category like 'Chittorgarh IPO - SME 2023', else None."""
+    match = _YEAR_SUFFIX.search(category)
+    return int(match.group(1)) if match else None
+
+def is_closed_year(category, freeze_after_days, now=None):
+    """A past year's listing is final once freeze_after_days have passed since Dec 31."""
+    year = category_year(category)
+    if year is None:
+        return False
+    now = now or datetime.utcnow()
+    return now >= datetime(year + 1, 1, 1) + timedelta(days=freeze_after_days)
+
+def frozen_urls():
+    db = SessionLocal()
+    try:
+        return {row.url for row in db.query(CrawlState.url).filter(CrawlState.frozen.is_(True))}
+    finally:
+        db.close()
+
+def maybe_freeze(url, category, row_count, payload_hash, freeze_after_days):
+    """
+    Freeze a closed-year page once its payload has been seen unchanged after ingestion.
+    The checkpoint (row count + payload hash) is what backfill verifies against.
+    """
+    if not row_count or not payload_hash or not is_closed_year(category, freeze_after_days):
+        return False
+    return db_writer.run(_freeze, url, category, row_count, payload_hash)
+
+def _freeze(url, category, row_count, payload_hash):
+    db = SessionLocal()
+    try:
+        state = db.get(CrawlState, url)
+        if state is None:
+            state = CrawlState(url=url)
+            db.add(state)
+        elif state.frozen:
+            return False
+        state.category = category
+        state.year = category_year(category)
+        state.frozen = True
+        state.row_count = row_count
+        state.payload_hash = payload_hash
+        state.frozen_at = datetime.utcnow()
+        state.verified_at = state.frozen_at
+        db.commit()
+        logger.info(f"FROZEN: {category} ({row_count} rows)")
+        return True
+    except Exception as e:
+        logger.error(f"Could not freeze {category}: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+def _checkpoint(url, row_count=None, payload_hash=None):
+    db = SessionLocal()
+    try:
+        state = db.get(CrawlState, url)
+        if row_count is not None:
+            state.row_count = row_count
+            state.payload_hash = payload_hash
+        state.verified_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+def backfill(year=None, max_workers=4):
+    """
+    Re-fetch every frozen page (optionally one year only) and verify it against its
+    checkpoint. Pages whose payload drifted are re-ingested and re-checkpointed.
+    """
+    from .fetcher import ConcurrentFetcher
+    from .ipo_scraper import parse_page, save_to_db
+
+    db = SessionLocal()
+    try:
+        query = db.query(CrawlState).filter(CrawlState.frozen.is_(True))
+        if year is not None:
+            query = query.filter(CrawlState.year == year)
+        states = {s.url: (s.category, s.row_count, s.payload_hash) for s in query.all()}
+    finally:
+        db.close()
+    if not states:
+        logger.info("No frozen pages to verify.")
+        return {"verified": 0, "drifted": 0, "failed": 0}
+
+    logger.info(f"Verifying {len(states)} frozen pages...")
+    verified = drifted = failed = 0
+    fetcher = ConcurrentFetcher(max_workers=max_workers)
+    for result in fetcher.fetch_all({category: url for url, (category, _, _) in states.items()}):
+        category, row_count, checkpoint_hash = states[result.url]
+        if not result.ok:
+            logger.error(f"Backfill fetch failed for {category}: {result.error}")
+            failed += 1
+            continue
+        rows = parse_page(category, result.html)
+        p_hash = fetch_cache.payload_hash(rows)
+        if p_hash == checkpoint_hash:
+            verified += 1
+            db_writer.run(_checkpoint, result.url)
+        else:
+            drifted += 1
+            logger.warning(f"DRIFT: {category} checkpoint {row_count} rows, now {len(rows)}. Re-ingesting.")
+            if rows:
+                save_to_db(rows)
+            db_writer.run(_checkpoint, result.url, len(rows), p_hash)
+            fetch_cache.record(result.url, body=fetch_cache.body_hash(result.html), payload=p_hash,
+                               row_count=len(rows), parsed=True, changed=True)
+    db_writer.flush()
+    logger.info(f"Backfill complete. Verified: {verified}, Drifted: {drifted}, Failed: {failed}")
+    return {"verified": verified, "drifted": drifted, "failed": failed}
+
+def unfreeze(year=None):
+    return db_writer.run(_unfreeze, year)
+
+def _unfreeze(year):
+    db = SessionLocal()
+    try:
+        query = db.query(CrawlState).filter(CrawlState.frozen.is_(True))
+        if year is not None:
+            query = query.filter(CrawlState.year == year)
+        count = query.update({CrawlState.frozen: False}, synchronize_session=False)
+        db.commit()
+        logger.info(f"Unfroze {count} pages.")
+        return count
+    finally:
+        db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage frozen historical-year pages.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("backfill", "unfreeze", "list"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--year", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    init_db()
+    if args.command == "backfill":
+        backfill(year=args.year)
+    elif args.command == "unfreeze":
+        unfreeze(year=args.year)
+    else:
+        db = SessionLocal()
+        try:
+            query = db.query(CrawlState).order_by(CrawlState.year.desc(), CrawlState.category)
+            if args.year is not None:
+                query = query.filter(CrawlState.year == args.year)
+            for s in query:
+                print(f"{'FROZEN ' if s.frozen else 'active '} {s.category}: {s.row_count} rows, "
+                      f"frozen {s.frozen_at:%Y-%m-%d}, verified {s.verified_at:%Y-%m-%d}")
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger("driver_pool")
+
+try:
+    import psutil
+except ImportError:  # memory-based recycling is skipped without psutil
+    psutil = None
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def resolve_driver_path():
+    """Resolve the chromedriver binary once per process instead of on every launch."""
+    global _driver_path
+    if _driver_path is None:
+        with _driver_path_lock:
+            if _driver_path is None:
+                _driver_path = ChromeDriverManager().install()
+                logger.info(f"Resolved chromedriver at {_driver_path}")
+    return _driver_path
+
+def create_driver():
+    options = Options()
+    options.add_argument("--headless")  # Run in background
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+    driver.implicitly_wait(10)
+    return driver
+
+class PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+    def memory_mb(self):
+        """RSS of chromedriver plus every Chrome process it spawned."""
+        if psutil is None:
+            return 0.0
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            procs = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    def is_healthy(self):
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.debug(f"Error quitting driver: {e}")
+
+class DriverPool:
+    """
+    Keeps up to `size` warm Chrome drivers alive for the lifetime of the worker.
+    Drivers are health-checked on checkout and recycled after `max_pages`
+    page loads or once their process tree exceeds `max_memory_mb`.
+    """
+
+    def __init__(self, size=2, max_pages=50, max_memory_mb=1024, page_wait=2):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.page_wait = page_wait
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self.recycled = 0
+
+    @classmethod
+    def from_config(cls, config):
+        pool_cfg = config.get('scraper', {}).get('driver_pool', {})
+        return cls(
+            size=pool_cfg.get('size', 2),
+            max_pages=pool_cfg.get('max_pages', 50),
+            max_memory_mb=pool_cfg.get('max_memory_mb', 1024),
+            page_wait=pool_cfg.get('page_wait', 2),
+        )
+
+    def warm(self, count=None):
+        """Start drivers ahead of time so the first JS page doesn't pay cold-start."""
+        for _ in range(min(count or self.size, self.size)):
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+            try:
+                self._idle.put(PooledDriver(create_driver()))
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    def _checkout(self):
+        """(pooled driver, True if it was started just now)."""
+        while True:
+            if self._closed:
+                raise RuntimeError("DriverPool is closed")
+            try:
+                return self._idle.get_nowait(), False
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    return PooledDriver(create_driver()), True
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            # Pool is at capacity; wait briefly and re-check in case a driver was recycled
+            try:
+                return self._idle.get(timeout=1), False
+            except queue.Empty:
+                continue
+
+    def _discard(self, pooled, reason):
+        logger.info(f"Recycling driver after {pooled.pages} pages ({reason})")
+        pooled.quit()
+        self.recycled += 1
+        with self._lock:
+            self._created -= 1
+
+    def _needs_recycle(self, pooled):
+        if pooled.pages >= self.max_pages:
+            return f"page limit {self.max_pages}"
+        if self.max_memory_mb:
+            mem = pooled.memory_mb()
+            if mem > self.max_memory_mb:
+                return f"memory {mem:.0f} MB > {self.max_memory_mb} MB"
+        return None
+
+    @contextmanager
+    def acquire(self):
+        pooled, fresh = self._checkout()
+        # Idle drivers can die while parked; drop them until a live one (or a new one) turns up.
+        # Each discard frees a slot, so within `size` tries the pool starts a fresh driver.
+        for _ in range(self.size):
+            if fresh or pooled.is_healthy():
+                break
+            self._discard(pooled, "failed health check")
+            pooled, fresh = self._checkout()
+        else:
+            if not fresh and not pooled.is_healthy():
+                self._discard(pooled, "failed health check")
+                raise RuntimeError(f"No healthy driver after {self.size} health checks")
+        broken = False
+        try:
+            yield pooled.driver
+        except Exception:
+            broken = not pooled.is_healthy()
+            raise
+        finally:
+            pooled.pages += 1
+            reason = "unresponsive" if broken else self._needs_recycle(pooled)
+            if reason or self._closed:
+                self._discard(pooled, reason or "pool closed")
+            else:
+                self._idle.put(pooled)
+
+    def render(self, url):
+        with self.acquire() as driver:
+            driver.get(url)
+            time.sleep(self.page_wait)  # Wait for page to load
+            return driver.page_source
+
+    def render_all(self, urls):
+        """Render {category: url} across the pool, yielding (category, html, error)."""
+        if not urls:
+            return
+        def job(category, url):
+            try:
+                return category, self.render(url), None
+            except Exception as e:
+                return category, None, e
+        todo = iter(urls.items())
+        workers = min(self.size, len(urls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render") as executor:
+            # Keep only as many renders outstanding as there are drivers, so unconsumed
+            # pages never pile up in memory
+            pending = set()
+            while True:
+                for category, url in todo:
+                    pending.add(executor.submit(job, category, url))
+                    if len(pending) >= workers:
+                        break
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "alive": self._created,
+            "idle": self._idle.qsize(),
+            "recycled": self.recycled,
+        }
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            pooled.quit()
+            with self._lock:
+                self._created -= 1
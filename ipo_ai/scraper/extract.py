@@ -0,0 +1,132 @@
+import json
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    FRAGMENT_PARSER = 'lxml'
+except ImportError:
+    lxml = None
+    FRAGMENT_PARSER = 'html.parser'
+
+_NEXT_DATA_OPEN = re.compile(r'<script[^>]*\bid\s*=\s*["\']?__NEXT_DATA__["\']?[^>]*>', re.I)
+_SCRIPT_BLOCK = re.compile(r'<script\b[^>]*>(.*?)</script\s*>', re.I | re.S)
+_TABLE_TAG = re.compile(r'<(/?)table\b', re.I)
+
+# Pages are 100+ KB of markup but we only ever need one JSON blob, one table or a few
+# inline script objects, so locate those regions in the raw string and only hand the
+# small fragment to a parser instead of building a full tree per page.
+
+def find_next_data(html):
+    """Return the parsed __NEXT_DATA__ JSON, or None if the page has none."""
+    match = _NEXT_DATA_OPEN.search(html)
+    if not match:
+        return None
+    end = html.find('</script>', match.end())
+    if end == -1:
+        return None
+    try:
+        return json.loads(html[match.end():end] or "{}")
+    except ValueError:
+        return None
+
+def iter_tables_html(html):
+    """Yield the markup of each top-level <table> in order, nested tables included."""
+    depth = 0
+    start = None
+    for match in _TABLE_TAG.finditer(html):
+        if not match.group(1):
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                close = html.find('>', match.end())
+                yield html[start:close + 1 if close != -1 else len(html)]
+    if depth and start is not None:
+        yield html[start:]  # unterminated table, let the parser recover
+
+def find_table_html(html, index=0):
+    """Return the markup of the index-th top-level <table>, nested tables included."""
+    for i, fragment in enumerate(iter_tables_html(html)):
+        if i == index:
+            return fragment
+    return None
+
+def find_first_table(html):
+    """Parse only the first <table> fragment and return its Tag (or None)."""
+    fragment = find_table_html(html)
+    if fragment is None:
+        return None
+    return BeautifulSoup(fragment, FRAGMENT_PARSER).find('table')
+
+def read_table(html, index=0):
+    """
+    Cell texts of the index-th table in one pass: (header cells, [row cells, ...]).
+    Header cells are the th/td of the first row; data rows are the td cells of every
+    later row, rows without td (e.g. repeated header rows) are skipped.
+    Returns None if the page has no such table.
+    """
+    fragment = find_table_html(html, index)
+    return table_cells(fragment) if fragment is not None else None
+
+def read_tables(html):
+    """read_table for every top-level table of the page, in a single scan."""
+    return [table_cells(fragment) for fragment in iter_tables_html(html)]
+
+def table_cells(fragment):
+    """(header cells, data rows) of one table fragment, see read_table."""
+    if lxml is not None:
+        table = lxml.html.fragment_fromstring(fragment)
+        trs = table.iter('tr')
+        header = next(trs, None)
+        if header is None:
+            return [], []
+        headers = [cell.text_content().strip() for cell in header if cell.tag in ('th', 'td')]
+        rows = []
+        for tr in trs:
+            cells = [cell.text_content().strip() for cell in tr if cell.tag == 'td']
+            if cells:
+                rows.append(cells)
+        return headers, rows
+    table = BeautifulSoup(fragment, FRAGMENT_PARSER).find('table')
+    trs = table.find_all('tr') if table is not None else []
+    if not trs:
+        return [], []
+    headers = [cell.text.strip() for cell in trs[0].find_all(['th', 'td'])]
+    rows = [[cell.text.strip() for cell in tr.find_all('td')] for tr in trs[1:]]
+    return headers, [cells for cells in rows if cells]
+
+def iter_scripts(html, must_contain=None):
+    """Yield (index, content) of inline scripts, optionally only those containing a marker."""
+    for i, match in enumerate(_SCRIPT_BLOCK.finditer(html)):
+        content = match.group(1)
+        if must_contain is None or must_contain in content:
+            yield i, content
+
+_RECORD_PATTERNS = {}
+
+def find_embedded_records(html, key='company_name'):
+    """
+    Pull flat JSON objects containing `key` out of inline scripts, e.g. the
+    self.__next_f.push([...]) chunks of app-router pages without __NEXT_DATA__.
+    Only scripts that mention the key are scanned.
+    """
+    pattern = _RECORD_PATTERNS.get(key)
+    if pattern is None:
+        pattern = _RECORD_PATTERNS[key] = re.compile(r'\{[^{}]*' + re.escape(key) + r'[^{}]*\}')
+    records = []
+    for _, content in iter_scripts(html, must_contain=key):
+        for mo in pattern.finditer(content):
+            try:
+                raw_obj = mo.group(0).replace('\\"', '"').replace('\\\\"', '"')
+                record = json.loads(raw_obj)
+                if key in record:
+                    records.append(record)
+            except ValueError:
+                continue
+        if records:
+            break
+    return records
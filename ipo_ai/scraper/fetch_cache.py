@@ -0,0 +1,89 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from ..db.database import SessionLocal
+from ..db.models import FetchCache
+from ..db.writer import db_writer
+from ..utils.logger import setup_logger
+
+logger = setup_logger("fetch_cache")
+
+def body_hash(html):
+    return hashlib.sha1(html.encode('utf-8', 'replace')).hexdigest()
+
+def payload_hash(rows):
+    """Stable hash of extracted rows, ignoring the per-run scraped_at stamp."""
+    digest = hashlib.sha1()
+    for row in rows:
+        stable = {k: v for k, v in row.items() if k != 'scraped_at'}
+        digest.update(json.dumps(stable, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+def load_entries(urls):
+    """Return {url: FetchCache} for every URL we have seen before (one query)."""
+    if not urls:
+        return {}
+    db = SessionLocal()
+    try:
+        entries = db.query(FetchCache).filter(FetchCache.url.in_(list(urls))).all()
+        db.expunge_all()
+        return {e.url: e for e in entries}
+    finally:
+        db.close()
+
+def is_fresh(entry, max_age_minutes):
+    """
+    Whether the page was parsed recently enough to trust a 304 or an identical body.
+    Status is partly derived from the current date (listing day passing), so every
+    page is still re-parsed at least once per max_age even if its HTML never changes.
+    """
+    if entry is None or entry.parsed_at is None:
+        return False
+    return datetime.utcnow() - entry.parsed_at < timedelta(minutes=max_age_minutes)
+
+def request_headers(entry):
+    """Conditional request headers for a cached URL."""
+    headers = {}
+    if entry is None:
+        return headers
+    if entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers
+
+def record(url, etag=None, last_modified=None, body=None, payload=None, row_count=None,
+           parsed=False, changed=False):
+    """Upsert the cache entry for one URL after it has been fetched (and possibly ingested)."""
+    # Queued on the writer thread; nothing waits on the cache row being written
+    return db_writer.submit(_record, url, etag, last_modified, body, payload, row_count, parsed, changed)
+
+def _record(url, etag, last_modified, body, payload, row_count, parsed, changed):
+    db = SessionLocal()
+    try:
+        entry = db.get(FetchCache, url)
+        if entry is None:
+            entry = FetchCache(url=url)
+            db.add(entry)
+        if etag is not None:
+            entry.etag = etag
+        if last_modified is not None:
+            entry.last_modified = last_modified
+        if body is not None:
+            entry.body_hash = body
+        if payload is not None:
+            entry.payload_hash = payload
+        if row_count is not None:
+            entry.row_count = row_count
+        entry.checked_at = datetime.utcnow()
+        if parsed:
+            entry.parsed_at = entry.checked_at
+        if changed:
+            entry.changed_at = entry.checked_at
+        db.commit()
+    except Exception as e:
+        logger.error(f"Fetch cache update failed for {url}: {e}")
+        db.rollback()
+    finally:
+        db.close()
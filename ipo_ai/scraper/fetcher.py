@@ -0,0 +1,122 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger("fetcher")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+_local = threading.local()
+
+def get_session(pool_size=10):
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": USER_AGENT
+    })
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _thread_session():
+    """requests.Session is not thread-safe, so every worker thread keeps its own."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = get_session()
+        _local.session = session
+    return session
+
+class FetchResult:
+    def __init__(self, category, url, html=None, status_code=None, error=None, elapsed=0.0,
+                 etag=None, last_modified=None):
+        self.category = category
+        self.url = url
+        self.html = html
+        self.status_code = status_code
+        self.error = error
+        self.elapsed = elapsed
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def ok(self):
+        return self.html is not None and self.error is None
+
+    @property
+    def not_modified(self):
+        return self.status_code == 304
+
+    def __repr__(self):
+        return f"<FetchResult {self.category} ({self.status_code})>"
+
+class ConcurrentFetcher:
+    """
+    Fetches static pages in parallel over a bounded thread pool.
+    Each thread reuses one pooled session, and requests to the same host
+    are capped so one site is never hit with the whole pool at once.
+    """
+
+    def __init__(self, max_workers=8, max_per_host=4, timeout=20):
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._host_limits = {}
+        self._host_lock = threading.Lock()
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._host_lock:
+            sem = self._host_limits.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.max_per_host)
+                self._host_limits[host] = sem
+            return sem
+
+    def fetch_one(self, category, url, headers=None):
+        start = time.perf_counter()
+        try:
+            with self._host_semaphore(url):
+                response = _thread_session().get(url, headers=headers, timeout=self.timeout)
+            elapsed = time.perf_counter() - start
+            if response.status_code == 304:
+                return FetchResult(category, url, status_code=304, elapsed=elapsed)
+            if response.status_code != 200:
+                return FetchResult(category, url, status_code=response.status_code,
+                                   error=f"HTTP {response.status_code}", elapsed=elapsed)
+            return FetchResult(category, url, html=response.text,
+                               status_code=response.status_code, elapsed=elapsed,
+                               etag=response.headers.get('ETag'),
+                               last_modified=response.headers.get('Last-Modified'))
+        except Exception as e:
+            return FetchResult(category, url, error=str(e), elapsed=time.perf_counter() - start)
+
+    def fetch_all(self, urls, headers=None):
+        """
+        Yield a FetchResult for every (category -> url) entry as soon as it completes.
+        `headers` optionally maps url -> extra request headers (e.g. conditional validators).
+        At most max_workers requests are outstanding or waiting to be consumed, so a
+        consumer that stops pulling results also stops new requests (backpressure).
+        """
+        if not urls:
+            return
+        headers = headers or {}
+        todo = iter(urls.items())
+        workers = min(self.max_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+            pending = set()
+            while True:
+                for category, url in todo:
+                    pending.add(pool.submit(self.fetch_one, category, url, headers.get(url)))
+                    if len(pending) >= workers:
+                        break
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
@@ -21,7 +21,11 @@ logging.basicConfig(
 logger = logging.getLogger("historical_scraper")
 
 import requests
-from bs4 import BeautifulSoup
+from ipo_ai.scraper.extract import find_next_data, find_embedded_records
+from ipo_ai.utils.normalize import to_number
+from ipo_ai.scraper import archive
+from ipo_ai.scraper.archive import PageArchive
+from ipo_ai.scraper.ipo_scraper import load_config
 
 def scrape_historical(url, year_label, limit=10):
     logger.info(f"Starting historical scrape for {year_label} from {url} (Limit: {limit})")
@@ -35,23 +39,20 @@ def scrape_historical(url, year_label, limit=10):
         logger.info(f"Response status: {response.status_code}")
         response.raise_for_status()
         
-        # Save to file for thorough inspection
-        with open("debug_page.html", "w", encoding="utf-8") as f:
-            f.write(response.text)
-        logger.info("Saved page content to debug_page.html")
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
+        # Keep the raw page for inspection and re-parsing (python -m ipo_ai.scraper.archive show <url>)
+        page_archive = PageArchive.from_config(load_config()) or PageArchive()
+        content_hash = page_archive.store(response.text)
+        archive.record(url, f"Historical {year_label}", content_hash).result()
+        logger.info(f"Archived page content as {content_hash}")
         
         # Next.js pages often store data in a script tag with id="__NEXT_DATA__"
         # Or in multiple scripts with self.__next_f.push([...])
-        next_data_script = soup.find('script', id='__NEXT_DATA__')
+        data = find_next_data(response.text)
         
         report_data = []
-        if next_data_script:
-            import json
+        if data:
             logger.info("Found __NEXT_DATA__ script. Parsing JSON...")
             try:
-                data = json.loads(next_data_script.string)
                 props = data.get('props', {})
                 page_props = props.get('pageProps', {})
                 result_data = page_props.get('resultData', {})
@@ -60,32 +61,11 @@ def scrape_historical(url, year_label, limit=10):
                 logger.error(f"Error parsing __NEXT_DATA__: {e}")
 
         if not report_data:
-            logger.info("Iterating all script tags for discovery...")
-            scripts = soup.find_all('script')
-            for i, s in enumerate(scripts):
-                script_id = s.get('id', 'No ID')
-                content = s.string if s.string else ""
-                snippet = content[:100].replace('\n', ' ')
-                logger.info(f"Script {i} [id={script_id}]: {snippet}...")
-                
-                if "report" in content.lower() or "ipo" in content.lower() or "company" in content.lower():
-                    logger.info(f"--- POTENTIAL DATA IN SCRIPT {i} ---")
-                    # Try a very loose extraction
-                    # Look for anything between { and } that contains company_name
-                    import re
-                    # Finding objects that contain "company_name" or "issuer_company_name"
-                    obj_matches = re.finditer(r'\{[^{}]*company_name[^{}]*\}', content)
-                    for mo in obj_matches:
-                        try:
-                            raw_obj = mo.group(0).replace('\\"', '"').replace('\\\\"', '"')
-                            import json
-                            record = json.loads(raw_obj)
-                            if 'company_name' in record:
-                                report_data.append(record)
-                        except: continue
-                if len(report_data) > 0:
-                    logger.info(f"Successfully extracted {len(report_data)} records from script {i}")
-                    break
+            # Only scripts that actually mention company_name are scanned for embedded objects
+            logger.info("Scanning inline scripts for embedded records...")
+            report_data = find_embedded_records(response.text, 'company_name')
+            if report_data:
+                logger.info(f"Successfully extracted {len(report_data)} records from inline scripts")
 
         if report_data:
             logger.info(f"Successfully extracted {len(report_data)} items.")
@@ -103,20 +83,13 @@ def scrape_historical(url, year_label, limit=10):
                 if existing: continue
                 
                 # Extract fields
-                price = item.get('issue_price_rs') or item.get('issue_price') or item.get('price') or 0
-                if isinstance(price, str):
-                    price = ''.join(c for c in price if c.isdigit() or c == '.')
-                    price = float(price) if price else 0.0
-                
-                size = item.get('total_issue_amount_rs_cr') or item.get('issue_size') or item.get('size') or 0
-                if isinstance(size, str):
-                    size = ''.join(c for c in size if c.isdigit() or c == '.')
-                    size = float(size) if size else 0.0
+                price = to_number(item.get('issue_price_rs') or item.get('issue_price') or item.get('price'), 'price')
+                size = to_number(item.get('total_issue_amount_rs_cr') or item.get('issue_size') or item.get('size'), 'amount')
                 
                 new_ipo = IPOMaster(
                     ipo_name=name,
-                    issue_size=float(size),
-                    price_high=float(price),
+                    issue_size=size,
+                    price_high=price,
                     status="listed",
                     scraped_at=datetime.utcnow()
                 )
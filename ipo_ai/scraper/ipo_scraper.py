@@ -1,367 +1,443 @@
 import logging
+import threading
 import time
-import random
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from sqlalchemy import text, select, insert, update
 from ..db.database import SessionLocal, engine, Base
+from ..db.migrations import init_db
+from ..db.writer import db_writer
+from ..db.snapshots import SNAPSHOT_FIELDS, snapshot_row, append_snapshots
+from ..db.events import ChangeEvent, change_bus, data_version
 from ..db.models import IPOMaster, IPOStatus
 from ..utils.logger import setup_logger
+from .fetcher import ConcurrentFetcher, get_session
+from .driver_pool import DriverPool
+from . import fetch_cache, crawl_state, archive
+from .archive import PageArchive
+from .parsers import get_parser
+from .pipeline import Page, Pipeline, default_parse_workers, log_stats
 
 logger = setup_logger("scraper")
 
 # Ensure tables exist
-Base.metadata.create_all(bind=engine)
+init_db()
 
-import requests
-from bs4 import BeautifulSoup
 import json
+import hashlib
 import re
 import yaml
 import os
+from functools import lru_cache
 
-def get_session():
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    })
-    return session
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+# Plain-text dump of every IPO, rewritten at the end of each cycle
+TEXT_EXPORT_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'ipo_data.txt')
 
-def scrape_ipos(urls=None):
-    all_data = []
-    if not urls:
-        config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
-        sites = config['sites']
-        urls = {site['name']: site['url'] for site in sites}
-        
+def load_config():
+    with open(CONFIG_PATH, 'r') as f:
+        return yaml.safe_load(f)
+
+def build_source_urls(config):
+    """
+    Expand the configured sites into {category: url}, plus the set of
+    categories that must be rendered by Selenium (sites marked needs_js).
+    """
+    urls = {}
+    js_categories = set()
+    for site in config['sites']:
+        name, url = site['name'], site['url']
+        expanded = {}
         # Expand URLs for Chittorgarh to include past years
-        expanded_urls = {}
-        for name, url in urls.items():
-            if 'chittorgarh' in name.lower():
-                current_year = datetime.now().year
-                expanded_urls[f"{name} - All {current_year}"] = f"{url}/all/?year={current_year}"
-                expanded_urls[f"{name} - Mainboard {current_year}"] = f"{url}/mainboard/?year={current_year}"
-                expanded_urls[f"{name} - SME {current_year}"] = f"{url}/sme/?year={current_year}"
-                for year in range(current_year - 1, current_year - 6, -1):  # last 5 years
-                    expanded_urls[f"{name} - All {year}"] = f"{url}/all/?year={year}"
-                    expanded_urls[f"{name} - Mainboard {year}"] = f"{url}/mainboard/?year={year}"
-                    expanded_urls[f"{name} - SME {year}"] = f"{url}/sme/?year={year}"
-            else:
-                expanded_urls[name] = url
-        urls = expanded_urls
-    
-    logger.info(f"Starting Selenium-based scraping for {len(urls)} URLs...")
-    
-    # Setup Selenium
-    options = Options()
-    options.add_argument("--headless")  # Run in background
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.implicitly_wait(10)
-    
+        if 'chittorgarh' in name.lower():
+            current_year = datetime.now().year
+            expanded[f"{name} - All {current_year}"] = f"{url}/all/?year={current_year}"
+            expanded[f"{name} - Mainboard {current_year}"] = f"{url}/mainboard/?year={current_year}"
+            expanded[f"{name} - SME {current_year}"] = f"{url}/sme/?year={current_year}"
+            for year in range(current_year - 1, current_year - 6, -1):  # last 5 years
+                expanded[f"{name} - All {year}"] = f"{url}/all/?year={year}"
+                expanded[f"{name} - Mainboard {year}"] = f"{url}/mainboard/?year={year}"
+                expanded[f"{name} - SME {year}"] = f"{url}/sme/?year={year}"
+        else:
+            expanded[name] = url
+        urls.update(expanded)
+        if site.get('needs_js'):
+            js_categories.update(expanded)
+    return urls, js_categories
+
+def site_for_category(config, category):
+    """The config.yaml site a (possibly year-expanded) category belongs to."""
+    return next((site for site in config['sites']
+                 if category == site['name'] or category.startswith(f"{site['name']} - ")), {})
+
+def parser_for(category, config=None):
+    """Name of the parser configured for a category's site."""
+    if config is None:
+        return _configured_parser(category)
+    return get_parser(site_for_category(config, category).get('parser'))[0]
+
+@lru_cache(maxsize=1024)
+def _configured_parser(category):
+    # Callers without a config (backfill, reparse) read config.yaml once per process
+    return parser_for(category, load_config())
+
+def parse_page(category, html, parser=None):
+    """Extract IPO rows from one page with the site's registered parser (see parsers.py)."""
+    _, parse = get_parser(parser or parser_for(category))
+    return parse(category, html)
+
+def archive_page(page_archive, html, content_hash):
+    """Store a fetched page; a full or unwritable archive never fails the scrape."""
+    if page_archive is None:
+        return False
+    try:
+        page_archive.store(html, content_hash)
+        return True
+    except OSError as e:
+        logger.warning(f"Could not archive page {content_hash}: {e}")
+        return False
+
+def parse_fetched(page):
+    """
+    Parse stage of the scrape pipeline (runs in a parser process): archive the raw
+    page, then extract rows and their payload hash; the html is dropped.
+    """
+    page.archived = archive_page(page.archive, page.html, page.body)
+    page.rows = parse_page(page.category, page.html, page.parser)
+    page.payload = fetch_cache.payload_hash(page.rows)
+    page.html = None
+    return page
+
+def scrape_ipos(urls=None, js_categories=None, driver_pool=None, include_frozen=False):
+    config = load_config()
+    if not urls:
+        urls, js_categories = build_source_urls(config)
+        if not include_frozen:
+            # Closed years that were fully ingested are only re-checked by `crawl_state backfill`
+            frozen = crawl_state.frozen_urls()
+            urls = {c: u for c, u in urls.items() if u not in frozen}
+    js_categories = set(js_categories or ())
+    scraper_cfg = config.get('scraper', {})
+    freeze_after_days = config.get('archive', {}).get('freeze_after_days', 90)
+
+    static_urls = {c: u for c, u in urls.items() if c not in js_categories}
+    js_urls = {c: u for c, u in urls.items() if c in js_categories}
+    logger.info(f"Starting scrape for {len(urls)} URLs ({len(static_urls)} static, {len(js_urls)} via Selenium)...")
+
     total_new = 0
     total_updated = 0
+    unchanged = 0
+    changed_categories = []
+    failed_categories = []
+    frozen_categories = []
+    empty_categories = []
+    cycle_start = time.perf_counter()
+    parsers = {category: parser_for(category, config) for category in urls}
+    page_archive = PageArchive.from_config(config)
 
-    for category, url in urls.items():
-        logger.info(f"Scraping category '{category}' from {url}...")
+    # Per-URL validators and hashes from previous cycles (survives restarts)
+    max_age = scraper_cfg.get('reparse_after_minutes', 720)
+    cache = fetch_cache.load_entries(urls.values())
+    fresh = {url for url, entry in cache.items() if fetch_cache.is_fresh(entry, max_age)}
+
+    def confirm_unchanged(category, url):
+        # An ingested closed-year page that came back identical is final: freeze it
+        entry = cache.get(url)
+        if entry is not None and entry.parsed_at is not None and not entry.row_count:
+            # Same page as last time, and last time its parser found nothing in it
+            empty_categories.append(category)
+        if entry is not None and crawl_state.maybe_freeze(url, category, entry.row_count,
+                                                          entry.payload_hash, freeze_after_days):
+            frozen_categories.append(category)
+
+    # settle() and write_batch() run on the pipeline's writer thread only, so the
+    # tallies above need no locking
+    def settle(page):
+        nonlocal unchanged
+        if page.archived:
+            archive.record(page.url, page.category, page.body, page.fetched_at)
+        if page.outcome == "failed":
+            logger.error(f"Error scraping {page.category}: {page.error}")
+            failed_categories.append(page.category)
+        elif page.outcome == "not_modified":
+            unchanged += 1
+            fetch_cache.record(page.url)
+            confirm_unchanged(page.category, page.url)
+        elif page.outcome == "unchanged":
+            unchanged += 1
+            fetch_cache.record(page.url, etag=page.etag, last_modified=page.last_modified)
+            confirm_unchanged(page.category, page.url)
+        else:
+            if not page.rows:
+                logger.warning(f"No rows extracted from '{page.category}' by the {page.parser} parser ({page.url})")
+            entry = cache.get(page.url)
+            if entry is not None and entry.payload_hash == page.payload:
+                unchanged += 1
+                fetch_cache.record(page.url, etag=page.etag, last_modified=page.last_modified,
+                                   body=page.body, parsed=True)
+                confirm_unchanged(page.category, page.url)
+            elif page.rows:
+                return True  # upserted with the next batch
+            else:
+                fetch_cache.record(page.url, etag=page.etag, last_modified=page.last_modified, body=page.body,
+                                   payload=page.payload, row_count=0, parsed=True, changed=True)
+                empty_categories.append(page.category)
+        return False
+
+    def write_batch(pages):
+        # One upsert (one transaction) for every page in the batch; a page's cache
+        # entry only moves once its rows are committed
+        nonlocal total_new, total_updated
         try:
-            driver.get(url)
-            time.sleep(2)  # Wait for page to load
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            
-            # 1. Try JSON extraction (__NEXT_DATA__)
-            extracted_data = []
-            next_data_script = soup.find('script', id='__NEXT_DATA__')
-            
-            if next_data_script:
-                try:
-                    data = json.loads(next_data_script.string or "{}")
-                    # Navigate the complex Next.js tree
-                    props = data.get('props', {})
-                    page_props = props.get('pageProps', {})
-                    result_data = page_props.get('resultData', {})
-                    report_data = result_data.get('reportData') or result_data.get('reportInfo') or []
-                    
-                    if not report_data:
-                        # Sometimes it's in a different spot
-                        report_data = result_data.get('reportItems') or []
-
-                    for item in report_data:
-                        name = item.get('company_name') or item.get('issuer_company_name') or item.get('ipo_name')
-                        if not name: continue
-                        
-                        # Extract all available fields
-                        price = item.get('issue_price_rs') or item.get('issue_price') or item.get('price_high') or 0
-                        size = item.get('total_issue_amount_rs_cr') or item.get('issue_size_cr') or item.get('size') or 0
-                        gmp = item.get('gmp') or item.get('grey_market_premium') or 0
-                        listing_gain = item.get('listing_gain') or 0
-                        retail_sub = item.get('retail_subscription') or item.get('retail_sub') or 0
-                        hni_sub = item.get('hni_subscription') or item.get('hni_sub') or 0
-                        qib_sub = item.get('qib_subscription') or item.get('qib_sub') or 0
-                        best_category = item.get('best_category') or item.get('category') or ""
-                        listing_date_str = item.get('listing_date') or ""
-                        
-                        # Parse listing_date if available
-                        listing_date = None
-                        if listing_date_str:
-                            try:
-                                listing_date = datetime.strptime(listing_date_str, '%b %d, %Y')
-                            except:
-                                listing_date = None
-                        
-                        # Determine status based on scraped data signals
-                        status = "upcoming"  # default
-
-                        # Check for listed status first (has listing date in past OR has listing gain)
-                        if listing_gain or (listing_date and listing_date <= datetime.now()):
-                            status = "listed"
-                        # Check for open status (has future listing date OR has subscription data)
-                        elif listing_date and listing_date > datetime.now():
-                            # IPO has a future listing date - it's currently open for subscription
-                            status = "open"
-                        elif (retail_sub > 0 or hni_sub > 0 or qib_sub > 0):
-                            # Has subscription data - it's open
-                            item_status = str(item.get('status', '')).lower()
-                            if any(term in item_status for term in ['open', 'ongoing', 'active', 'live', 'apply', 'bid']):
-                                status = "open"
-                        elif 'open' in str(item.get('status', '')).lower() or 'ongoing' in str(item.get('status', '')).lower():
-                            status = "open"
-
-                        # Override status if scraped from open IPO URLs
-                        if 'open' in category.lower() and status != "listed":
-                            status = "open"
-
-                        extracted_data.append({
-                            "ipo_name": name,
-                            "issue_size": float(size) if size else 0.0,
-                            "price_high": float(price) if price else 0.0,
-                            "gmp": float(gmp) if gmp else 0.0,
-                            "listing_gain": float(listing_gain) if listing_gain else 0.0,
-                            "retail_sub": float(retail_sub) if retail_sub else 0.0,
-                            "hni_sub": float(hni_sub) if hni_sub else 0.0,
-                            "qib_sub": float(qib_sub) if qib_sub else 0.0,
-                            "best_category": best_category,
-                            "listing_date": listing_date,
-                            "status": status,
-                            "scraped_at": datetime.utcnow()
-                        })
-                except Exception as e:
-                    logger.debug(f"JSON parse skipped for {category}")
-
-            # 2. Table Fallback
-            if not extracted_data:
-                table = soup.find('table')
-                if table:
-                    rows = table.find_all('tr')
-                    if len(rows) > 1:
-                        headers = [h.text.strip().lower() for h in rows[0].find_all(['th', 'td'])]
-                        h_map = {
-                            'name': next((i for i, h in enumerate(headers) if 'company' in h or 'issuer' in h or 'ipo' in h), 0),
-                            'price': next((i for i, h in enumerate(headers) if 'price' in h), -1),
-                            'size': next((i for i, h in enumerate(headers) if 'size' in h), -1),
-                            'status': next((i for i, h in enumerate(headers) if 'status' in h), -1),
-                            'gmp': next((i for i, h in enumerate(headers) if 'gmp' in h or 'grey' in h), -1),
-                            'gain': next((i for i, h in enumerate(headers) if 'gain' in h or 'listing' in h), -1),
-                            'retail': next((i for i, h in enumerate(headers) if 'retail' in h), -1),
-                            'hni': next((i for i, h in enumerate(headers) if 'hni' in h), -1),
-                            'qib': next((i for i, h in enumerate(headers) if 'qib' in h), -1),
-                            'category': next((i for i, h in enumerate(headers) if 'category' in h or 'best' in h), -1),
-                            'listing_date': next((i for i, h in enumerate(headers) if 'listing date' in h or 'date' in h), -1)
-                        }
-
-                        for row in rows[1:]:
-                            cols = row.find_all('td')
-                            if not cols or len(cols) < 2: continue
-                            try:
-                                name = cols[h_map['name']].text.strip().split('\n')[0]
-                                if not name: continue
-                                
-                                price_val = 0.0
-                                if h_map['price'] != -1:
-                                    p_txt = cols[h_map['price']].text.strip().split('-')[-1]
-                                    p_cln = ''.join(c for c in p_txt if c.isdigit() or c == '.')
-                                    if p_cln: price_val = float(p_cln)
-
-                                size_val = 0.0
-                                if h_map['size'] != -1:
-                                    s_txt = cols[h_map['size']].text.strip()
-                                    s_cln = ''.join(c for c in s_txt if c.isdigit() or c == '.')
-                                    if s_cln: size_val = float(s_cln)
-
-                                gmp_val = 0.0
-                                if h_map['gmp'] != -1:
-                                    g_txt = cols[h_map['gmp']].text.strip()
-                                    g_cln = ''.join(c for c in g_txt if c.isdigit() or c == '.' or c == '-')
-                                    if g_cln and g_cln != '-': gmp_val = float(g_cln)
-
-                                gain_val = 0.0
-                                if h_map['gain'] != -1:
-                                    gain_txt = cols[h_map['gain']].text.strip().replace('%', '')
-                                    gain_cln = ''.join(c for c in gain_txt if c.isdigit() or c == '.' or c == '-')
-                                    if gain_cln and gain_cln != '-': gain_val = float(gain_cln)
-
-                                retail_val = 0.0
-                                if h_map['retail'] != -1:
-                                    r_txt = cols[h_map['retail']].text.strip()
-                                    r_cln = ''.join(c for c in r_txt if c.isdigit() or c == '.')
-                                    if r_cln: retail_val = float(r_cln)
-
-                                hni_val = 0.0
-                                if h_map['hni'] != -1:
-                                    h_txt = cols[h_map['hni']].text.strip()
-                                    h_cln = ''.join(c for c in h_txt if c.isdigit() or c == '.')
-                                    if h_cln: hni_val = float(h_cln)
-
-                                qib_val = 0.0
-                                if h_map['qib'] != -1:
-                                    q_txt = cols[h_map['qib']].text.strip()
-                                    q_cln = ''.join(c for c in q_txt if c.isdigit() or c == '.')
-                                    if q_cln: qib_val = float(q_cln)
-
-                                category_val = ""
-                                if h_map['category'] != -1:
-                                    category_val = cols[h_map['category']].text.strip()
-
-                                listing_date_str = ""
-                                if h_map.get('listing_date', -1) != -1:
-                                    listing_date_str = cols[h_map['listing_date']].text.strip()
-
-                                # Parse listing_date if available
-                                listing_date = None
-                                if listing_date_str:
-                                    try:
-                                        listing_date = datetime.strptime(listing_date_str, '%b %d, %Y')
-                                    except:
-                                        listing_date = None
-
-                                # Determine status based on scraped data signals
-                                status = "upcoming"  # default
-
-                                # Check for listed status first (has listing date in past OR has listing gain)
-                                if gain_val > 0 or (listing_date and listing_date <= datetime.now()):
-                                    status = "listed"
-                                # Check for open status (has future listing date OR has subscription data)
-                                elif listing_date and listing_date > datetime.now():
-                                    # IPO has a future listing date - it's currently open for subscription
-                                    status = "open"
-                                elif (retail_val > 0 or hni_val > 0 or qib_val > 0):
-                                    # Has subscription data - it's open
-                                    status_idx = h_map.get('status', -1)
-                                    if status_idx != -1:
-                                        item_status = cols[status_idx].text.strip().lower()
-                                        if any(term in item_status for term in ['open', 'ongoing', 'active', 'live', 'apply', 'bid']):
-                                            status = "open"
-                                    else:
-                                        status = "open"
-                                elif h_map['status'] != -1 and "open" in cols[h_map['status']].text.strip().lower():
-                                    status = "open"
-
-                                # Override status if scraped from open IPO URLs
-                                if 'open' in category.lower() and status != "listed":
-                                    status = "open"
-
-                                extracted_data.append({
-                                    "ipo_name": name,
-                                    "issue_size": size_val,
-                                    "price_high": price_val,
-                                    "gmp": gmp_val,
-                                    "listing_gain": gain_val,
-                                    "retail_sub": retail_val,
-                                    "hni_sub": hni_val,
-                                    "qib_sub": qib_val,
-                                    "best_category": category_val,
-                                    "listing_date": listing_date,
-                                    "status": status,
-                                    "scraped_at": datetime.utcnow()
-                                })
-                            except: continue
-
-            if extracted_data:
-                added, updated = save_to_db(extracted_data)
-                total_new += added
-                total_updated += updated
-                all_data.extend(extracted_data)
-            
-            time.sleep(random.uniform(1, 2))
-            
+            added, updated = save_to_db([row for page in pages for row in page.rows], raise_errors=True)
         except Exception as e:
-            logger.error(f"Error scraping {category}: {e}")
-    
-    driver.quit()
-    
+            for page in pages:
+                logger.error(f"Error scraping {page.category}: {e}")
+                failed_categories.append(page.category)
+            return
+        total_new += added
+        total_updated += updated
+        for page in pages:
+            fetch_cache.record(page.url, etag=page.etag, last_modified=page.last_modified, body=page.body,
+                               payload=page.payload, row_count=len(page.rows), parsed=True, changed=True)
+            changed_categories.append(page.category)
+
+    def fetched(category, url, html, etag=None, last_modified=None):
+        # Identical HTML to a recent parse needs no parsing at all
+        b_hash = fetch_cache.body_hash(html)
+        entry = cache.get(url)
+        if url in fresh and entry.body_hash == b_hash:
+            page = Page(category, url, etag=etag, last_modified=last_modified, body=b_hash, outcome="unchanged")
+            # Normally stored by an earlier cycle already, then this is only a lookup
+            page.archived = archive_page(page_archive, html, b_hash)
+            return page
+        # Changed pages are archived by the parser process, off the fetch threads
+        return Page(category, url, parsers[category], html, etag, last_modified, b_hash, archive=page_archive)
+
+    parse_workers = scraper_cfg.get('parse_workers')
+    pipeline = Pipeline(
+        parse_fetched, settle, write_batch,
+        queue_size=scraper_cfg.get('queue_size', 16),
+        parse_workers=default_parse_workers() if parse_workers is None else parse_workers,
+        batch_rows=scraper_cfg.get('batch_rows', 500),
+        batch_ms=scraper_cfg.get('batch_ms', 250),
+    )
+
+    handed = set()
+
+    def hand_over(page, elapsed=0.0):
+        handed.add(page.category)
+        pipeline.feed(page, elapsed)
+
+    # 1. Static pages, fetched concurrently over pooled sessions
+    def fetch_static():
+        fetcher = ConcurrentFetcher(
+            max_workers=scraper_cfg.get('max_workers', 8),
+            max_per_host=scraper_cfg.get('max_per_host', 4),
+            timeout=scraper_cfg.get('request_timeout', 20),
+        )
+        conditional = {url: fetch_cache.request_headers(cache[url]) for url in fresh}
+        for result in fetcher.fetch_all(static_urls, headers=conditional):
+            if result.not_modified:
+                page = Page(result.category, result.url, outcome="not_modified")
+                entry = cache.get(result.url)
+                if page_archive is not None and entry is not None and page_archive.exists(entry.body_hash):
+                    # A 304 is another fetch of the page we already hold
+                    page.body, page.archived = entry.body_hash, True
+            elif not result.ok:
+                page = Page(result.category, result.url, outcome="failed", error=result.error)
+            else:
+                logger.info(f"Fetched '{result.category}' in {result.elapsed:.2f}s")
+                page = fetched(result.category, result.url, result.html, result.etag, result.last_modified)
+            hand_over(page, result.elapsed)
+
+    # 2. JavaScript-rendered pages fall back to Selenium, rendered in parallel on warm
+    # drivers while the static fetches run
+    def fetch_js():
+        nonlocal driver_pool
+        owns_pool = driver_pool is None
+        if owns_pool:
+            driver_pool = DriverPool.from_config(config)
+        try:
+            start = time.perf_counter()
+            for category, html, error in driver_pool.render_all(js_urls):
+                elapsed = time.perf_counter() - start
+                if error is not None:
+                    page = Page(category, js_urls[category], outcome="failed", error=error)
+                else:
+                    page = fetched(category, js_urls[category], html)
+                hand_over(page, elapsed)
+                start = time.perf_counter()
+        finally:
+            if owns_pool:
+                driver_pool.close()
+
+    def produce(fetch, sources):
+        try:
+            fetch()
+        except Exception as e:
+            # Whatever was not handed over yet counts as failed
+            logger.error(f"Fetching stopped early: {e}")
+            for category, url in sources.items():
+                if category not in handed:
+                    hand_over(Page(category, url, outcome="failed", error=e))
+
+    producers = [threading.Thread(target=produce, args=args, name=f"produce-{name}", daemon=True)
+                 for name, args in (("static", (fetch_static, static_urls)), ("js", (fetch_js, js_urls)))
+                 if args[1]]
+    with pipeline:
+        for thread in producers:
+            thread.start()
+        for thread in producers:
+            thread.join()
+    stages = pipeline.stats()
+    log_stats(stages, pipeline.elapsed)
+
+    # Let queued cache/state writes land before the next cycle reads them
+    db_writer.flush()
+
     # Write all IPOs from DB to text file
-    text_file_path = os.path.join(os.path.dirname(__file__), '..', '..', 'ipo_data.txt')
     db: Session = SessionLocal()
     try:
         result = db.execute(text("SELECT ipo_name, issue_size, price_high, status, scraped_at FROM ipo_master ORDER BY scraped_at DESC")).fetchall()
-        with open(text_file_path, 'w') as f:
+        with open(TEXT_EXPORT_PATH, 'w') as f:
             for row in result:
                 f.write(f"IPO Name: {row[0]}, Issue Size: {row[1]}, Price: {row[2]}, Status: {row[3]}, Scraped At: {row[4]}\n")
     finally:
         db.close()
     
-    logger.info(f"Full scrape cycle complete. Added: {total_new}, Updated: {total_updated}")
+    logger.info(f"Full scrape cycle complete in {time.perf_counter() - cycle_start:.2f}s. Added: {total_new}, Updated: {total_updated}, Unchanged pages: {unchanged}, Newly frozen: {len(frozen_categories)}, Zero-row pages: {len(empty_categories)}")
+    if empty_categories:
+        # Fetch time spent on pages whose data we never extract; see `python -m ipo_ai.scraper.parsers`
+        logger.warning(f"Pages with zero extracted rows: {', '.join(sorted(empty_categories))}")
+    return {
+        "added": total_new,
+        "updated": total_updated,
+        "unchanged_pages": unchanged,
+        "changed": changed_categories,
+        "failed": failed_categories,
+        "frozen": frozen_categories,
+        "empty": empty_categories,
+        "stages": stages,
+    }
+
+MONITORED_FIELDS = ['price_high', 'issue_size', 'gmp', 'status', 'listing_gain', 'retail_sub', 'hni_sub', 'qib_sub', 'best_category', 'listing_date']
+
+# SQLite caps bound parameters per statement; keep IN (...) lookups well below it
+LOOKUP_CHUNK = 500
+
+def _fingerprint_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def row_fingerprint(values):
+    """Hash of the monitored fields, stored per row so unchanged rows need no field-by-field compare."""
+    payload = [_fingerprint_value(values.get(field)) for field in MONITORED_FIELDS]
+    return hashlib.sha1(json.dumps(payload, default=str).encode('utf-8')).hexdigest()
 
 def has_changes(existing, scraped_data):
     """Check if any of the monitored fields have changed."""
-    fields_to_check = ['price_high', 'issue_size', 'gmp', 'status', 'listing_gain', 'retail_sub', 'hni_sub', 'qib_sub', 'best_category', 'listing_date']
-    for field in fields_to_check:
+    for field in MONITORED_FIELDS:
         existing_val = getattr(existing, field)
         new_val = scraped_data.get(field)
         if existing_val != new_val:
             return True
     return False
 
-def save_to_db(data):
+def save_to_db(data, raise_errors=False):
+    """
+    Bulk upsert scraped rows keyed on ipo_name: one IN (...) lookup per chunk, rows
+    whose stored fingerprint matches are skipped, and inserts/updates go out as
+    executemany batches instead of one ORM round trip per row.
+    Runs on the single DB writer thread.
+    """
     if not data: return 0, 0
+    return db_writer.run(_save_to_db, data, raise_errors)
+
+def _save_to_db(data, raise_errors):
+    # Last occurrence wins if a page lists the same IPO twice (ipo_name is unique)
+    items = {}
+    for item in data:
+        items[item['ipo_name']] = item
+    names = list(items)
+
     db: Session = SessionLocal()
     new_count = 0
     update_count = 0
     try:
-        for item in data:
-            existing = db.query(IPOMaster).filter(IPOMaster.ipo_name == item['ipo_name']).first()
-            if existing:
-                # Check if any monitored fields changed
-                if has_changes(existing, item):
-                    changed_fields = []
-                    old_status = existing.status
-                    # Update only changed fields
-                    for field in ['price_high', 'issue_size', 'gmp', 'status', 'listing_gain', 'retail_sub', 'hni_sub', 'qib_sub', 'best_category', 'listing_date']:
-                        new_val = item.get(field)
-                        if getattr(existing, field) != new_val:
-                            setattr(existing, field, new_val)
-                            changed_fields.append(field)
-                    
-                    # Update scraped_at only when fields actually changed
-                    existing.scraped_at = datetime.utcnow()
-                    update_count += 1
-                    
-                    # Special logging for status changes
-                    new_status = item.get('status')
-                    if 'status' in changed_fields and old_status != new_status:
-                        logger.info(f"STATUS CHANGED: {item['ipo_name']} {old_status} → {new_status}")
-                    else:
-                        logger.info(f"UPDATED: {item['ipo_name']} | fields: {', '.join(changed_fields)}")
-                else:
-                    logger.info(f"NO CHANGE: {item['ipo_name']}")
-            else:
-                new_ipo = IPOMaster(**item)
-                db.add(new_ipo)
+        columns = [IPOMaster.id, IPOMaster.ipo_name, IPOMaster.fingerprint] + [getattr(IPOMaster, f) for f in MONITORED_FIELDS]
+        existing = {}
+        for i in range(0, len(names), LOOKUP_CHUNK):
+            chunk = names[i:i + LOOKUP_CHUNK]
+            for row in db.execute(select(*columns).where(IPOMaster.ipo_name.in_(chunk))):
+                existing[row.ipo_name] = row._mapping
+
+        inserts = []
+        updates = []
+        snapshots = []
+        events = []
+        now = datetime.utcnow()
+        ts = int(time.time())
+        for name, item in items.items():
+            fingerprint = row_fingerprint(item)
+            current = existing.get(name)
+            if current is None:
+                inserts.append(dict(item, fingerprint=fingerprint))
                 new_count += 1
-                logger.info(f"INSERTED: {item['ipo_name']}")
-        
+                logger.info(f"INSERTED: {name}")
+                continue
+
+            stored = current['fingerprint'] or row_fingerprint(current)
+            if stored == fingerprint:
+                if current['fingerprint'] is None:
+                    # Backfill fingerprints for rows written before the column existed
+                    updates.append({"id": current['id'], "fingerprint": fingerprint})
+                logger.debug(f"NO CHANGE: {name}")
+                continue
+
+            changed_fields = [f for f in MONITORED_FIELDS if current[f] != item.get(f)]
+            changes = {f: item.get(f) for f in changed_fields}
+            # Update scraped_at only when fields actually changed
+            changes.update(id=current['id'], fingerprint=fingerprint, scraped_at=now)
+            updates.append(changes)
+            update_count += 1
+            if any(f in SNAPSHOT_FIELDS for f in changed_fields):
+                snapshots.append(snapshot_row(current['id'], item, ts))
+
+            # Special logging for status changes
+            old_status, new_status = current['status'], item.get('status')
+            field_changes = {f: (current[f], item.get(f)) for f in changed_fields}
+            if 'status' in changed_fields and old_status != new_status:
+                logger.info(f"STATUS CHANGED: {name} {old_status} → {new_status}")
+                events.append(ChangeEvent("status", current['id'], name, field_changes, ts))
+            else:
+                logger.info(f"UPDATED: {name} | fields: {', '.join(changed_fields)}")
+                events.append(ChangeEvent("update", current['id'], name, field_changes, ts))
+
+        if inserts:
+            for row in db.execute(insert(IPOMaster).returning(IPOMaster.id, IPOMaster.ipo_name), inserts):
+                item = items[row.ipo_name]
+                snapshots.append(snapshot_row(row.id, item, ts))
+                events.append(ChangeEvent("insert", row.id, row.ipo_name,
+                                          {f: (None, item.get(f)) for f in MONITORED_FIELDS}, ts))
+        if updates:
+            db.execute(update(IPOMaster), updates)
+        # Append-only history of GMP / subscription / status, only for rows that moved
+        append_snapshots(db, snapshots)
         db.commit()
+        if events:
+            data_version.bump()
+        # Subscribers (monitor, log sink, API push) only ever see committed changes
+        change_bus.publish(events)
     except Exception as e:
         logger.error(f"DB Update Error: {e}")
         db.rollback()
+        new_count = update_count = 0
+        if raise_errors:
+            raise
     finally:
         db.close()
     return new_count, update_count
@@ -4,11 +4,11 @@ from sqlalchemy.orm import Session
 from ..db.database import SessionLocal, engine, Base
 from ..db.models import IPOMaster
 from datetime import datetime
+from ..utils.normalize import to_number
 
 # Helper to clean currency string
 def clean_currency(val):
-    if not val or val == "N/A": return 0.0
-    return float(str(val).replace(',', '').replace('%', '').replace('Cr', '').strip())
+    return to_number(val)
 
 def load_historical_data():
     print("Historical data loading disabled - only real scraped data allowed.")
@@ -0,0 +1,340 @@
+import argparse
+import sys
+from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from ..utils.logger import setup_logger
+from ..utils.normalize import DATE_FORMAT, to_number, clean_column, clean_dates, parse_date, table_frame
+from .extract import find_next_data, read_table, read_tables
+
+logger = setup_logger("parsers")
+
+# Site parsers, keyed by the `parser:` name a site is given in config.yaml.
+# A parser takes (category, html) and returns the list of IPO records on the page.
+PARSERS = {}
+DEFAULT_PARSER = "generic"
+
+def register(name):
+    def decorator(fn):
+        PARSERS[name] = fn
+        return fn
+    return decorator
+
+_unknown_warned = set()
+
+def get_parser(name):
+    """(name, parser) for a configured name; unknown or missing names use the generic parser."""
+    name = name or DEFAULT_PARSER
+    if name not in PARSERS:
+        if name not in _unknown_warned:
+            _unknown_warned.add(name)
+            logger.warning(f"No parser registered as '{name}', using '{DEFAULT_PARSER}'")
+        name = DEFAULT_PARSER
+    return name, PARSERS[name]
+
+OPEN_TERMS = ['open', 'ongoing', 'active', 'live', 'apply', 'bid']
+
+# Header matching rules per site: (key, header must contain one of, ... and none of, default index).
+# The first header that matches wins, as in the original table heuristic.
+COLUMN_RULES = {
+    "generic": (
+        ('name', ('company', 'issuer', 'ipo'), (), 0),
+        ('price', ('price',), (), -1),
+        ('size', ('size',), (), -1),
+        ('status', ('status',), (), -1),
+        ('gmp', ('gmp', 'grey'), (), -1),
+        ('gain', ('gain', 'listing'), (), -1),
+        ('retail', ('retail',), (), -1),
+        ('hni', ('hni',), (), -1),
+        ('qib', ('qib',), (), -1),
+        ('category', ('category', 'best'), (), -1),
+        ('listing_date', ('listing date', 'date'), (), -1),
+    ),
+    # Chittorgarh report tables put "Listing Date" before any gain column
+    "chittorgarh": (
+        ('name', ('company', 'issuer', 'ipo'), ('date', 'size', 'price'), 0),
+        ('price', ('price',), (), -1),
+        ('size', ('size',), (), -1),
+        ('status', ('status',), (), -1),
+        ('gmp', ('gmp', 'grey'), (), -1),
+        ('gain', ('gain',), ('date',), -1),
+        ('retail', ('retail', 'rii'), (), -1),
+        ('hni', ('hni', 'nii'), (), -1),
+        ('qib', ('qib',), (), -1),
+        ('category', ('category', 'best'), (), -1),
+        ('listing_date', ('listing date', 'listing day'), (), -1),
+    ),
+    # IPO Watch: "Company Name | IPO Date | Listing Date | Price Band | Issue Size | GMP ..."
+    "ipowatch": (
+        ('name', ('company', 'ipo name', 'name', 'ipo'), ('date', 'size', 'price', 'gmp'), 0),
+        ('price', ('price',), (), -1),
+        ('size', ('size',), (), -1),
+        ('status', ('status',), (), -1),
+        ('gmp', ('gmp', 'premium'), (), -1),
+        ('gain', ('gain',), ('expected', 'est'), -1),
+        ('retail', ('retail', 'rii'), (), -1),
+        ('hni', ('hni', 'nii'), (), -1),
+        ('qib', ('qib',), (), -1),
+        ('category', ('category',), (), -1),
+        ('listing_date', ('listing',), ('gain', 'price'), -1),
+    ),
+    # Investorgain GMP table: "IPO | GMP | Price | Est Listing | IPO Size | Lot | Open | Close | BoA Dt | Listing"
+    "investorgain": (
+        ('name', ('ipo', 'company', 'name'), ('size', 'price', 'gmp', 'date'), 0),
+        ('price', ('price',), (), -1),
+        ('size', ('size',), (), -1),
+        ('status', ('status',), (), -1),
+        ('gmp', ('gmp',), ('updated',), -1),
+        ('gain', ('gain',), ('est',), -1),
+        ('retail', ('retail', 'rii'), (), -1),
+        ('hni', ('hni', 'nii'), (), -1),
+        ('qib', ('qib',), (), -1),
+        ('category', ('category',), (), -1),
+        ('listing_date', ('listing',), ('est', 'gain'), -1),
+    ),
+}
+
+@lru_cache(maxsize=256)
+def header_map(rules, headers):
+    """
+    {key: column index} for a table header under a site's rules. Compiled once per
+    (rules, header signature): every page of a site shares a handful of layouts.
+    """
+    mapping = {}
+    for key, include, exclude, default in COLUMN_RULES[rules]:
+        mapping[key] = next((i for i, h in enumerate(headers)
+                             if any(t in h for t in include) and not any(t in h for t in exclude)), default)
+    return MappingProxyType(mapping)
+
+# Table column -> (record field, normalize kind)
+NUMERIC_COLUMNS = {
+    'price': ('price_high', 'price'),
+    'size': ('issue_size', 'amount'),
+    'gmp': ('gmp', 'number'),
+    'gain': ('listing_gain', 'percent'),
+    'retail': ('retail_sub', 'multiple'),
+    'hni': ('hni_sub', 'multiple'),
+    'qib': ('qib_sub', 'multiple'),
+}
+
+REPORT_KEYS = ('reportData', 'reportInfo', 'reportItems')
+
+def parse_next_data(category, data, report_keys=REPORT_KEYS):
+    # Navigate the complex Next.js tree
+    result_data = data.get('props', {}).get('pageProps', {}).get('resultData', {})
+    report_data = next((result_data[k] for k in report_keys if result_data.get(k)), [])
+
+    extracted_data = []
+    now = datetime.now()
+    for item in report_data:
+        name = item.get('company_name') or item.get('issuer_company_name') or item.get('ipo_name')
+        if not name: continue
+
+        listing_gain = to_number(item.get('listing_gain'), 'percent')
+        retail_sub = to_number(item.get('retail_subscription') or item.get('retail_sub'), 'multiple')
+        hni_sub = to_number(item.get('hni_subscription') or item.get('hni_sub'), 'multiple')
+        qib_sub = to_number(item.get('qib_subscription') or item.get('qib_sub'), 'multiple')
+        listing_date = parse_date(item.get('listing_date'))
+        item_status = str(item.get('status', '')).lower()
+
+        # Determine status based on scraped data signals
+        status = "upcoming"  # default
+        # Check for listed status first (has listing date in past OR has listing gain)
+        if listing_gain or (listing_date and listing_date <= now):
+            status = "listed"
+        # Check for open status (has future listing date OR has subscription data)
+        elif listing_date and listing_date > now:
+            # IPO has a future listing date - it's currently open for subscription
+            status = "open"
+        elif (retail_sub > 0 or hni_sub > 0 or qib_sub > 0):
+            # Has subscription data - it's open
+            if any(term in item_status for term in OPEN_TERMS):
+                status = "open"
+        elif 'open' in item_status or 'ongoing' in item_status:
+            status = "open"
+
+        # Override status if scraped from open IPO URLs
+        if 'open' in category.lower() and status != "listed":
+            status = "open"
+
+        extracted_data.append({
+            "ipo_name": name,
+            "issue_size": to_number(item.get('total_issue_amount_rs_cr') or item.get('issue_size_cr') or item.get('size'), 'amount'),
+            "price_high": to_number(item.get('issue_price_rs') or item.get('issue_price') or item.get('price_high'), 'price'),
+            "gmp": to_number(item.get('gmp') or item.get('grey_market_premium')),
+            "listing_gain": listing_gain,
+            "retail_sub": retail_sub,
+            "hni_sub": hni_sub,
+            "qib_sub": qib_sub,
+            "best_category": item.get('best_category') or item.get('category') or "",
+            "listing_date": listing_date,
+            "status": status,
+            "scraped_at": datetime.utcnow()
+        })
+    return extracted_data
+
+def next_data_records(category, html, report_keys=REPORT_KEYS):
+    data = find_next_data(html)
+    if not data:
+        return []
+    try:
+        return parse_next_data(category, data, report_keys)
+    except Exception as e:
+        logger.warning(f"__NEXT_DATA__ of {category} could not be parsed: {e}")
+        return []
+
+def table_records(category, table, rules="generic", date_formats=DATE_FORMAT, clean_name=None, require=()):
+    """
+    Records from one (headers, rows) table: the cells go into a frame of raw
+    strings and each mapped column is cleaned with vectorized string ops.
+    Tables whose header maps none of the `require` keys are skipped.
+    """
+    if not table or not table[1]:
+        return []
+    headers, rows = table
+    h_map = header_map(rules, tuple(h.lower() for h in headers))
+    if require and all(h_map[key] == -1 for key in require):
+        return []
+    width = max(len(headers), max(len(r) for r in rows), 1)
+    frame = table_frame(headers + [''] * (width - len(headers)), [r for r in rows if len(r) >= 2])
+    if frame.empty:
+        return []
+    return frame_to_records(category, frame, h_map, date_formats, clean_name)
+
+def frame_to_records(category, frame, h_map, date_formats=DATE_FORMAT, clean_name=None):
+    """Clean a frame of raw cell strings (columns are header positions) into IPO records."""
+    def column(key):
+        idx = h_map.get(key, -1)
+        return frame[idx] if idx != -1 else pd.Series([None] * len(frame), index=frame.index, dtype=object)
+
+    names = column('name').fillna('').astype(str).str.split('\n').str[0].str.strip()
+    if clean_name is not None:
+        names = clean_name(names)
+    keep = (names != '').to_numpy()
+    frame, names = frame[keep], names[keep]
+    if frame.empty:
+        return []
+
+    values = {field: clean_column(column(key), kind).to_numpy() for key, (field, kind) in NUMERIC_COLUMNS.items()}
+    categories = column('category').fillna('').astype(str).str.strip().tolist()
+    listing_dates = clean_dates(column('listing_date'), date_formats)
+
+    # Determine status based on scraped data signals, same rules as parse_next_data
+    now = datetime.now()
+    has_date = np.array([d is not None for d in listing_dates])
+    past = np.array([d is not None and d <= now for d in listing_dates])
+    subscribed = (values['retail_sub'] > 0) | (values['hni_sub'] > 0) | (values['qib_sub'] > 0)
+    if h_map['status'] != -1:
+        status_text = column('status').fillna('').astype(str).str.strip().str.lower()
+        open_signal = status_text.str.contains('|'.join(OPEN_TERMS)).to_numpy()
+        says_open = status_text.str.contains('open').to_numpy()
+    else:
+        # Subscription numbers without a status column mean the issue is open
+        open_signal = np.ones(len(frame), dtype=bool)
+        says_open = np.zeros(len(frame), dtype=bool)
+    status = np.select(
+        [(values['listing_gain'] > 0) | past, has_date, subscribed, says_open],
+        ["listed", "open", np.where(open_signal, "open", "upcoming"), "open"],
+        default="upcoming",
+    )
+    # Override status if scraped from open IPO URLs
+    if 'open' in category.lower():
+        status = np.where(status == "listed", "listed", "open")
+
+    scraped_at = datetime.utcnow()
+    return [
+        {
+            "ipo_name": name,
+            "issue_size": float(values['issue_size'][i]),
+            "price_high": float(values['price_high'][i]),
+            "gmp": float(values['gmp'][i]),
+            "listing_gain": float(values['listing_gain'][i]),
+            "retail_sub": float(values['retail_sub'][i]),
+            "hni_sub": float(values['hni_sub'][i]),
+            "qib_sub": float(values['qib_sub'][i]),
+            "best_category": categories[i],
+            "listing_date": listing_dates[i],
+            "status": str(status[i]),
+            "scraped_at": scraped_at,
+        }
+        for i, name in enumerate(names.tolist())
+    ]
+
+def strip_ipo_suffix(names):
+    """'Acme Ltd IPO', 'Acme Ltd IPO BSE SME' -> 'Acme Ltd', so names line up with Chittorgarh's."""
+    return names.str.replace(r'\s+IPO\b.*$', '', regex=True).str.strip()
+
+@register("generic")
+def parse_generic(category, html):
+    """__NEXT_DATA__ first, the first table second (the original heuristic)."""
+    return next_data_records(category, html) or table_records(category, read_table(html))
+
+@register("chittorgarh")
+def parse_chittorgarh(category, html):
+    return (next_data_records(category, html, REPORT_KEYS + ('reportTableData',))
+            or table_records(category, read_table(html), "chittorgarh"))
+
+# WordPress posts: one table per board (mainboard / SME), dates spelled out in full
+IPOWATCH_DATES = ('%b %d, %Y', '%B %d, %Y', '%d %B %Y', '%d %b %Y')
+
+@register("ipowatch")
+def parse_ipowatch(category, html):
+    records = []
+    for table in read_tables(html):
+        records.extend(table_records(category, table, "ipowatch", IPOWATCH_DATES, strip_ipo_suffix,
+                                     require=('price', 'size', 'gmp', 'listing_date')))
+    return records
+
+INVESTORGAIN_DATES = ('%d-%b-%Y', '%d %b %Y', '%b %d, %Y')
+
+@register("investorgain")
+def parse_investorgain(category, html):
+    records = next_data_records(category, html, REPORT_KEYS + ('reportTableData',))
+    if records:
+        return records
+    for table in read_tables(html):
+        records.extend(table_records(category, table, "investorgain", INVESTORGAIN_DATES, strip_ipo_suffix,
+                                     require=('price', 'size', 'gmp')))
+    return records
+
+def zero_row_sources():
+    """Pages that were fetched and parsed but yielded no rows, from the fetch cache."""
+    from ..db.database import SessionLocal
+    from ..db.models import FetchCache
+
+    db = SessionLocal()
+    try:
+        entries = (db.query(FetchCache)
+                   .filter(FetchCache.parsed_at.isnot(None), FetchCache.row_count == 0)
+                   .order_by(FetchCache.url).all())
+        return [{"url": e.url, "checked_at": e.checked_at, "parsed_at": e.parsed_at} for e in entries]
+    finally:
+        db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show site parsers and the sources that yield no rows.")
+    parser.parse_args(argv)
+    from .ipo_scraper import load_config, build_source_urls, parser_for
+
+    config = load_config()
+    urls, _ = build_source_urls(config)
+    by_url = {}
+    for category, url in urls.items():
+        by_url.setdefault(url, []).append(category)
+    print(f"Registered parsers: {', '.join(sorted(PARSERS))}")
+    for site in config['sites']:
+        print(f"  {site['name']:<40} {get_parser(site.get('parser'))[0]}")
+    empty = zero_row_sources()
+    print(f"\n{len(empty)} sources parsed with zero rows:")
+    for entry in empty:
+        categories = by_url.get(entry["url"], [])
+        name = categories[0] if categories else "(no longer configured)"
+        print(f"  {name:<40} {parser_for(name, config) if categories else '-':<13} {entry['url']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
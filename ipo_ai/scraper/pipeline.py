@@ -0,0 +1,227 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger("pipeline")
+
+# A scrape cycle runs as three stages joined by bounded queues:
+#
+#   fetch (HTTP threads / Selenium drivers) -> parse (worker processes) -> write (one batching thread)
+#
+# A full queue blocks the stage feeding it, so a slow writer holds back the parsers,
+# which hold back the fetchers; at most queue_size pages wait between two stages
+# however many sources are configured.
+
+_DONE = object()
+
+class Page:
+    """One source as it moves through the pipeline; html is dropped once parsed."""
+    __slots__ = ("category", "url", "parser", "html", "etag", "last_modified", "body",
+                 "rows", "payload", "outcome", "error", "fetched_at", "archive", "archived")
+
+    def __init__(self, category, url, parser=None, html=None, etag=None, last_modified=None,
+                 body=None, outcome=None, error=None, archive=None):
+        self.category = category
+        self.url = url
+        self.parser = parser
+        self.html = html
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+        self.rows = None
+        self.payload = None
+        self.outcome = outcome  # None = needs parsing; "not_modified", "unchanged", "failed" skip the parse stage
+        self.error = error
+        self.fetched_at = datetime.utcnow()
+        self.archive = archive  # PageArchive to store the html in before parsing, if any
+        self.archived = False
+
+    def __repr__(self):
+        return f"<Page {self.category} ({self.outcome or 'pending'})>"
+
+class StageStats:
+    """Items through one stage, thread-seconds spent working and blocked on the next stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.rows = 0
+        self.batches = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items=0, rows=0, batches=0, busy=0.0, blocked=0.0):
+        with self._lock:
+            self.items += items
+            self.rows += rows
+            self.batches += batches
+            self.busy += busy
+            self.blocked += blocked
+
+    def as_dict(self, elapsed):
+        elapsed = max(elapsed, 1e-9)
+        stats = {"items": self.items, "busy_s": round(self.busy, 3), "blocked_s": round(self.blocked, 3),
+                 "items_per_s": round(self.items / elapsed, 2)}
+        if self.name == "write":
+            stats.update(rows=self.rows, batches=self.batches, rows_per_s=round(self.rows / elapsed, 2))
+        return stats
+
+def default_parse_workers():
+    """One parser process per spare core (max 4); 0 parses on the pipeline threads."""
+    return max(0, min(4, (os.cpu_count() or 1) - 1))
+
+# Parser processes are spawned (the scraper process is full of threads, which fork
+# does not survive safely) and kept warm across cycles, so imports are paid once.
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def parse_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+def _discard_pool(broken):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+class Pipeline:
+    """
+    Bounded fetch -> parse -> write pipeline for one scrape cycle.
+
+    Producers hand fetched pages to feed(). Pages still to be parsed go through
+    `parse(page) -> page` (a picklable module-level function when parse_workers > 0),
+    on parse_workers processes, or on one pipeline thread when it is 0. Every page
+    then reaches the writer thread: `settle(page)` decides what to do with it and
+    returns True to queue its rows, and `write(pages)` receives the queued pages
+    once batch_rows rows have piled up or the oldest has waited batch_ms.
+    settle() and write() only ever run on the writer thread.
+    """
+
+    def __init__(self, parse, settle, write, queue_size=16, parse_workers=0, batch_rows=500, batch_ms=250):
+        self.parse = parse
+        self.settle = settle
+        self.write = write
+        self.parse_workers = parse_workers
+        self.batch_rows = batch_rows
+        self.batch_s = batch_ms / 1000
+        self._parse_q = queue.Queue(maxsize=queue_size)
+        self._write_q = queue.Queue(maxsize=queue_size)
+        self.stages = {name: StageStats(name) for name in ("fetch", "parse", "write")}
+        self._threads = []
+        self._started = None
+        self.elapsed = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        pool = parse_pool(self.parse_workers) if self.parse_workers > 0 else None
+        for i in range(max(1, self.parse_workers)):
+            self._threads.append(threading.Thread(target=self._parse_loop, args=(pool,),
+                                                  name=f"parse-{i}", daemon=True))
+        self._writer = threading.Thread(target=self._write_loop, name="batch-writer", daemon=True)
+        for thread in self._threads + [self._writer]:
+            thread.start()
+        return self
+
+    def feed(self, page, fetch_s=0.0):
+        """Hand over a fetched page; blocks while the next stage is full (backpressure)."""
+        start = time.perf_counter()
+        (self._parse_q if page.outcome is None else self._write_q).put(page)
+        self.stages["fetch"].add(items=1, busy=fetch_s, blocked=time.perf_counter() - start)
+
+    def close(self):
+        """Drain every stage; returns {stage: throughput stats} for the cycle."""
+        for _ in self._threads:
+            self._parse_q.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+        self._write_q.put(_DONE)
+        self._writer.join()
+        self.elapsed = time.perf_counter() - self._started
+        return self.stats()
+
+    def stats(self):
+        return {name: stage.as_dict(self.elapsed) for name, stage in self.stages.items()}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _parse_loop(self, pool):
+        stats = self.stages["parse"]
+        while True:
+            page = self._parse_q.get()
+            if page is _DONE:
+                return
+            start = time.perf_counter()
+            try:
+                page = pool.submit(self.parse, page).result() if pool is not None else self.parse(page)
+            except BrokenProcessPool as e:
+                _discard_pool(pool)
+                pool = parse_pool(self.parse_workers)
+                page.html, page.outcome, page.error = None, "failed", e
+            except Exception as e:
+                page.html, page.outcome, page.error = None, "failed", e
+            busy = time.perf_counter() - start
+            self._write_q.put(page)
+            stats.add(items=1, busy=busy, blocked=time.perf_counter() - start - busy)
+
+    def _write_loop(self):
+        stats = self.stages["write"]
+        pending, pending_rows, deadline = [], 0, None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                page = self._write_q.get(timeout=timeout)
+            except queue.Empty:
+                page = None
+            if page is not None and page is not _DONE:
+                start = time.perf_counter()
+                try:
+                    if self.settle(page):
+                        pending.append(page)
+                        pending_rows += len(page.rows)
+                        if deadline is None:
+                            deadline = time.monotonic() + self.batch_s
+                except Exception as e:
+                    logger.error(f"Could not settle {page.category}: {e}")
+                stats.add(items=1, busy=time.perf_counter() - start)
+            # A steady trickle of pages never times the get() out, so the deadline is checked here too
+            if pending and (page is None or page is _DONE or pending_rows >= self.batch_rows
+                            or time.monotonic() >= deadline):
+                start = time.perf_counter()
+                try:
+                    self.write(pending)
+                except Exception as e:
+                    logger.error(f"Batch write of {len(pending)} pages failed: {e}")
+                stats.add(rows=pending_rows, batches=1, busy=time.perf_counter() - start)
+                pending, pending_rows, deadline = [], 0, None
+            if page is _DONE:
+                return
+
+def log_stats(stages, elapsed):
+    parts = []
+    for name, s in stages.items():
+        line = f"{name} {s['items']} pages ({s['items_per_s']:.1f}/s, busy {s['busy_s']:.2f}s, blocked {s['blocked_s']:.2f}s)"
+        if name == "write":
+            line += f", {s['rows']} rows in {s['batches']} batches ({s['rows_per_s']:.1f} rows/s)"
+        parts.append(line)
+    logger.info(f"Pipeline {elapsed:.2f}s: " + "; ".join(parts))
@@ -0,0 +1,231 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+
+from ..utils.logger import setup_logger
+from .ipo_scraper import build_source_urls, site_for_category
+from .crawl_state import category_year, frozen_urls
+
+logger = setup_logger("scheduler")
+
+DEFAULT_TIERS = {
+    "open": {"interval": 60, "off_hours_interval": 900},
+    "current": {"interval": 900},
+    "archive": {"interval": 86400},
+}
+
+def source_tier(category, now=None):
+    """archive: closed past years, open: live subscription pages, current: everything else."""
+    year = category_year(category)
+    if year is not None and year < (now or datetime.now()).year:
+        return "archive"
+    if 'open' in category.lower():
+        return "open"
+    return "current"
+
+class Source:
+    def __init__(self, category, url, tier, interval, off_hours_interval=None, needs_js=False):
+        self.category = category
+        self.url = url
+        self.tier = tier
+        self.base_interval = interval
+        self.off_hours_interval = off_hours_interval
+        self.needs_js = needs_js
+        self.interval = interval
+        self.next_due = 0.0
+        self.checks = 0
+        self.changes = 0
+        self.change_rate = 1.0  # EWMA of "payload changed" per check
+        self.last_checked = None
+        self.last_changed = None
+
+    def __repr__(self):
+        return f"<Source {self.category} ({self.tier}, every {self.interval:.0f}s)>"
+
+class SourceScheduler:
+    """
+    Priority queue of sources keyed by next-due time. Each source has its own base
+    interval from its tier in config.yaml; sources that keep coming back unchanged
+    are backed off geometrically (up to max_backoff x base) and snap back to the
+    base interval as soon as a change is observed.
+    """
+
+    def __init__(self, sources, backoff_factor=2.0, max_backoff=8, market_hours=None):
+        self.sources = {s.category: s for s in sources}
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.market_hours = market_hours or {}
+        self._heap = []
+        self._seq = 0
+        self._lock = threading.Lock()
+        now = time.time()
+        for source in sources:
+            source.next_due = now
+            self._push(source)
+
+    @staticmethod
+    def build_sources(config, now=None):
+        """Sources for today's expanded URL list, minus frozen pages, each in its current tier."""
+        schedule_cfg = config.get('schedule', {})
+        tiers = {name: dict(cfg) for name, cfg in DEFAULT_TIERS.items()}
+        for name, cfg in (schedule_cfg.get('tiers') or {}).items():
+            tiers.setdefault(name, {}).update(cfg or {})
+        urls, js_categories = build_source_urls(config)
+        frozen = frozen_urls()
+
+        sources = []
+        for category, url in urls.items():
+            if url in frozen:
+                continue
+            site = site_for_category(config, category)
+            tier = site.get('tier') or source_tier(category, now)
+            tier_cfg = tiers.get(tier, tiers["current"])
+            sources.append(Source(
+                category, url, tier,
+                interval=site.get('interval', tier_cfg['interval']),
+                off_hours_interval=tier_cfg.get('off_hours_interval'),
+                needs_js=category in js_categories,
+            ))
+        return sources
+
+    @classmethod
+    def from_config(cls, config):
+        schedule_cfg = config.get('schedule', {})
+        return cls(
+            cls.build_sources(config),
+            backoff_factor=schedule_cfg.get('backoff_factor', 2.0),
+            max_backoff=schedule_cfg.get('max_backoff', 8),
+            market_hours=schedule_cfg.get('market_hours'),
+        )
+
+    def _push(self, source):
+        self._seq += 1
+        heapq.heappush(self._heap, (source.next_due, self._seq, source.category))
+
+    def in_market_hours(self, now=None):
+        """Market hours are configured in exchange local time (IST by default)."""
+        if not self.market_hours:
+            return True
+        offset = timedelta(minutes=self.market_hours.get('utc_offset_minutes', 330))
+        local = datetime.utcfromtimestamp(now or time.time()) + offset
+        if local.weekday() not in self.market_hours.get('days', [0, 1, 2, 3, 4]):
+            return False
+        start = self.market_hours.get('start', '09:15')
+        end = self.market_hours.get('end', '15:30')
+        return start <= local.strftime('%H:%M') < end
+
+    def _effective_interval(self, source, now):
+        interval = source.interval
+        if source.off_hours_interval and not self.in_market_hours(now):
+            interval = max(interval, source.off_hours_interval)
+        return interval
+
+    def pop_due(self, now=None):
+        """Remove and return every source whose next-due time has passed."""
+        now = now or time.time()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, category = heapq.heappop(self._heap)
+                if category in self.sources:
+                    due.append(self.sources[category])
+        return due
+
+    def refresh(self, config, now=None):
+        """
+        Merge in the sources config.yaml expands to now: a new year's pages are added,
+        a year that has closed moves to the archive tier, and pages that were frozen
+        (or unfrozen again) leave (or rejoin) the schedule. Sources that are unchanged
+        keep their backoff and statistics. Returns (added, removed, retiered).
+        """
+        wanted = {s.category: s for s in self.build_sources(config, now and datetime.fromtimestamp(now))}
+        now = now or time.time()
+        added, removed, retiered = [], [], []
+        with self._lock:
+            for category in list(self.sources):
+                if category not in wanted:
+                    del self.sources[category]
+                    removed.append(category)
+            for category, fresh in wanted.items():
+                source = self.sources.get(category)
+                if source is None:
+                    fresh.next_due = now
+                    self.sources[category] = fresh
+                    self._push(fresh)
+                    added.append(category)
+                elif (source.url, source.tier, source.base_interval, source.off_hours_interval, source.needs_js) != \
+                        (fresh.url, fresh.tier, fresh.base_interval, fresh.off_hours_interval, fresh.needs_js):
+                    source.url, source.tier, source.needs_js = fresh.url, fresh.tier, fresh.needs_js
+                    source.base_interval, source.off_hours_interval = fresh.base_interval, fresh.off_hours_interval
+                    source.interval = source.base_interval
+                    retiered.append(category)
+            if removed or retiered:
+                # Re-key queued entries; a source checked out by pop_due is re-queued by record()
+                queued = {category for _, _, category in self._heap if category in self.sources}
+                self._heap = []
+                for category in queued:
+                    source = self.sources[category]
+                    if category in retiered:
+                        source.next_due = min(source.next_due, now + source.interval)
+                    self._push(source)
+        if added or removed or retiered:
+            logger.info(f"Schedule refreshed: {len(added)} added, {len(removed)} removed, "
+                        f"{len(retiered)} re-tiered ({len(self.sources)} sources)")
+        return added, removed, retiered
+
+    def remove(self, source):
+        """Stop scheduling a source (e.g. once its closed year has been frozen)."""
+        with self._lock:
+            self.sources.pop(source.category, None)
+            self._heap = [item for item in self._heap if item[2] != source.category]
+            heapq.heapify(self._heap)
+
+    def record(self, source, changed, failed=False, now=None):
+        """Re-queue a source after a check, adapting its interval to what we observed."""
+        now = now or time.time()
+        if failed:
+            # Don't read anything into a failed fetch; retry at the base interval
+            source.interval = source.base_interval
+        else:
+            source.checks += 1
+            source.last_checked = now
+            source.change_rate = 0.8 * source.change_rate + 0.2 * (1.0 if changed else 0.0)
+            if changed:
+                source.changes += 1
+                source.last_changed = now
+                source.interval = source.base_interval
+            else:
+                source.interval = min(source.interval * self.backoff_factor,
+                                      source.base_interval * self.max_backoff)
+        source.next_due = now + self._effective_interval(source, now)
+        with self._lock:
+            self._push(source)
+
+    def seconds_until_next(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - now)
+
+    def stats(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            queue_depth = sum(1 for due, _, _ in self._heap if due <= now)
+        return {
+            "sources": len(self.sources),
+            "queue_depth": queue_depth,
+            "in_market_hours": self.in_market_hours(now),
+            "next_due": sorted(
+                ({
+                    "category": s.category,
+                    "tier": s.tier,
+                    "interval_s": round(s.interval),
+                    "due_in_s": round(s.next_due - now, 1),
+                    "change_rate": round(s.change_rate, 3),
+                    "checks": s.checks,
+                } for s in self.sources.values()),
+                key=lambda item: item["due_in_s"],
+            ),
+        }
@@ -1,33 +1,53 @@
+import hashlib
 import pandas as pd
-from sqlalchemy import create_engine
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.impute import SimpleImputer
-import joblib
 import os
-from datetime import datetime
-from ..db.database import DATABASE_URL
+from ..db.database import engine
 from ..utils.logger import setup_logger
 
 logger = setup_logger("training")
 
 MODELS_DIR = "models"
+FEATURE_COLS = ['gmp', 'retail_sub', 'hni_sub', 'qib_sub', 'issue_size', 'price_high']
+LABEL_COLS = ['listing_gain', 'best_category']
+# Shared with backtest.py so the backtest evaluates exactly the model that gets published
+FOREST_PARAMS = {"n_estimators": 100, "random_state": 42}
+
 if not os.path.exists(MODELS_DIR):
     os.makedirs(MODELS_DIR)
 
 def load_data():
-    engine = create_engine(DATABASE_URL)
-    query = "SELECT * FROM ipo_master WHERE status='listed'" # Only train on listed IPOs for gain
-    # For full system we might want to train on all available data for category, but Gain implies 'listed'
-    # Actually, user said "Train models using FULL DATASET (Historical + Newly scraped)".
-    # But 'listing_gain' is only known for 'listed' IPOs. 
-    # 'best_category' might be known or inferred. 
-    # I will fetch all and filter in pandas.
-    df = pd.read_sql("SELECT * FROM ipo_master", engine)
+    # Only the columns training and dataset_fingerprint use, in a stable order. Every
+    # IPO is loaded: the gain and category models each keep the rows that carry
+    # their label, and the fingerprint covers the labelled rows.
+    columns = ", ".join(['id', 'scraped_at'] + FEATURE_COLS + LABEL_COLS)
+    df = pd.read_sql(f"SELECT {columns} FROM ipo_master ORDER BY id", engine)
     return df
 
-def preprocess_and_train():
+def dataset_fingerprint(df):
+    """
+    Cheap identity of the training set: labelled row count, newest scraped_at and a
+    hash over the feature and label columns of those rows. Equal fingerprints mean
+    retraining would reproduce the published model.
+    """
+    labelled = df[df['listing_gain'].notna() | df['best_category'].notna()]
+    row_hashes = pd.util.hash_pandas_object(labelled[FEATURE_COLS + LABEL_COLS], index=False)
+    return {
+        "rows": int(len(labelled)),
+        "max_scraped_at": str(labelled['scraped_at'].max()) if len(labelled) else None,
+        "hash": hashlib.sha1(row_hashes.values.tobytes()).hexdigest(),
+    }
+
+def preprocess_and_train(n_jobs=-1, force=False):
+    """
+    Train both forests on the full table and publish them as one registry bundle.
+    Returns the published version, or None when there was nothing to train on or
+    the data is identical to what the served model was trained on (unless force).
+    n_jobs is passed to the forests (-1 = all cores); the API runs this through
+    training.job in a separate process, so using every core is safe.
+    """
     logger.info("Loading data from database...")
     df = load_data()
     
@@ -35,6 +55,14 @@ def preprocess_and_train():
         logger.warning("No data found in database. Skipping training.")
         return
 
+    fingerprint = dataset_fingerprint(df)
+    from .registry import current_manifest
+    published = current_manifest()
+    if not force and published and published.get("dataset") == fingerprint:
+        logger.info(f"Training data unchanged since model {published.get('version')} "
+                    f"({fingerprint['rows']} labelled rows). Skipping training.")
+        return
+
     # Filter for rows that have 'listing_gain' for the regressor
     reg_df = df.dropna(subset=['listing_gain'])
     
@@ -43,21 +71,24 @@ def preprocess_and_train():
         return
 
     # Features
-    feature_cols = ['gmp', 'retail_sub', 'hni_sub', 'qib_sub', 'issue_size', 'price_high']
+    feature_cols = FEATURE_COLS
     
     # Preprocessing
     # Impute missing feature values with 0 or mean
-    imputer = SimpleImputer(strategy='mean')
+    gain_imputer = SimpleImputer(strategy='mean')
     
     X_reg = reg_df[feature_cols]
     y_reg = reg_df['listing_gain']
     
-    X_reg = imputer.fit_transform(X_reg)
+    X_reg = gain_imputer.fit_transform(X_reg)
     
     # Train Gain Model
     logger.info("Training Listing Gain Model...")
-    reg_model = RandomForestRegressor(n_estimators=100, random_state=42)
+    reg_model = RandomForestRegressor(**FOREST_PARAMS, n_jobs=n_jobs)
     reg_model.fit(X_reg, y_reg)
+
+    artifacts = {"gain_model": reg_model, "gain_imputer": gain_imputer}
+    metrics = {"gain_rows": len(reg_df), "gain_train_r2": round(float(reg_model.score(X_reg, y_reg)), 4)}
     
     # Train Category Model
     # Assuming 'best_category' is populated. If not, we can't train this.
@@ -68,29 +99,35 @@ def preprocess_and_train():
         X_class = class_df[feature_cols]
         y_class = class_df['best_category']
         
-        X_class = imputer.fit_transform(X_class) # Reuse/refit imputer? Better to fit new for this set
+        # Its own imputer: the category rows are a different subset than the gain rows
+        category_imputer = SimpleImputer(strategy='mean')
+        X_class = category_imputer.fit_transform(X_class)
         
         le = LabelEncoder()
         y_class_enc = le.fit_transform(y_class)
         
-        class_model = RandomForestClassifier(n_estimators=100, random_state=42)
+        class_model = RandomForestClassifier(**FOREST_PARAMS, n_jobs=n_jobs)
         class_model.fit(X_class, y_class_enc)
-        
-        # Save Category models
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-        joblib.dump(class_model, f"{MODELS_DIR}/ipo_category_{timestamp}.pkl")
-        joblib.dump(le, f"{MODELS_DIR}/category_encoder.pkl") # generic name for latest? or versioned?
-        # User asked for models/ipo_category_YYYYMMDD_HHMM.pkl and category_encoder.pkl
-        # I'll save versioned and maybe symlink or just use logic to find latest.
-        # User said "Uses the latest model".
-        
-    # Save Gain Models
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    joblib.dump(reg_model, f"{MODELS_DIR}/ipo_gain_{timestamp}.pkl")
-    # Save imputer as well to handle new inputs? Good practice.
-    joblib.dump(imputer, f"{MODELS_DIR}/imputer.pkl")
 
-    logger.info(f"Training complete. Models saved to {MODELS_DIR}")
+        artifacts.update(category_model=class_model, category_imputer=category_imputer, encoder=le)
+        metrics.update(category_rows=len(class_df),
+                       category_train_accuracy=round(float(class_model.score(X_class, y_class_enc)), 4),
+                       classes=[str(c) for c in le.classes_])
+
+    # Inference runs on small batches inside the API; don't fan out prediction over all cores
+    for model in (artifacts.get("gain_model"), artifacts.get("category_model")):
+        if model is not None:
+            model.set_params(n_jobs=None)
+
+    # One versioned bundle; the serving side picks it up without a restart
+    from .registry import publish
+    version = publish(artifacts, {"features": feature_cols, "metrics": metrics, "dataset": fingerprint})
+
+    logger.info(f"Training complete. Published model version {version}")
+    return version
 
 if __name__ == "__main__":
-    preprocess_and_train()
+    # Same entry point as the scheduled job, including the one-run-at-a-time lock
+    import sys
+    from .job import main
+    sys.exit(main())
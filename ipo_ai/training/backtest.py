@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+from sklearn.impute import SimpleImputer
+
+from ..db.database import engine
+from ..utils.logger import setup_logger
+from .auto_train import MODELS_DIR, FEATURE_COLS, FOREST_PARAMS
+
+logger = setup_logger("backtest")
+
+# models/backtest_cache/<key>/{X,gain,category,days}.npy + meta.json: the preprocessed
+# matrix of one dataset, memory-mapped by every window instead of rebuilt per window.
+CACHE_DIR = os.path.join(MODELS_DIR, "backtest_cache")
+KEEP_CACHES = 3
+CACHE_ARRAYS = ("X", "gain", "category", "days")
+MIN_TRAIN_ROWS = 5  # same floor as preprocess_and_train
+# Each backtest tree is grown on at most this many bootstrap rows. Histories below it
+# are fitted exactly as preprocess_and_train does; above it, fit time stops growing
+# with the window. 0 disables the cap.
+MAX_SAMPLES = 20000
+
+def load_history():
+    """Labelled IPOs with a listing date, oldest listing first."""
+    columns = ", ".join(['id', 'listing_date'] + FEATURE_COLS + ['listing_gain', 'best_category'])
+    return pd.read_sql(
+        f"SELECT {columns} FROM ipo_master WHERE listing_date IS NOT NULL "
+        f"AND (listing_gain IS NOT NULL OR best_category IS NOT NULL) ORDER BY listing_date, id",
+        engine, parse_dates=['listing_date'],
+    )
+
+def _cache_key(df):
+    row_hashes = pd.util.hash_pandas_object(df[['listing_date'] + FEATURE_COLS + ['listing_gain', 'best_category']], index=False)
+    return hashlib.sha1(row_hashes.values.tobytes()).hexdigest()[:16]
+
+def build_matrix(df, cache_dir=CACHE_DIR):
+    """
+    Sort by listing date and write the float feature matrix, targets (gain, category
+    code, -1 when missing) and listing day numbers as .npy files. Returns the
+    directory and whether it was already cached; identical data reuses it.
+    """
+    df = df.dropna(subset=['listing_date'])
+    df = df[df['listing_gain'].notna() | df['best_category'].notna()]
+    df = df.sort_values(['listing_date', 'id'] if 'id' in df else ['listing_date'], kind='stable')
+    path = os.path.join(cache_dir, _cache_key(df))
+    if os.path.isfile(os.path.join(path, "meta.json")):
+        os.utime(path)
+        return path, True
+
+    categories = df['best_category'].astype('category')
+    arrays = {
+        "X": df[FEATURE_COLS].to_numpy(dtype=np.float64),
+        "gain": df['listing_gain'].to_numpy(dtype=np.float64),
+        "category": categories.cat.codes.to_numpy(dtype=np.int16),
+        "days": df['listing_date'].to_numpy(dtype='datetime64[D]').astype(np.int64),
+    }
+    meta = {"rows": len(df), "features": FEATURE_COLS, "classes": [str(c) for c in categories.cat.categories]}
+    staging = f"{path}.tmp{os.getpid()}"
+    os.makedirs(staging, exist_ok=True)
+    for name in CACHE_ARRAYS:
+        np.save(os.path.join(staging, f"{name}.npy"), arrays[name])
+    with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    try:
+        os.rename(staging, path)
+    except OSError:  # another run cached the same data first
+        shutil.rmtree(staging, ignore_errors=True)
+    _prune_cache(cache_dir)
+    return path, False
+
+def _prune_cache(cache_dir, keep=KEEP_CACHES):
+    entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if ".tmp" not in name]
+    for path in sorted(entries, key=os.path.getmtime)[:-keep]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def plan_windows(days, windows=5, min_train=0.5):
+    """
+    Expanding windows over rows sorted by listing day: the first `min_train` share of
+    rows is the initial training set and the rest is cut into `windows` test blocks.
+    Block edges are moved back to the first IPO of their day, so IPOs listing on the
+    same day are never split between training and test.
+    """
+    n = len(days)
+    edges = np.linspace(int(n * min_train), n, windows + 1).astype(int)
+    edges = np.searchsorted(days, days[np.minimum(edges, n - 1)], side='left')
+    edges[-1] = n
+    plan = []
+    for train_end, test_end in zip(edges[:-1], edges[1:]):
+        if MIN_TRAIN_ROWS <= train_end < test_end:
+            plan.append({"window": len(plan) + 1, "train_end": int(train_end), "test_end": int(test_end)})
+    return plan
+
+# Per-process view of the cached matrix and the row cap, set once by the pool initializer
+_matrix = {}
+_max_samples = MAX_SAMPLES
+
+def _load_matrix(path, max_samples=MAX_SAMPLES):
+    global _max_samples
+    _matrix.clear()
+    _matrix.update({name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in CACHE_ARRAYS})
+    _max_samples = max_samples
+
+def _forest_params(rows):
+    return dict(FOREST_PARAMS, n_jobs=1,
+                max_samples=_max_samples if _max_samples and rows > _max_samples else None)
+
+def _day(value):
+    return str(np.datetime64(int(value), 'D'))
+
+def evaluate_window(window):
+    """Fit both forests on rows [0, train_end) and score rows [train_end, test_end)."""
+    X, gain, category, days = (_matrix[name] for name in CACHE_ARRAYS)
+    train, test = slice(0, window["train_end"]), slice(window["train_end"], window["test_end"])
+    start = time.perf_counter()
+    result = dict(window,
+                  train_from=_day(days[0]), train_to=_day(days[train.stop - 1]),
+                  test_from=_day(days[test.start]), test_to=_day(days[test.stop - 1]))
+
+    train_rows, test_rows = ~np.isnan(gain[train]), ~np.isnan(gain[test])
+    result.update(gain_train=int(train_rows.sum()), gain_test=int(test_rows.sum()))
+    if result["gain_train"] >= MIN_TRAIN_ROWS and result["gain_test"]:
+        imputer = SimpleImputer(strategy='mean').fit(X[train][train_rows])
+        model = RandomForestRegressor(**_forest_params(result["gain_train"]))
+        model.fit(imputer.transform(X[train][train_rows]), gain[train][train_rows])
+        actual = gain[test][test_rows]
+        error = model.predict(imputer.transform(X[test][test_rows])) - actual
+        spread = ((actual - actual.mean()) ** 2).sum()
+        result.update(
+            gain_mae=float(np.abs(error).mean()),
+            gain_rmse=float(np.sqrt((error ** 2).mean())),
+            gain_r2=float(1 - (error ** 2).sum() / spread) if spread > 0 else None,
+            # Predicting the training mean for every IPO, as a yardstick
+            gain_baseline_mae=float(np.abs(actual - gain[train][train_rows].mean()).mean()),
+        )
+
+    train_rows, test_rows = category[train] >= 0, category[test] >= 0
+    result.update(category_train=int(train_rows.sum()), category_test=int(test_rows.sum()))
+    if result["category_train"] >= MIN_TRAIN_ROWS and result["category_test"]:
+        imputer = SimpleImputer(strategy='mean').fit(X[train][train_rows])
+        model = RandomForestClassifier(**_forest_params(result["category_train"]))
+        model.fit(imputer.transform(X[train][train_rows]), category[train][train_rows])
+        actual = category[test][test_rows]
+        predicted = model.predict(imputer.transform(X[test][test_rows]))
+        majority = np.bincount(category[train][train_rows]).argmax()
+        result.update(
+            category_accuracy=float((predicted == actual).mean()),
+            category_baseline_accuracy=float((actual == majority).mean()),
+        )
+
+    result["fit_s"] = round(time.perf_counter() - start, 2)
+    return result
+
+def _weighted(results, metric, weight):
+    scored = [(r[metric], r[weight]) for r in results if r.get(metric) is not None]
+    total = sum(w for _, w in scored)
+    return sum(v * w for v, w in scored) / total if total else None
+
+def run_backtest(df=None, windows=5, min_train=0.5, workers=None, cache_dir=CACHE_DIR, max_samples=MAX_SAMPLES):
+    """
+    Walk-forward backtest of the published model configuration, with each tree's
+    bootstrap capped at max_samples rows. Windows are independent, so they run on a
+    process pool (one single-threaded forest per worker); every worker memory-maps
+    the same cached matrix.
+    """
+    start = time.perf_counter()
+    if df is None:
+        df = load_history()
+    os.makedirs(cache_dir, exist_ok=True)
+    path, cached = build_matrix(df, cache_dir)
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    days = np.load(os.path.join(path, "days.npy"))
+    plan = plan_windows(days, windows, min_train) if len(days) else []
+    if not plan:
+        logger.warning(f"Not enough IPOs with both a listing_date and a label to backtest ({meta['rows']} rows).")
+        return {"rows": meta["rows"], "windows": [], "summary": {}}
+    logger.info(f"Backtesting {len(plan)} windows over {meta['rows']} IPOs "
+                f"({'cached' if cached else 'new'} matrix {os.path.basename(path)})")
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(plan)))
+    if workers == 1:
+        _load_matrix(path, max_samples)
+        results = [evaluate_window(window) for window in plan]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load_matrix, initargs=(path, max_samples)) as pool:
+            # Largest training sets first so the slowest window isn't the one left running alone
+            results = list(pool.map(evaluate_window, plan[::-1]))[::-1]
+
+    summary = {
+        "gain_mae": _weighted(results, "gain_mae", "gain_test"),
+        "gain_baseline_mae": _weighted(results, "gain_baseline_mae", "gain_test"),
+        "category_accuracy": _weighted(results, "category_accuracy", "category_test"),
+        "category_baseline_accuracy": _weighted(results, "category_baseline_accuracy", "category_test"),
+    }
+    elapsed = time.perf_counter() - start
+    logger.info(f"Backtest finished in {elapsed:.1f}s with {workers} workers")
+    return {"rows": meta["rows"], "classes": meta["classes"], "cached_matrix": cached, "max_samples": max_samples,
+            "workers": workers, "elapsed_s": round(elapsed, 2), "windows": results, "summary": summary}
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else "-"
+
+def print_report(report):
+    print(f"{'win':>3} {'test from':>10} {'test to':>10}{'train':>8}{'test':>7}"
+          f"{'MAE':>8}{'base':>8}{'RMSE':>8}{'R2':>7}{'cat acc':>9}{'base':>7}{'fit s':>7}")
+    for r in report["windows"]:
+        print(f"{r['window']:>3} {r['test_from']:>10} {r['test_to']:>10}{r['gain_train']:>8}{r['gain_test']:>7}"
+              f"{_fmt(r.get('gain_mae'), '.2f'):>8}{_fmt(r.get('gain_baseline_mae'), '.2f'):>8}"
+              f"{_fmt(r.get('gain_rmse'), '.2f'):>8}{_fmt(r.get('gain_r2'), '.3f'):>7}"
+              f"{_fmt(r.get('category_accuracy'), '.3f'):>9}{_fmt(r.get('category_baseline_accuracy'), '.3f'):>7}"
+              f"{r['fit_s']:>7.1f}")
+    summary = report["summary"]
+    if summary:
+        print(f"overall: gain MAE {_fmt(summary['gain_mae'], '.2f')} (baseline {_fmt(summary['gain_baseline_mae'], '.2f')}), "
+              f"category accuracy {_fmt(summary['category_accuracy'], '.3f')} "
+              f"(baseline {_fmt(summary['category_baseline_accuracy'], '.3f')})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the listing gain / category models.")
+    parser.add_argument("--windows", type=int, default=5, help="number of test windows")
+    parser.add_argument("--min-train", type=float, default=0.5, help="share of IPOs in the first training window")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--max-samples", type=int, default=MAX_SAMPLES,
+                        help=f"bootstrap rows per tree (default {MAX_SAMPLES}; 0 = every row, as published)")
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_backtest(windows=args.windows, min_train=args.min_train, workers=args.workers,
+                          max_samples=args.max_samples)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["windows"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from ..utils.logger import setup_logger
+from .auto_train import MODELS_DIR, preprocess_and_train
+
+try:
+    import psutil
+except ImportError:  # without psutil a lock is only considered stale by age
+    psutil = None
+
+logger = setup_logger("training_job")
+
+LOCK_PATH = os.path.join(MODELS_DIR, "training.lock")
+STALE_LOCK_SECONDS = 6 * 3600
+JOB_TIMEOUT_SECONDS = 2 * 3600
+
+# Exit codes of the training subprocess
+PUBLISHED, SKIPPED, BUSY = 0, 3, 4
+
+class TrainingLock:
+    """
+    Cross-process lock file (O_EXCL create) so that only one training run happens
+    at a time, even with several API workers each running the daily job.
+    A lock left behind by a dead process, or older than STALE_LOCK_SECONDS, is taken over.
+    """
+
+    def __init__(self, path=LOCK_PATH):
+        self.path = path
+        self.acquired = False
+
+    def _is_stale(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                pid = int(f.read().split()[0])
+            age = time.time() - os.path.getmtime(self.path)
+        except (OSError, ValueError, IndexError):
+            return True
+        if age > STALE_LOCK_SECONDS:
+            return True
+        return psutil is not None and not psutil.pid_exists(pid)
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._is_stale():
+                    return False
+                logger.warning(f"Removing stale training lock {self.path}")
+                try:
+                    os.remove(self.path)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(f"{os.getpid()} {time.time():.0f}\n")
+            self.acquired = True
+            return True
+        return False
+
+    def release(self):
+        if self.acquired:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.acquired = False
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+def run_training_job(n_jobs=-1, timeout=JOB_TIMEOUT_SECONDS):
+    """
+    Train in a separate Python process so tree building never competes with the
+    API for the GIL. Returns the child's exit code (PUBLISHED, SKIPPED, BUSY or
+    an error code); the caller picks up a published bundle from the registry.
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    cmd = [sys.executable, "-m", "ipo_ai.training.job", "--n-jobs", str(n_jobs)]
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(cmd, env=env, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        logger.error(f"Training job exceeded {timeout}s and was killed.")
+        return None
+    elapsed = time.perf_counter() - start
+    outcome = {PUBLISHED: "published", SKIPPED: "skipped", BUSY: "another run holds the lock"}
+    logger.info(f"Training job finished in {elapsed:.1f}s: {outcome.get(result.returncode, f'exit {result.returncode}')}")
+    return result.returncode
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the gain / category models and publish a bundle.")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores for tree building (-1 = all)")
+    parser.add_argument("--force", action="store_true", help="train even if the data is unchanged")
+    args = parser.parse_args(argv)
+
+    with TrainingLock() as acquired:
+        if not acquired:
+            logger.info("Another training run is in progress; exiting.")
+            return BUSY
+        version = preprocess_and_train(n_jobs=args.n_jobs, force=args.force)
+    return PUBLISHED if version else SKIPPED
+
+if __name__ == "__main__":
+    sys.exit(main())
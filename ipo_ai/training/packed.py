@@ -0,0 +1,117 @@
+import json
+import os
+
+import numpy as np
+
+# sklearn's Tree.__setstate__ memcpy's every node array into private memory, so a
+# joblib-pickled forest can't be shared between processes even with mmap_mode.
+# A PackedForest keeps the same trees as a handful of flat .npy arrays instead:
+# np.load(mmap_mode='r') maps them straight from the OS page cache, so every
+# uvicorn worker serving the same bundle shares one physical copy.
+
+ARRAYS = ("left", "right", "feature", "threshold", "value", "roots")
+PREDICT_CHUNK = 4096
+
+class PackedForest:
+    """
+    Read-only RandomForestRegressor / RandomForestClassifier for inference:
+    all trees' nodes concatenated with child indices rebased to global offsets.
+    Exposes predict / predict_proba / classes_ like the sklearn estimator.
+    """
+
+    def __init__(self, arrays, meta):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self.kind = meta["kind"]
+        self.max_depth = meta["max_depth"]
+        self.n_features_in_ = meta["n_features_in"]
+        if self.kind == "classifier":
+            self.classes_ = np.asarray(meta["classes"])
+
+    @classmethod
+    def from_sklearn(cls, model):
+        is_classifier = hasattr(model, "classes_")
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left < 0
+            roots.append(offset)
+            left.append(np.where(is_leaf, -1, tree.children_left + offset))
+            right.append(np.where(is_leaf, -1, tree.children_right + offset))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            if is_classifier:
+                counts = tree.value[:, 0, :]
+                value.append(counts / counts.sum(axis=1, keepdims=True))
+            else:
+                value.append(tree.value[:, 0, 0])
+            max_depth = max(max_depth, tree.max_depth)
+            offset += tree.node_count
+        arrays = {
+            "left": np.concatenate(left).astype(np.int32),
+            "right": np.concatenate(right).astype(np.int32),
+            "feature": np.concatenate(feature).astype(np.int32),
+            "threshold": np.concatenate(threshold).astype(np.float64),
+            "value": np.concatenate(value).astype(np.float64),
+            "roots": np.asarray(roots, dtype=np.int32),
+        }
+        meta = {
+            "kind": "classifier" if is_classifier else "regressor",
+            "max_depth": int(max_depth),
+            "n_features_in": int(model.n_features_in_),
+            "classes": model.classes_.tolist() if is_classifier else None,
+        }
+        return cls(arrays, meta)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS}
+        return cls(arrays, meta)
+
+    def _leaves(self, X):
+        """Leaf index per (row, tree); each step only advances pairs not yet at a leaf."""
+        # sklearn compares float32 features against float64 thresholds; do the same
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        flat_x = X.ravel()
+        node = np.tile(np.asarray(self.roots, dtype=np.int64), n_rows)
+        x_base = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, n_trees)
+        active = np.arange(node.size)
+        for _ in range(self.max_depth):
+            current = node[active]
+            left = self.left[current]
+            internal = left >= 0
+            if not internal.all():
+                active, current, left = active[internal], current[internal], left[internal]
+                if active.size == 0:
+                    break
+            go_left = flat_x[x_base[active] + self.feature[current]] <= self.threshold[current]
+            node[active] = np.where(go_left, left, self.right[current])
+        return node.reshape(n_rows, n_trees)
+
+    def _mean_value(self, X):
+        X = np.asarray(X)
+        parts = [self.value[self._leaves(X[i:i + PREDICT_CHUNK])].mean(axis=1)
+                 for i in range(0, X.shape[0], PREDICT_CHUNK)]
+        return np.concatenate(parts) if parts else np.empty((0,))
+
+    def predict(self, X):
+        if self.kind == "classifier":
+            return self.classes_[self.predict_proba(X).argmax(axis=1)]
+        return self._mean_value(X)
+
+    def predict_proba(self, X):
+        return self._mean_value(X)
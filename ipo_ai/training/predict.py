@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from .auto_train import FEATURE_COLS
+
+def feature_matrix(rows):
+    """
+    Stack feature rows into one float64 (n, len(FEATURE_COLS)) matrix.
+    rows are sequences in FEATURE_COLS order or dicts keyed by column; None becomes NaN
+    for the imputer. Raises ValueError on non-numeric values.
+    """
+    values = [
+        [row.get(col) for col in FEATURE_COLS] if isinstance(row, dict) else list(row)
+        for row in rows
+    ]
+    if not values:
+        return np.empty((0, len(FEATURE_COLS)), dtype=np.float64)
+    return np.array(values, dtype=np.float64)
+
+def _impute(imputer, X):
+    if imputer is None:
+        return np.nan_to_num(X)
+    if hasattr(imputer, 'feature_names_in_'):
+        # Fitted on a DataFrame; a zero-copy frame keeps sklearn from warning about names
+        return imputer.transform(pd.DataFrame(X, columns=FEATURE_COLS, copy=False))
+    return imputer.transform(X)
+
+def predict_matrix(components, X):
+    """
+    Score every row of X with one imputer and one model call per model.
+    Returns one dict per row: predicted_listing_gain, predicted_category and
+    category_probabilities; a missing model leaves its keys as None.
+    """
+    gain_model = components.get('gain_model')
+    category_model = components.get('category_model')
+    # Registry bundles carry one imputer per model; legacy flat files share one
+    gain_imputer = components.get('gain_imputer', components.get('imputer'))
+    category_imputer = components.get('category_imputer', components.get('imputer'))
+    encoder = components.get('encoder')
+
+    n = X.shape[0]
+    if n == 0:
+        return []
+
+    gains = gain_model.predict(_impute(gain_imputer, X)) if gain_model is not None else None
+    proba = labels = best = None
+    if category_model is not None:
+        proba = category_model.predict_proba(_impute(category_imputer, X))
+        classes = category_model.classes_
+        labels = [str(label) for label in (encoder.inverse_transform(classes) if encoder is not None else classes)]
+        best = proba.argmax(axis=1)
+
+    results = []
+    for i in range(n):
+        result = {
+            "predicted_listing_gain": round(float(gains[i]), 2) if gains is not None else None,
+            "predicted_category": None,
+            "category_probabilities": None,
+        }
+        if proba is not None:
+            result["predicted_category"] = labels[best[i]]
+            result["category_probabilities"] = {label: round(float(p), 4) for label, p in zip(labels, proba[i])}
+        results.append(result)
+    return results
@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+from datetime import datetime
+
+import joblib
+
+from ..utils.logger import setup_logger
+from .auto_train import MODELS_DIR
+from .packed import PackedForest
+
+logger = setup_logger("model_registry")
+
+# models/registry/<version>/{gain_model,category_model,...}.pkl + manifest.json,
+# plus gain_model/ and category_model/ packed array directories;
+# models/registry/CURRENT names the version being served.
+REGISTRY_DIR = os.path.join(MODELS_DIR, "registry")
+CURRENT_FILE = os.path.join(REGISTRY_DIR, "CURRENT")
+KEEP_VERSIONS = 5
+
+# Each model travels with the imputer it was fitted with, so they can never drift apart
+ARTIFACTS = ("gain_model", "gain_imputer", "category_model", "category_imputer", "encoder")
+# Forests are also stored as PackedForest .npy directories, which serving memory-maps
+FORESTS = ("gain_model", "category_model")
+
+def new_version():
+    return datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+
+def _atomic_write(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def list_versions():
+    if not os.path.isdir(REGISTRY_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(REGISTRY_DIR)
+        if not name.startswith(".") and os.path.isfile(os.path.join(REGISTRY_DIR, name, "manifest.json"))
+    )
+
+def current_version():
+    try:
+        with open(CURRENT_FILE, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def publish(artifacts, manifest, keep=KEEP_VERSIONS):
+    """
+    Write a bundle into a hidden staging directory, rename it into place and
+    then repoint CURRENT. Readers see either the old bundle or the complete new
+    one, never a half-written directory.
+    """
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    version = base = new_version()
+    suffix = 1
+    while os.path.exists(os.path.join(REGISTRY_DIR, version)):
+        version = f"{base}_{suffix}"
+        suffix += 1
+    staging = os.path.join(REGISTRY_DIR, f".{version}.tmp")
+    os.makedirs(staging)
+    try:
+        stored = []
+        packed = []
+        for name in ARTIFACTS:
+            if artifacts.get(name) is not None:
+                joblib.dump(artifacts[name], os.path.join(staging, f"{name}.pkl"))
+                stored.append(name)
+                if name in FORESTS:
+                    PackedForest.from_sklearn(artifacts[name]).save(os.path.join(staging, name))
+                    packed.append(name)
+        manifest = dict(manifest, version=version, artifacts=stored, packed=packed,
+                        created_at=datetime.utcnow().isoformat())
+        with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.rename(staging, os.path.join(REGISTRY_DIR, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _atomic_write(CURRENT_FILE, version)
+    logger.info(f"Published model version {version}")
+    prune(keep)
+    return version
+
+def load_manifest(version):
+    with open(os.path.join(REGISTRY_DIR, version, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def current_manifest():
+    """Manifest of the served version (no model loading), or None."""
+    version = current_version()
+    if version is None:
+        return None
+    try:
+        return load_manifest(version)
+    except (OSError, ValueError):
+        return None
+
+def load_bundle(version, mmap_mode="r"):
+    """
+    Load every artifact of a version into a components dict. Forests come from
+    their packed arrays, memory-mapped read-only by default so that processes
+    serving the same version share the pages; the small imputers and encoder are
+    unpickled. mmap_mode=None reads the packed arrays into private memory.
+    """
+    path = os.path.join(REGISTRY_DIR, version)
+    manifest = load_manifest(version)
+    components = {"version": version, "manifest": manifest}
+    packed = set(manifest.get("packed", []))
+    for name in manifest.get("artifacts", []):
+        if name in packed:
+            components[name] = PackedForest.load(os.path.join(path, name), mmap_mode=mmap_mode)
+        else:
+            components[name] = joblib.load(os.path.join(path, f"{name}.pkl"))
+    return components
+
+def prune(keep=KEEP_VERSIONS):
+    """Delete all but the newest `keep` versions; the served version is always kept."""
+    current = current_version()
+    versions = list_versions()
+    removed = 0
+    for version in versions[:-keep] if keep > 0 else versions:
+        if version == current:
+            continue
+        shutil.rmtree(os.path.join(REGISTRY_DIR, version), ignore_errors=True)
+        removed += 1
+    if removed:
+        logger.info(f"Pruned {removed} old model versions (keeping {keep})")
+    return removed
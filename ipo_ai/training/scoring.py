@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..db.database import SessionLocal
+from ..db.events import change_bus, data_version
+from ..db.models import IPOMaster, IPOPrediction
+from ..db.writer import db_writer
+from ..utils.logger import setup_logger
+from .auto_train import FEATURE_COLS, LABEL_COLS
+from .job import PUBLISHED, run_training_job
+from .predict import feature_matrix, predict_matrix
+from .serving import get_components, load_components, on_swap
+
+logger = setup_logger("scoring")
+
+SCORE_CHUNK = 2000
+
+# Retrain ahead of the daily job once this many IPOs gained a label (listing gain or
+# best category), but not more often than MIN_RETRAIN_INTERVAL seconds
+NEW_LABELS_TRIGGER = 25
+MIN_RETRAIN_INTERVAL = 3600
+
+# Post-scrape and post-retrain scoring can overlap; one pass at a time is enough
+_rescore_lock = threading.Lock()
+
+def stale_query(version):
+    """IPOs with no prediction, a prediction from another model, or features changed since scoring."""
+    features = [getattr(IPOMaster, col) for col in FEATURE_COLS]
+    return (
+        select(IPOMaster.id, IPOMaster.fingerprint, *features)
+        .outerjoin(IPOPrediction, IPOPrediction.ipo_id == IPOMaster.id)
+        .where(or_(
+            IPOPrediction.ipo_id.is_(None),
+            IPOPrediction.model_version.is_distinct_from(version),
+            IPOPrediction.source_fingerprint.is_distinct_from(IPOMaster.fingerprint),
+        ))
+        .order_by(IPOMaster.id)
+    )
+
+def prediction_rows(ids, fingerprints, predictions, version, scored_at):
+    return [{
+        "ipo_id": ipo_id,
+        "predicted_gain": p["predicted_listing_gain"],
+        "predicted_category": p["predicted_category"],
+        "category_probabilities": json.dumps(p["category_probabilities"]) if p["category_probabilities"] else None,
+        "model_version": version,
+        "source_fingerprint": fingerprint,
+        "scored_at": scored_at,
+    } for ipo_id, fingerprint, p in zip(ids, fingerprints, predictions)]
+
+def _upsert_predictions(rows):
+    db = SessionLocal()
+    try:
+        stmt = sqlite_insert(IPOPrediction)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IPOPrediction.ipo_id],
+            set_={col: stmt.excluded[col] for col in rows[0] if col != "ipo_id"},
+        )
+        db.execute(stmt, rows)
+        db.commit()
+    finally:
+        db.close()
+
+def rescore():
+    """
+    Score every stale IPO in batches of SCORE_CHUNK and store the results.
+    Inference runs on the caller's thread; only the upserts go through the writer.
+    Returns the number of rows scored.
+    """
+    components = get_components()
+    version = components.get('version')
+    if components.get('gain_model') is None and components.get('category_model') is None:
+        return 0
+    with _rescore_lock:
+        db = SessionLocal()
+        try:
+            stale = db.execute(stale_query(version)).all()
+        finally:
+            db.close()
+        if not stale:
+            return 0
+
+        scored_at = datetime.utcnow()
+        for i in range(0, len(stale), SCORE_CHUNK):
+            chunk = stale[i:i + SCORE_CHUNK]
+            predictions = predict_matrix(components, feature_matrix(row[2:] for row in chunk))
+            rows = prediction_rows([row[0] for row in chunk], [row[1] for row in chunk],
+                                   predictions, version, scored_at)
+            db_writer.run(_upsert_predictions, rows)
+        data_version.bump()
+        logger.info(f"Scored {len(stale)} IPOs with model {version}")
+        return len(stale)
+
+# A new model version makes every stored prediction stale
+on_swap(lambda components: rescore())
+
+def retrain_and_rescore():
+    """
+    Scheduled job: retrain in a worker process and, if it published a bundle, serve
+    it right away (which re-scores everything). Only this thread waits on the child.
+    """
+    if run_training_job() == PUBLISHED:
+        load_components()
+
+def gained_label(event):
+    """True if this change gave the IPO a listing_gain or best_category it didn't have."""
+    for field in LABEL_COLS:
+        old, new = event.changes.get(field, (None, None))
+        # The scraper stores 0.0 / "" until an IPO lists, so those count as unlabelled too
+        if not old and new:
+            return True
+    return False
+
+def start_retrain_trigger(threshold=NEW_LABELS_TRIGGER, min_interval=MIN_RETRAIN_INTERVAL):
+    """
+    Change-bus subscriber that counts newly labelled IPOs and runs retrain_and_rescore
+    early once threshold is reached. The run itself still skips if the dataset
+    fingerprint matches the served model, and the training lock prevents overlap
+    with the scheduled job.
+    """
+    sub = change_bus.subscribe("retrain_trigger", maxsize=10000)
+
+    def run():
+        new_labels = 0
+        last_run = 0.0
+        while True:
+            event = sub.get(timeout=60)
+            batch = ([event] if event is not None else []) + sub.drain()
+            new_labels += sum(1 for e in batch if gained_label(e))
+            if new_labels >= threshold and time.monotonic() - last_run >= min_interval:
+                logger.info(f"{new_labels} newly labelled IPOs; retraining early.")
+                new_labels = 0
+                last_run = time.monotonic()
+                try:
+                    retrain_and_rescore()
+                except Exception as e:
+                    logger.error(f"Early retrain failed: {e}")
+
+    thread = threading.Thread(target=run, name="retrain-trigger", daemon=True)
+    thread.start()
+    return sub
@@ -0,0 +1,109 @@
+import glob
+import os
+import threading
+import joblib
+
+from ..utils.logger import setup_logger
+from .auto_train import MODELS_DIR
+from . import registry
+
+logger = setup_logger("serving")
+
+# The bundle used for inference by the API routes and post-scrape scoring. It is
+# replaced as a whole on reload, never mutated, so a caller that grabs it once
+# with get_components() always sees a matching model / imputer / encoder set.
+_active = {}
+_swap_callbacks = []
+_load_lock = threading.Lock()
+_reload_event = threading.Event()
+_watcher = None
+
+def get_components():
+    return _active
+
+def on_swap(callback):
+    """Call callback(components) in the loading thread whenever a new bundle goes live."""
+    _swap_callbacks.append(callback)
+
+# Helper to find latest model
+def load_latest_model(prefix):
+    files = glob.glob(f"{MODELS_DIR}/{prefix}_*.pkl")
+    if not files:
+        return None, None
+    latest_file = max(files, key=os.path.getctime)
+    logger.info(f"Loading model: {latest_file}")
+    return joblib.load(latest_file), latest_file
+
+def load_static_model(filename):
+    path = f"{MODELS_DIR}/{filename}"
+    if os.path.exists(path):
+        return joblib.load(path)
+    return None
+
+def load_legacy_components():
+    """Flat ipo_gain_*.pkl / ipo_category_*.pkl files from before the registry existed."""
+    gain_model, gain_file = load_latest_model("ipo_gain")
+    category_model, _ = load_latest_model("ipo_category")
+    version = None
+    if gain_file:
+        version = os.path.splitext(os.path.basename(gain_file))[0][len("ipo_gain_"):]
+    return {
+        'gain_model': gain_model,
+        'category_model': category_model,
+        'imputer': load_static_model("imputer.pkl"),
+        'encoder': load_static_model("category_encoder.pkl"),
+        'version': version,
+    }
+
+def _run_swap_callbacks(components):
+    for callback in list(_swap_callbacks):
+        try:
+            callback(components)
+        except Exception as e:
+            logger.error(f"Model swap callback failed: {e}")
+
+def load_components():
+    """
+    Load the registry's CURRENT bundle (or the legacy flat files when nothing has
+    been published yet) and make it live. No-op if that version is already served.
+    Returns the served version.
+    """
+    global _active
+    with _load_lock:
+        version = registry.current_version()
+        if _active and version in (None, _active.get('version')):
+            return _active.get('version')
+        components = load_legacy_components() if version is None else registry.load_bundle(version)
+        previous = _active.get('version')
+        _active = components
+    logger.info(f"Serving model version {components.get('version')} (was {previous})")
+    # Outside the lock: callbacks such as re-scoring can take a while
+    _run_swap_callbacks(components)
+    return components.get('version')
+
+def request_reload():
+    """Wake the watcher now instead of at its next poll."""
+    _reload_event.set()
+
+def start_watcher(interval=30):
+    """
+    Background thread that polls CURRENT and loads a newly published bundle off the
+    request path; requests keep using the previous bundle until the swap.
+    Picks up versions published by other processes (training jobs, other workers).
+    """
+    global _watcher
+    if _watcher is not None:
+        return _watcher
+
+    def run():
+        while True:
+            try:
+                load_components()
+            except Exception as e:
+                logger.error(f"Error loading models: {e}")
+            _reload_event.wait(interval)
+            _reload_event.clear()
+
+    _watcher = threading.Thread(target=run, name="model-watcher", daemon=True)
+    _watcher.start()
+    return _watcher
@@ -0,0 +1,116 @@
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# One place that turns the strings Indian IPO sites print into numbers:
+#   "₹1,20,000", "Rs. 95"          -> 120000.0, 95.0
+#   "₹90 - ₹95" (price band)       -> 95.0 with kind="price" (the upper end)
+#   "1,200.50 Cr", "50 Lakh(s)"    -> 1200.5, 0.5 with kind="amount" (in crore; also "Lac(s)", "L")
+#   "12.5x", "12.5 times"          -> 12.5 with kind="multiple"
+#   "-3.2%", "−3.2 %"              -> -3.2 with kind="percent"
+#   "₹45 (12.5%)"                  -> 45.0 with kind="number" (the first number)
+#   "-", "--", "N/A", "TBA", ""    -> missing
+# to_number() handles one value; clean_column() applies the same rules to a whole
+# pandas column with vectorized string ops.
+
+KINDS = ("number", "percent", "multiple", "amount", "price")
+
+# Currency symbols, spaces and words around the number are simply not matched;
+# digit-group commas ("1,20,000") are allowed inside a number and dropped after.
+_SIGNED = r'([-+−–]?\d[\d,]*(?:\.\d+)?)'
+_UNSIGNED = r'(\d[\d,]*(?:\.\d+)?)'
+_PATTERNS = {
+    "number": re.compile(_SIGNED),
+    "percent": re.compile(_SIGNED),
+    "multiple": re.compile(_UNSIGNED),
+    # Second group: a lakh unit right after the number (crore is the default unit)
+    "amount": re.compile(_UNSIGNED + r'\s*(lakhs?\b|lacs?\b|l\b)?', re.I),
+    # Last number of the cell: the upper end of a "90-95" band
+    "price": re.compile(r'^.*?' + _UNSIGNED + r'\D*$', re.S),
+}
+_MINUS = str.maketrans({'−': '-', '–': '-', ',': None})
+
+# Column versions of the patterns: the cells are joined with NUL separators and one
+# findall over the joined text yields exactly one match (possibly empty) per cell,
+# so a whole column is scanned by the regex engine in a single call.
+_CELL_END = r'[^\x00]*\x00|[^\x00]*\x00'
+_COLUMN_PATTERNS = {
+    "number": re.compile(r'[^\x00\d]*?' + _SIGNED + _CELL_END),
+    "percent": re.compile(r'[^\x00\d]*?' + _SIGNED + _CELL_END),
+    "multiple": re.compile(r'[^\x00\d]*?' + _UNSIGNED + _CELL_END),
+    "amount": re.compile(r'[^\x00\d]*?' + _UNSIGNED + r'[^\S\x00]*(lakhs?\b|lacs?\b|l\b)?' + _CELL_END, re.I),
+    "price": re.compile(r'[^\x00]*?' + _UNSIGNED + r'[^\x00\d]*\x00|[^\x00]*\x00'),
+}
+
+DATE_FORMAT = '%b %d, %Y'  # "Jan 05, 2024", as both Chittorgarh layouts print it
+
+def to_number(value, kind="number", default=0.0):
+    """Parse one scraped value (number or string) per `kind`; `default` when there is no number."""
+    if kind not in _PATTERNS:
+        raise ValueError(f"Unknown kind {kind!r}, expected one of {KINDS}")
+    if value is None or isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return default if np.isnan(value) else float(value)
+    match = _PATTERNS[kind].search(str(value))
+    if not match:
+        return default
+    number = float(match.group(1).translate(_MINUS))
+    if kind == "amount" and match.group(2):
+        number /= 100
+    return number
+
+def clean_column(series, kind="number", default=0.0):
+    """Vectorized to_number over a pandas Series of strings (or numbers); returns float64."""
+    if kind not in _PATTERNS:
+        raise ValueError(f"Unknown kind {kind!r}, expected one of {KINDS}")
+    if series.empty or (pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)):
+        return series.astype(np.float64).fillna(default)
+    if pd.api.types.infer_dtype(series, skipna=True) not in ("string", "empty"):
+        # Mixed numbers and strings, e.g. JSON sources
+        series = series.astype(object).where(series.isna(), series.astype(str))
+    cells = series.fillna('').tolist()
+    matches = _COLUMN_PATTERNS[kind].findall('\x00'.join(cells).replace(',', '') + '\x00')
+    if kind == "amount":
+        matches, lakh = zip(*matches) if matches else ((), ())
+    found = '\x00'.join(matches).translate(_MINUS).split('\x00')
+    numbers = pd.Series(np.array([m or 'nan' for m in found], dtype=np.float64), index=series.index)
+    if kind == "amount":
+        numbers = numbers.where(np.array([not unit for unit in lakh], dtype=bool), numbers / 100)
+    return numbers.fillna(default)
+
+def parse_date(value, fmt=DATE_FORMAT):
+    """datetime from a scraped date string, or None. fmt may be a tuple of formats to try in order."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    for f in (fmt,) if isinstance(fmt, str) else fmt:
+        try:
+            return datetime.strptime(str(value).strip(), f)
+        except ValueError:
+            continue
+    return None
+
+def clean_dates(series, fmt=DATE_FORMAT):
+    """Vectorized parse_date; returns a list of datetime / None in row order."""
+    text = series.astype(object).where(series.notna(), None)
+    parsed = None
+    for f in (fmt,) if isinstance(fmt, str) else fmt:
+        attempt = pd.to_datetime(text, format=f, errors='coerce')
+        parsed = attempt if parsed is None else parsed.fillna(attempt)
+    return [None if pd.isna(ts) else ts.to_pydatetime() for ts in parsed]
+
+def table_frame(headers, rows):
+    """
+    Columnar frame of raw cell strings from a table: one column per header, short
+    rows padded with missing values, extra cells dropped.
+    """
+    width = len(headers)
+    padded = [row if len(row) == width else row[:width] + [None] * (width - len(row)) for row in rows]
+    # Transposing in Python and building column by column is much cheaper than
+    # letting the DataFrame constructor infer a frame from a list of rows
+    columns = zip(*padded) if padded else [()] * width
+    return pd.DataFrame({i: np.array(col, dtype=object) for i, col in enumerate(columns)}, columns=range(width))
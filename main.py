@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from ipo_ai.api import app
 from ipo_ai.scraper.background_worker import run_background_scraper
 from monitor_updates import monitor_database
+from ipo_ai.db.events import start_log_sink
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("main_server")
@@ -23,11 +24,13 @@ def start_scraper():
 def start_monitor():
     """Starts the database monitor in a separate thread."""
     logger.info("Initializing database monitor thread...")
-    # Add a small delay to let the server start first
-    time.sleep(10)
+    # No start-up delay: the monitor must subscribe before the scraper publishes anything
     monitor_database()
 
 if __name__ == "__main__":
+    # 0. Structured change log (one JSON line per insert / update / status transition)
+    start_log_sink()
+
     # 1. Start Scraper Bot in Background Thread
     scraper_thread = threading.Thread(target=start_scraper, daemon=True)
     scraper_thread.start()
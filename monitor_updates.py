@@ -2,87 +2,128 @@ import time
 from datetime import datetime
 from ipo_ai.db.database import SessionLocal
 from ipo_ai.db.models import IPOMaster
+from ipo_ai.db.events import change_bus
+from sqlalchemy import func, or_
 
-def monitor_database():
-    """Monitor database for new additions and updates based on scraped_at changes."""
+def _print_inserted(inserted, total):
+    """inserted: [(ipo_name, status)]"""
+    print(f"🎉 NEW IPOS ADDED!")
+    print(f"   Time: {datetime.now().strftime('%H:%M:%S')}")
+    print(f"   Added: {len(inserted)} new IPO(s)")
+    print(f"   Total: {total} IPOs")
+
+    print(f"\n   New IPO(s):")
+    for name, status in inserted:
+        print(f"   - {name} ({status})")
+    print("-" * 60 + "\n")
+
+def _print_updated(lines):
+    print(f"🔄 EXISTING IPOS UPDATED!")
+    print(f"   Time: {datetime.now().strftime('%H:%M:%S')}")
+
+    print(f"\n   Updated IPO(s):")
+    for line in lines:
+        print(f"   - {line}")
+    print("-" * 60 + "\n")
+
+def monitor_database(batch_window=0.5, poll_interval=None):
+    """
+    Print new and updated IPOs as they are written.
+
+    Inside the scraper / API process (main.py) it listens to the change bus that
+    save_to_db publishes to, with no polling queries. The bus is in-process, so a
+    standalone run (python monitor_updates.py) passes poll_interval and checks
+    the database every poll_interval seconds instead.
+    """
     print("Starting database monitor...")
     print("=" * 60)
-    
+
+    # Subscribe before the one-off summary query so nothing slips in between
+    subscription = change_bus.subscribe("monitor") if poll_interval is None else None
+
     db = SessionLocal()
     initial_count = db.query(IPOMaster).count()
     # Get the latest scraped_at timestamp
     latest_scraped = db.query(IPOMaster.scraped_at).order_by(IPOMaster.scraped_at.desc()).first()
     last_scraped_at = latest_scraped[0] if latest_scraped else None
-    
+    last_id = db.query(func.max(IPOMaster.id)).scalar() or 0
+    db.close()
+
     print(f"Initial count: {initial_count} IPOs")
     print(f"Last scraped at: {last_scraped_at}")
     print(f"Monitoring started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if subscription is None:
+        print(f"Polling the database every {poll_interval}s (standalone mode)")
     print("=" * 60)
     print("\nWatching for new data and updates... (Press Ctrl+C to stop)\n")
-    db.close()
-    
-    last_count = initial_count
-    check_interval = 10  # Check every 10 seconds
-    
+
+    total = initial_count
     try:
-        while True:
-            time.sleep(check_interval)
-            
-            db = SessionLocal()
-            current_count = db.query(IPOMaster).count()
-            # Get the latest scraped_at timestamp
-            latest_scraped = db.query(IPOMaster.scraped_at).order_by(IPOMaster.scraped_at.desc()).first()
-            current_scraped_at = latest_scraped[0] if latest_scraped else None
-            
-            new_activity = False
-            
-            # Check for new IPOs
-            if current_count > last_count:
-                new_records = current_count - last_count
-                print(f"🎉 NEW IPOS ADDED!")
-                print(f"   Time: {datetime.now().strftime('%H:%M:%S')}")
-                print(f"   Added: {new_records} new IPO(s)")
-                print(f"   Total: {current_count} IPOs")
-                
-                # Show the newly added IPOs
-                new_ipos = db.query(IPOMaster).order_by(IPOMaster.scraped_at.desc()).limit(new_records).all()
-                print(f"\n   New IPO(s):")
-                for ipo in new_ipos:
-                    print(f"   - {ipo.ipo_name} ({ipo.status})")
-                print("-" * 60 + "\n")
-                
-                last_count = current_count
-                new_activity = True
-            
-            # Check for updates to existing IPOs
-            elif current_scraped_at and last_scraped_at and current_scraped_at > last_scraped_at:
-                print(f"🔄 EXISTING IPOS UPDATED!")
-                print(f"   Time: {datetime.now().strftime('%H:%M:%S')}")
-                print(f"   Last update was at: {last_scraped_at}")
-                print(f"   New update detected at: {current_scraped_at}")
-                
-                # Find recently updated IPOs (within the last check interval + some buffer)
-                recently_updated = db.query(IPOMaster).filter(
-                    IPOMaster.scraped_at > last_scraped_at
-                ).order_by(IPOMaster.scraped_at.desc()).all()
-                
-                print(f"\n   Updated IPO(s):")
-                for ipo in recently_updated:
-                    print(f"   - {ipo.ipo_name} ({ipo.status}) - Updated at {ipo.scraped_at}")
-                print("-" * 60 + "\n")
-                
-                last_scraped_at = current_scraped_at
-                new_activity = True
-            
-            if not new_activity:
-                # Optional: Show a heartbeat every few minutes
-                pass
-            
-            db.close()
-            
+        if subscription is None:
+            _poll(poll_interval, total, last_id, last_scraped_at)
+        else:
+            _listen(subscription, batch_window, total)
     except KeyboardInterrupt:
         print("\n\n✋ Monitor stopped by user.")
-        print(f"Final count: {last_count} IPOs")
+    finally:
+        if subscription is not None:
+            subscription.close()
+
+def _listen(subscription, batch_window, total):
+    reported_drops = 0
+    while True:
+        event = subscription.get()
+        # Group whatever else arrives right behind it (one save_to_db batch) into one report
+        time.sleep(batch_window)
+        events = [event] + subscription.drain()
+
+        inserted = [e for e in events if e.kind == "insert"]
+        updated = [e for e in events if e.kind != "insert"]
+
+        if inserted:
+            total += len(inserted)
+            _print_inserted([(e.ipo_name, e.changes['status'][1]) for e in inserted], total)
+
+        if updated:
+            lines = []
+            for e in updated:
+                if e.kind == "status":
+                    old, new = e.changes['status']
+                    lines.append(f"{e.ipo_name}: STATUS {old} → {new}")
+                else:
+                    fields = ", ".join(f"{f} {old} → {new}" for f, (old, new) in e.changes.items())
+                    lines.append(f"{e.ipo_name}: {fields}")
+            _print_updated(lines)
+
+        if subscription.dropped > reported_drops:
+            print(f"⚠️  Monitor fell behind; {subscription.dropped - reported_drops} event(s) dropped.\n")
+            reported_drops = subscription.dropped
+
+def _poll(interval, total, last_id, last_scraped_at):
+    # save_to_db stamps scraped_at on inserts and on rows whose fields changed
+    while True:
+        time.sleep(interval)
+        db = SessionLocal()
+        try:
+            query = db.query(IPOMaster.id, IPOMaster.ipo_name, IPOMaster.status, IPOMaster.scraped_at)
+            if last_scraped_at is not None:
+                query = query.filter(or_(IPOMaster.id > last_id, IPOMaster.scraped_at > last_scraped_at))
+            rows = query.order_by(IPOMaster.id).all()
+        finally:
+            db.close()
+
+        inserted = [r for r in rows if r.id > last_id]
+        updated = [r for r in rows if r.id <= last_id]
+        if inserted:
+            total += len(inserted)
+            _print_inserted([(r.ipo_name, r.status) for r in inserted], total)
+            last_id = inserted[-1].id
+        if updated:
+            _print_updated([f"{r.ipo_name} ({r.status}) - Updated at {r.scraped_at}" for r in updated])
+        stamps = [r.scraped_at for r in rows if r.scraped_at is not None]
+        if stamps:
+            last_scraped_at = max(stamps + ([last_scraped_at] if last_scraped_at else []))
 
 if __name__ == "__main__":
-    monitor_database()
+    # Standalone: no writer in this process, so watch the database itself
+    monitor_database(poll_interval=10)
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Importing ipo_ai creates its tables; keep every test run on a throwaway database
+TEST_DIR = tempfile.mkdtemp(prefix="ipo_tests_")
+os.environ["IPO_DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
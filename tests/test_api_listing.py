@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ipo_ai.api.listing import DEFAULT_LIMIT
+from ipo_ai.api.main import app
+from ipo_ai.db.database import SessionLocal
+from ipo_ai.db.events import data_version
+from ipo_ai.db.models import IPOMaster
+
+ROWS = DEFAULT_LIMIT + 37
+
+@pytest.fixture(scope="module")
+def client():
+    db = SessionLocal()
+    try:
+        start = datetime(2024, 1, 1)
+        db.bulk_insert_mappings(IPOMaster, [
+            {"ipo_name": f"Paging Test {i} Ltd", "status": "listed", "gmp": float(i % 40),
+             "scraped_at": start + timedelta(minutes=i)}
+            for i in range(ROWS)
+        ])
+        db.commit()
+    finally:
+        db.close()
+    data_version.bump()
+    # No `with`: the lifespan (scheduler, model loading) is not needed here
+    return TestClient(app)
+
+def test_unpaginated_request_returns_every_row(client):
+    response = client.get("/api/ipos", params={"status": "listed", "name": "Paging Test"})
+    assert response.status_code == 200
+    assert len(response.json()) == ROWS
+    assert "X-Next-Cursor" not in response.headers
+
+def test_limit_pages_with_cursor_header(client):
+    params = {"status": "listed", "name": "Paging Test", "limit": DEFAULT_LIMIT}
+    first = client.get("/api/ipos", params=params)
+    assert len(first.json()) == DEFAULT_LIMIT
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/api/ipos", params=dict(params, cursor=cursor))
+    assert len(second.json()) == ROWS - DEFAULT_LIMIT
+    assert "X-Next-Cursor" not in second.headers
+    names = {row["ipo_name"] for row in first.json() + second.json()}
+    assert len(names) == ROWS
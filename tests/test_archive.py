@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from ipo_ai.scraper import archive, ipo_scraper
+from ipo_ai.scraper.archive import PageArchive
+
+
+def test_reparse_replays_only_the_latest_version_of_each_url(tmp_path, monkeypatch):
+    store = PageArchive(str(tmp_path), codec="gzip")
+    fetches = [
+        ("https://a.example/ipos", "Source A", "<p>a old</p>", datetime(2026, 1, 1, 9)),
+        ("https://b.example/ipos", "Source B", "<p>b only</p>", datetime(2026, 1, 1, 10)),
+        ("https://a.example/ipos", "Source A", "<p>a new</p>", datetime(2026, 1, 2, 9)),
+        ("https://a.example/ipos", "Source A", "<p>a old</p>", datetime(2026, 1, 1, 8)),
+    ]
+    for url, category, html, fetched_at in fetches:
+        archive._record(url, category, store.store(html), fetched_at)
+
+    parsed = []
+    def parse(job):
+        _, category, content_hash, _ = job
+        parsed.append((category, store.load(content_hash)))
+        return [], None
+    monkeypatch.setattr(archive, "parse_archived", parse)
+    monkeypatch.setattr(ipo_scraper, "load_config", lambda: {})
+    monkeypatch.setattr(ipo_scraper, "parser_for", lambda category, config=None: "table")
+
+    summary = archive.reparse(since=datetime(2026, 1, 1), workers=1, dry_run=True, archive=store)
+
+    assert summary["fetches"] == 4
+    assert parsed == [("Source B", "<p>b only</p>"), ("Source A", "<p>a new</p>")]
@@ -0,0 +1,50 @@
+from ipo_ai.scraper import driver_pool
+from ipo_ai.scraper.driver_pool import DriverPool, PooledDriver
+
+
+class FakeDriver:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_acquire_skips_every_dead_idle_driver(monkeypatch):
+    created = []
+    def create():
+        created.append(FakeDriver())
+        return created[-1]
+    monkeypatch.setattr(driver_pool, "create_driver", create)
+
+    pool = DriverPool(size=3)
+    dead = [FakeDriver(alive=False) for _ in range(3)]
+    for driver in dead:
+        pool._idle.put(PooledDriver(driver))
+    pool._created = 3
+
+    with pool.acquire() as driver:
+        assert driver is created[0]
+    assert all(d.quit_called for d in dead)
+    assert pool.recycled == 3
+    assert pool._created == 1
+
+
+def test_acquire_prefers_a_healthy_idle_driver(monkeypatch):
+    monkeypatch.setattr(driver_pool, "create_driver", lambda: FakeDriver())
+
+    pool = DriverPool(size=3)
+    live, dead = FakeDriver(), FakeDriver(alive=False)
+    pool._idle.put(PooledDriver(live))
+    pool._idle.put(PooledDriver(dead))  # LIFO: checked out first
+    pool._created = 2
+
+    with pool.acquire() as driver:
+        assert driver is live
+    assert dead.quit_called and pool.recycled == 1
@@ -0,0 +1,17 @@
+import pandas as pd
+import pytest
+
+from ipo_ai.utils.normalize import clean_column, to_number
+
+AMOUNTS = [("1,200.50 Cr", 1200.5), ("₹50 Lakh", 0.5), ("50 Lakhs", 0.5), ("10 lac", 0.1),
+           ("10 lacs", 0.1), ("10 Lacs.", 0.1), ("75L", 0.75), ("12 Crore", 12.0), ("--", 0.0)]
+
+
+@pytest.mark.parametrize("text, crore", AMOUNTS)
+def test_amount_units(text, crore):
+    assert to_number(text, "amount") == pytest.approx(crore)
+
+
+def test_amount_column_matches_scalar():
+    column = clean_column(pd.Series([text for text, _ in AMOUNTS]), "amount")
+    assert column.tolist() == pytest.approx([crore for _, crore in AMOUNTS])
@@ -0,0 +1,36 @@
+import time
+
+from ipo_ai.scraper.pipeline import Page, Pipeline
+
+def parsed_page(i, rows=1):
+    page = Page(f"Source {i}", f"http://example.test/{i}", outcome="parsed")
+    page.rows = [{"ipo_name": f"IPO {i}-{r}"} for r in range(rows)]
+    return page
+
+def test_batch_flushes_at_deadline_while_pages_keep_arriving():
+    flushed = []
+
+    def settle(page):
+        time.sleep(0.005)  # the writer is the bottleneck, so its queue is never empty
+        return True
+
+    pipeline = Pipeline(parse=None, settle=settle, write=lambda pages: flushed.append((time.monotonic(), len(pages))),
+                        queue_size=4, batch_rows=1000, batch_ms=50)
+    with pipeline:
+        start = time.monotonic()
+        for i in range(60):
+            pipeline.feed(parsed_page(i))
+        first_flush = flushed[0][0] if flushed else None
+    assert first_flush is not None, "nothing was written before the pipeline closed"
+    assert first_flush - start < 0.2
+    assert len(flushed) > 2
+    assert sum(n for _, n in flushed) == 60
+
+def test_batch_flushes_at_row_cap():
+    flushed = []
+    pipeline = Pipeline(parse=None, settle=lambda page: True, write=lambda pages: flushed.append(len(pages)),
+                        batch_rows=10, batch_ms=60000)
+    with pipeline:
+        for i in range(5):
+            pipeline.feed(parsed_page(i, rows=5))
+    assert flushed == [2, 2, 1]
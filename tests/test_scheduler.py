@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from ipo_ai.scraper import scheduler as scheduler_module
+from ipo_ai.scraper.scheduler import SourceScheduler
+
+CONFIG = {"sites": [
+    {"name": "Chittorgarh IPO", "url": "https://cg.example/ipo"},
+    {"name": "IPO Watch", "url": "https://watch.example/ipos"},
+]}
+
+
+def make_scheduler(monkeypatch, frozen):
+    monkeypatch.setattr(scheduler_module, "frozen_urls", lambda: set(frozen))
+    return SourceScheduler.from_config(CONFIG)
+
+
+def test_refresh_drops_frozen_pages_and_brings_them_back(monkeypatch):
+    frozen = set()
+    sched = make_scheduler(monkeypatch, frozen)
+    year = datetime.now().year - 2
+    category = f"Chittorgarh IPO - SME {year}"
+    assert category in sched.sources
+
+    frozen.add(sched.sources[category].url)
+    assert sched.refresh(CONFIG) == ([], [category], [])
+    assert category not in sched.sources
+    assert category not in {s.category for s in sched.pop_due()}
+
+    frozen.clear()
+    assert sched.refresh(CONFIG) == ([category], [], [])
+    assert sched.sources[category].tier == "archive"
+    assert category in {s.category for s in sched.pop_due()}
+
+
+def test_refresh_moves_a_closed_year_to_the_archive_tier(monkeypatch):
+    sched = make_scheduler(monkeypatch, set())
+    year = datetime.now().year
+    category = f"Chittorgarh IPO - All {year}"
+    source = sched.sources[category]
+    assert source.tier == "current"
+    sched.record(source, changed=False)
+    sched.record(source, changed=False)
+    checks = source.checks
+
+    next_year = datetime(year + 1, 1, 2).timestamp()
+    added, removed, retiered = sched.refresh(CONFIG, now=next_year)
+    assert category in retiered and "IPO Watch" not in retiered
+    assert source.tier == "archive" and source.interval == source.base_interval == 86400
+    assert source.checks == checks
+    assert list(sched.sources).count(category) == 1
+    assert sum(1 for _, _, c in sched._heap if c == category) == 1
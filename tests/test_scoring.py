@@ -0,0 +1,18 @@
+from ipo_ai.db.events import ChangeEvent
+from ipo_ai.training.scoring import gained_label
+
+def test_default_gain_replaced_by_real_gain_is_a_new_label():
+    event = ChangeEvent("update", 1, "Acme Ltd", {"listing_gain": (0.0, 12.5)})
+    assert gained_label(event)
+
+def test_insert_with_default_gain_is_not_a_new_label():
+    event = ChangeEvent("insert", 1, "Acme Ltd", {"listing_gain": (None, 0.0), "best_category": (None, "")})
+    assert not gained_label(event)
+
+def test_category_filled_in_is_a_new_label():
+    event = ChangeEvent("update", 1, "Acme Ltd", {"best_category": ("", "Retail")})
+    assert gained_label(event)
+
+def test_relabel_is_not_a_new_label():
+    event = ChangeEvent("update", 1, "Acme Ltd", {"listing_gain": (8.0, 12.5)})
+    assert not gained_label(event)